@@ -1089,6 +1089,30 @@ def render_features_step():
             help="Chatbot versucht automatisch Anfragen in andere Sprachen zu übersetzen"
         )
     
+    min_relevance_score = st.slider(
+        "Relevanz-Schwelle",
+        min_value=0.0,
+        max_value=0.8,
+        value=0.2,
+        step=0.05,
+        help="Mindest-Ähnlichkeit zwischen Frage und Inhalten. Darunter antwortet der Chatbot mit der Fallback-Antwort, ohne das Sprachmodell aufzurufen"
+    )
+    
+    fallback_message = st.text_input(
+        "Fallback-Antwort",
+        placeholder="Entschuldigung, dazu habe ich leider keine Informationen.",
+        help="Antwort auf Fragen, zu denen keine passenden Inhalte gefunden werden"
+    )
+    
+    context_token_budget = st.slider(
+        "Kontext-Budget (Tokens)",
+        min_value=300,
+        max_value=6000,
+        value=1500,
+        step=100,
+        help="Maximale Länge der Inhalte, die pro Frage an das Sprachmodell gehen. Kleinere Budgets antworten schneller und günstiger"
+    )
+    
     # Verhalten speichern
     st.session_state.chatbot_config['behavior_settings'] = {
         'tone': tone,
@@ -1096,7 +1120,10 @@ def render_features_step():
         'formality': formality,
         'language': language,
         'fallback_language': fallback_language,
-        'auto_translate': auto_translate
+        'auto_translate': auto_translate,
+        'min_relevance_score': min_relevance_score,
+        'fallback_message': fallback_message,
+        'context_token_budget': context_token_budget
     }
     
     st.markdown("---")
@@ -1120,6 +1147,15 @@ def render_features_step():
     st.session_state.chatbot_config['behavior_settings']['custom_instructions'] = custom_instructions
     st.session_state.chatbot_config['behavior_settings']['forbidden_topics'] = [topic.strip() for topic in forbidden_topics.split(',') if topic.strip()]
     
+    starter_questions = st.text_area(
+        "Startfragen (eine pro Zeile)",
+        placeholder="Was bietet ihr an?\nWie sind eure Öffnungszeiten?\nWie kann ich euch erreichen?",
+        height=100,
+        help="Werden Besuchern als Vorschläge angezeigt. Die Antworten werden beim Erstellen vorberechnet und sofort ausgeliefert"
+    )
+    
+    st.session_state.chatbot_config['starter_questions'] = [question.strip() for question in starter_questions.splitlines() if question.strip()]
+    
     st.markdown('</div>', unsafe_allow_html=True)
 
 # ─── Step 5: Contact Persons ────────────────────────────────────────────────
@@ -1829,6 +1865,7 @@ def show_chatbot_creation_process():
             
             # Behavior
             'behavior_settings': config.get('behavior_settings', {}),
+            'starter_questions': config.get('starter_questions', []),
             
             # Website & Documents
             'website_config': config.get('website_config', {}),
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Recall-Vergleich quantisierter Indizes (fp16 / SQ8) und ANN-Indizes (HNSW / IVF-PQ)
+gegen den Flat-Baseline-Index
+
+Verwendung:
+    python benchmark_index_recall.py <chatbot_id>      # Vektoren eines bestehenden Chatbots
+    python benchmark_index_recall.py --synthetic 5000  # Zufallsvektoren (offline)
+    python benchmark_index_recall.py --synthetic 50000 --index-types hnsw,ivfpq
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+import faiss
+from dotenv import load_dotenv
+
+# Load environment
+load_dotenv()
+
+# Add project to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.index_builder import compare_recall
+
+def load_chatbot_vectors(chatbot_id: str) -> np.ndarray:
+    """Rohvektoren eines Chatbots (vectors.npy, bei älteren Chatbots aus dem Flat-Index rekonstruiert)"""
+    embeddings_dir = Path(f"data/chatbots/{chatbot_id}/embeddings")
+    if (embeddings_dir / "vectors.npy").exists():
+        return np.load(embeddings_dir / "vectors.npy")
+
+    index_file = embeddings_dir / "index.faiss"
+    if not index_file.exists():
+        raise FileNotFoundError(f"Kein Index für Chatbot {chatbot_id} gefunden")
+
+    index = faiss.read_index(str(index_file))
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    return index.reconstruct_n(0, index.ntotal)
+
+def synthetic_vectors(count: int, dim: int, seed: int = 42) -> np.ndarray:
+    """Normierte Zufallsvektoren mit Cluster-Struktur (ähnlich echten Embeddings)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 50), dim))
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.3 * rng.normal(size=(count, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype("float32")
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall-Vergleich quantisierter FAISS-Indizes")
+    parser.add_argument("chatbot_id", nargs="?", help="ID eines bestehenden Chatbots")
+    parser.add_argument("--synthetic", type=int, help="Anzahl synthetischer Vektoren")
+    parser.add_argument("--dim", type=int, default=1536, help="Dimension synthetischer Vektoren")
+    parser.add_argument("--k", type=int, default=5, help="Top-k für den Recall")
+    parser.add_argument("--index-types", default="", help="Zusätzliche Index-Typen, z.B. hnsw,ivfpq")
+    args = parser.parse_args()
+
+    if args.chatbot_id:
+        vectors = load_chatbot_vectors(args.chatbot_id)
+        label = f"Chatbot {args.chatbot_id}"
+    elif args.synthetic:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+        label = f"{args.synthetic} synthetische Vektoren"
+    else:
+        parser.error("chatbot_id oder --synthetic angeben")
+
+    print(f"🔍 Recall-Vergleich: {label} ({vectors.shape[0]} x {vectors.shape[1]})")
+    print("=" * 60)
+    print(f"{'Format':<8} {'recall@' + str(args.k):>10} {'Bytes/Vektor':>14} {'Suche (ms)':>12}")
+
+    index_types = [t for t in args.index_types.split(",") if t]
+    for quantization, result in compare_recall(vectors, k=args.k, index_types=index_types).items():
+        print(f"{quantization:<8} {result[f'recall@{min(args.k, len(vectors))}']:>10.4f} "
+              f"{result['bytes_per_vector']:>14} {result['search_ms']:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,17 @@ sys.path.append(str(Path(__file__).parent.parent))
 from utils.firebase_storage import FirebaseStorageManager, get_firebase_storage
 from utils.firestore_storage import FirestoreStorage
 from utils.cloud_multi_source_rag import CloudMultiSourceRAG
+from utils.multi_source_rag import relevance_settings, starter_questions
 from utils.chatbot_factory import ChatbotConfig
+from utils.index_registry import get_index_registry
+from utils.tenant_pack import get_tenant_pack
+from utils.embedding_cache import get_embedding_cache
+from utils.query_cache import get_query_embedding_cache
+from utils.answer_cache import get_answer_cache
+from utils.response_cache import get_response_cache, aget_cached_response, astream_cached_response
+from utils.chat_executor import run_blocking, shutdown_chat_executor
+from utils.event_stream import format_sse, sse_response
+from utils.llm_clients import get_client_registry
 
 # Load environment variables
 load_dotenv()
@@ -81,6 +91,8 @@ class PersistentBotService:
         self.firestore_storage = None
         self.firebase_storage = None
         self.load_attempts: Dict[str, int] = {}
+        # Ein Ladevorgang pro Bot, parallele Anfragen warten auf dessen Ergebnis
+        self.load_locks: Dict[str, asyncio.Lock] = {}
         
     async def initialize(self):
         """Initialisiere Firebase Services"""
@@ -114,7 +126,11 @@ class PersistentBotService:
                 return None
                 
             logger.info(f"🔄 Loading bot {bot_id} from Firebase...")
-            bot = await self.load_from_firebase(bot_id)
+            async with self.load_locks.setdefault(bot_id, asyncio.Lock()):
+                bot = self.active_bots.get(bot_id)
+                if bot is None or bot['status'] != 'active':
+                    # Firestore, Storage-Download und Index-Laden blockieren: im Chat-Executor
+                    bot = await run_blocking(self.load_from_firebase, bot_id)
             
             if bot:
                 self.active_bots[bot_id] = bot
@@ -131,8 +147,8 @@ class PersistentBotService:
             self.load_attempts[bot_id] = self.load_attempts.get(bot_id, 0) + 1
             return None
     
-    async def load_from_firebase(self, bot_id: str) -> Optional[Dict]:
-        """Lädt Bot-Config und RAG-System aus Firebase"""
+    def load_from_firebase(self, bot_id: str) -> Optional[Dict]:
+        """Lädt Bot-Config und RAG-System aus Firebase (blockierend)"""
         try:
             # 1. Lade Bot-Config aus Firestore (globale Suche)
             all_configs = self.firestore_storage.db.collection(
@@ -217,6 +233,7 @@ class PersistentBotService:
                 'logo_url': config.branding.get('logo_url'),
                 'welcome_message': config.branding.get('welcome_message', f"Hallo! Ich bin {config.name}")
             },
+            'starter_questions': starter_questions(config.branding),
             'features': {
                 'email_capture': config.branding.get('email_capture_enabled', False),
                 'contact_persons': config.branding.get('contact_persons_enabled', False)
@@ -229,6 +246,7 @@ class PersistentBotService:
         """Entfernt Bot aus Cache (für Memory Management)"""
         if bot_id in self.active_bots:
             del self.active_bots[bot_id]
+            get_index_registry().invalidate(bot_id)
             logger.info(f"🗑️ Bot {bot_id} removed from cache")
 
 # Global Service Instance
@@ -247,6 +265,8 @@ async def lifespan(app: FastAPI):
     
     try:
         await bot_service.initialize()
+        # Verbindungen zu OpenRouter/OpenAI vor der ersten Nachricht aufbauen
+        await get_client_registry().awarm()
         logger.info("✅ All services initialized successfully")
     except Exception as e:
         logger.error(f"❌ Failed to initialize services: {e}")
@@ -257,6 +277,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down Persistent Chatbot API Service...")
     bot_service.active_bots.clear()
+    get_index_registry().clear()
+    await get_client_registry().aclose()
+    shutdown_chat_executor()
 
 # ─── FastAPI App Initialization ──────────────────────────────────────────────
 
@@ -301,6 +324,13 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "active_bots": len(bot_service.active_bots),
+        "index_registry": get_index_registry().stats(),
+        "tenant_pack": get_tenant_pack().stats(),
+        "embedding_cache": get_embedding_cache().stats() if get_embedding_cache() else None,
+        "query_embedding_cache": get_query_embedding_cache().stats(),
+        "answer_cache": get_answer_cache().stats() if get_answer_cache() else None,
+        "response_cache": get_response_cache().stats() if get_response_cache() else None,
+        "llm_clients": get_client_registry().stats(),
         "service": "persistent-chatbot-api",
         "version": "1.0.0"
     }
@@ -368,6 +398,68 @@ async def get_bot_status(bot_id: str):
             "error": str(e)
         }
 
+def save_public_conversation(owner_user_id: Optional[str], bot_id: str, conversation_id: str,
+                             user_message: str, response_data: Dict, client_ip: Optional[str]):
+    """Speichert Frage und Antwort in Firestore (für Bot-Owner Analytics), Fehler sind nicht kritisch"""
+    if not (owner_user_id and bot_service.firestore_storage):
+        return
+    try:
+        # User message
+        bot_service.firestore_storage.save_conversation_message(
+            user_id=owner_user_id,
+            chatbot_id=bot_id,
+            conversation_id=conversation_id,
+            role="user",
+            content=user_message,
+            metadata={
+                "timestamp": datetime.now().isoformat(),
+                "client_ip": client_ip,
+                "source": "public_api"
+            }
+        )
+        
+        # Bot response
+        bot_service.firestore_storage.save_conversation_message(
+            user_id=owner_user_id,
+            chatbot_id=bot_id,
+            conversation_id=conversation_id,
+            role="assistant",
+            content=response_data["response"],
+            metadata={
+                "timestamp": datetime.now().isoformat(),
+                "sources": response_data.get("sources", []),
+                "source": "public_api"
+            }
+        )
+        
+    except Exception as storage_error:
+        logger.warning(f"⚠️ Failed to save conversation for analytics: {storage_error}")
+        # Nicht kritisch - Chat funktioniert trotzdem
+
+def public_chat_metadata(config: ChatbotConfig, user_message: str) -> Dict:
+    """Modal-Trigger-Logik (vereinfacht für öffentliche API)"""
+    branding = config.branding or {}
+    features = branding.get('features', {})
+    
+    metadata = {}
+    
+    # Email Capture (einfach basierend auf Keywords)
+    if features.get('email_capture_enabled', False):
+        email_keywords = ['email', 'kontakt', 'angebot', 'beratung', 'preise']
+        if any(keyword in user_message.lower() for keyword in email_keywords):
+            metadata['show_email_modal'] = True
+            metadata['email_prompt'] = features.get('email_capture_config', {}).get('prompt', 
+                'Für detaillierte Informationen können Sie gerne Ihre Email-Adresse hinterlassen.')
+    
+    # Contact Persons
+    if features.get('contact_persons_enabled', False):
+        contact_keywords = ['ansprechpartner', 'kontakt', 'beratung', 'hilfe', 'support']
+        if any(keyword in user_message.lower() for keyword in contact_keywords):
+            metadata['show_contact_modal'] = True
+            metadata['contact_persons'] = branding.get('contact_persons', [])
+    
+    return metadata
+
 @app.post("/api/v1/public/bot/{bot_id}/chat", response_model=ChatResponse)
 async def chat_with_public_bot(bot_id: str, message: ChatMessage, request: Request):
     """
@@ -392,74 +484,25 @@ async def chat_with_public_bot(bot_id: str, message: ChatMessage, request: Reque
         # Client-IP für Analytics
         client_ip = request.headers.get("x-forwarded-for", request.client.host)
         
-        # Chat-Response generieren
-        response_data = rag_system.get_response(
+        # Chat-Response generieren (Wiederholungen aus dem Antwort-Cache,
+        # unter der Relevanz-Schwelle ohne LLM-Aufruf)
+        response_data = await aget_cached_response(
+            rag_system,
             query=message.message,
-            conversation_id=conversation_id
+            conversation_id=conversation_id,
+            **relevance_settings(config.branding)
         )
         
         # Message in Firestore speichern (für Bot-Owner Analytics)
-        if owner_user_id and bot_service.firestore_storage:
-            try:
-                # User message
-                bot_service.firestore_storage.save_conversation_message(
-                    user_id=owner_user_id,
-                    chatbot_id=bot_id,
-                    conversation_id=conversation_id,
-                    role="user",
-                    content=message.message,
-                    metadata={
-                        "timestamp": datetime.now().isoformat(),
-                        "client_ip": client_ip,
-                        "source": "public_api"
-                    }
-                )
-                
-                # Bot response
-                bot_service.firestore_storage.save_conversation_message(
-                    user_id=owner_user_id,
-                    chatbot_id=bot_id,
-                    conversation_id=conversation_id,
-                    role="assistant",
-                    content=response_data["response"],
-                    metadata={
-                        "timestamp": datetime.now().isoformat(),
-                        "sources": response_data.get("sources", []),
-                        "source": "public_api"
-                    }
-                )
-                
-            except Exception as storage_error:
-                logger.warning(f"⚠️ Failed to save conversation for analytics: {storage_error}")
-                # Nicht kritisch - Chat funktioniert trotzdem
-        
-        # Modal-Trigger-Logik (vereinfacht für öffentliche API)
-        branding = config.branding or {}
-        features = branding.get('features', {})
-        
-        metadata = {}
-        
-        # Email Capture (einfach basierend auf Keywords)
-        if features.get('email_capture_enabled', False):
-            email_keywords = ['email', 'kontakt', 'angebot', 'beratung', 'preise']
-            if any(keyword in message.message.lower() for keyword in email_keywords):
-                metadata['show_email_modal'] = True
-                metadata['email_prompt'] = features.get('email_capture_config', {}).get('prompt', 
-                    'Für detaillierte Informationen können Sie gerne Ihre Email-Adresse hinterlassen.')
-        
-        # Contact Persons
-        if features.get('contact_persons_enabled', False):
-            contact_keywords = ['ansprechpartner', 'kontakt', 'beratung', 'hilfe', 'support']
-            if any(keyword in message.message.lower() for keyword in contact_keywords):
-                metadata['show_contact_modal'] = True
-                metadata['contact_persons'] = branding.get('contact_persons', [])
+        await run_blocking(save_public_conversation, owner_user_id, bot_id, conversation_id,
+                           message.message, response_data, client_ip)
         
         return ChatResponse(
             response=response_data["response"],
             sources=response_data.get("sources", []),
             conversation_id=conversation_id,
             timestamp=datetime.now(),
-            metadata=metadata
+            metadata=public_chat_metadata(config, message.message)
         )
         
     except HTTPException:
@@ -468,6 +511,53 @@ async def chat_with_public_bot(bot_id: str, message: ChatMessage, request: Reque
         logger.error(f"Chat error for bot {bot_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
+@app.post("/api/v1/public/bot/{bot_id}/chat/stream")
+async def stream_chat_with_public_bot(bot_id: str, message: ChatMessage, request: Request):
+    """
+    Öffentlicher Chat-Endpoint mit Streaming (Server-Sent Events)
+    
+    Sendet "token"-Events ({"content": ...}) sobald das LLM sie liefert, danach ein
+    "done"-Event mit den Feldern von ChatResponse (vollständige Antwort, Quellen, Modal-Metadaten).
+    Die Konversation wird erst nach dem Stream gespeichert.
+    """
+    logger.info(f"🔍 Public streaming chat request for bot: {bot_id}")
+    
+    bot = await bot_service.get_bot(bot_id)
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found or inactive")
+    
+    rag_system = bot['rag_system']
+    config = bot['config']
+    owner_user_id = bot['owner_user_id']
+    conversation_id = message.conversation_id or str(uuid.uuid4())
+    client_ip = request.headers.get("x-forwarded-for", request.client.host)
+    
+    async def events():
+        response_data = None
+        async for event in astream_cached_response(
+            rag_system,
+            query=message.message,
+            conversation_id=conversation_id,
+            **relevance_settings(config.branding)
+        ):
+            if event["event"] == "done":
+                response_data = event["data"]
+            else:
+                yield format_sse(event["event"], event["data"])
+        
+        yield format_sse("done", {
+            "response": response_data["response"],
+            "sources": response_data.get("sources", []),
+            "conversation_id": conversation_id,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": public_chat_metadata(config, message.message)
+        })
+        
+        await run_blocking(save_public_conversation, owner_user_id, bot_id, conversation_id,
+                           message.message, response_data, client_ip)
+    
+    return sse_response(events())
+
 @app.post("/api/v1/public/bot/{bot_id}/analytics")
 async def track_analytics_event(bot_id: str, event: AnalyticsEvent):
     """
@@ -782,6 +872,7 @@ class SessionResponse(BaseModel):
     session_id: str
     bot_id: str
     welcome_message: str
+    starter_questions: List[str] = []
     status: str = "active"
 
 class MessageRequest(BaseModel):
@@ -831,6 +922,7 @@ async def create_chat_session(request: SessionRequest):
             session_id=session_id,
             bot_id=bot_id,
             welcome_message=welcome_message,
+            starter_questions=starter_questions(config.branding),
             status="active"
         )
         
@@ -863,11 +955,13 @@ async def send_chat_message(request: MessageRequest):
         if not bot:
             raise HTTPException(status_code=404, detail="Bot not found")
         
-        # RAG Response generieren
+        # RAG Response generieren (Wiederholungen aus dem Antwort-Cache)
         rag_system = bot['rag_system']
-        response_data = rag_system.get_response(
+        response_data = await aget_cached_response(
+            rag_system,
             query=message,
-            conversation_id=conversation_id
+            conversation_id=conversation_id,
+            **relevance_settings(bot['config'].branding)
         )
         
         # Messages zur Session hinzufügen
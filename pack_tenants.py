@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Packt alle kleinen Chatbots in den gemeinsamen Multi-Tenant-Vektorspeicher
+
+Verwendung:
+    python pack_tenants.py                   # Chatbots bis TENANT_PACK_MAX_CHUNKS Chunks
+    python pack_tenants.py --max-chunks 500
+
+Danach bedienen Worker mit TENANT_PACK=true diese Chatbots aus dem Pack. Chatbots,
+die nach dem Packen neu gebaut wurden, fallen bis zum nächsten Lauf auf ihren
+eigenen Index zurück.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Load environment
+load_dotenv()
+
+# Add project to path
+sys.path.append(str(Path(__file__).parent))
+
+from utils.tenant_pack import build_tenant_pack, TENANT_PACK_DIR, TENANT_PACK_MAX_CHUNKS
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-Tenant-Vektorspeicher für kleine Chatbots bauen")
+    parser.add_argument("--chatbots-dir", default="data/chatbots", help="Verzeichnis der Chatbots")
+    parser.add_argument("--pack-dir", default=str(TENANT_PACK_DIR), help="Zielverzeichnis des Packs")
+    parser.add_argument("--max-chunks", type=int, default=TENANT_PACK_MAX_CHUNKS, help="Maximale Chunks pro Chatbot")
+    args = parser.parse_args()
+
+    stats = build_tenant_pack(Path(args.chatbots_dir), Path(args.pack_dir), args.max_chunks)
+    print(f"📦 {stats['tenants']} Chatbots gepackt ({stats['rows']} Vektoren), "
+          f"{stats['skipped']} übersprungen -> {stats['build']}")
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,8 @@ from openai import OpenAI
 
 # Platform imports
 from utils.chatbot_factory import chatbot_factory, ChatbotConfig
-from utils.multi_source_rag import MultiSourceRAG
+from utils.multi_source_rag import MultiSourceRAG, relevance_settings
+from utils.context_packer import pack_context
 from supabase_service import supabase_chat_service
 from device_id import get_device_id
 
@@ -240,7 +241,7 @@ def _render_sources(sources: List[Dict]) -> str:
     return source_html
 
 def build_system_prompt_for_chatbot(config: ChatbotConfig, context: List[Dict], user_question: str, chat_history: List[Dict] = None) -> List[Dict]:
-    """Baut System-Prompt für spezifischen Chatbot"""
+    """Baut System-Prompt für spezifischen Chatbot (Kontext auf das Token-Budget des Chatbots gepackt)"""
     
     system_prompt = f"""Du bist {config.name}, ein freundlicher und hilfreicher KI-Assistent.
 
@@ -260,6 +261,7 @@ Deine Aufgabe:
 Nutze nur die folgenden kontextuellen Informationen. 
 Wenn Du die Antwort nicht findest, entschuldige Dich kurz und erkläre deine Grenzen."""
 
+    context = pack_context(context, relevance_settings(config.branding)["context_budget"])
     ctx_text = "\n\n---\n\n".join(c["text"] for c in context)
     
     # Build messages array
@@ -321,11 +323,12 @@ def ask_chatbot(chatbot_id: str, question: str, conversation_id: str = None) ->
                 for msg in recent_messages
             ]
         
-        # Relevante Chunks abrufen
-        relevant_chunks = rag_system.retrieve_chunks(question, top_k=5)
+        # Relevante Chunks abrufen (unter der Relevanz-Schwelle kein LLM-Aufruf)
+        relevance = relevance_settings(config.branding)
+        relevant_chunks = rag_system.retrieve_chunks(question, top_k=5, min_score=relevance["min_score"])
         
         if not relevant_chunks:
-            return f"Entschuldigung, ich konnte keine relevanten Informationen zu Ihrer Frage finden. Können Sie Ihre Frage anders formulieren?", []
+            return relevance["fallback_response"] or f"Entschuldigung, ich konnte keine relevanten Informationen zu Ihrer Frage finden. Können Sie Ihre Frage anders formulieren?", []
         
         # Build messages für LLM
         messages = build_system_prompt_for_chatbot(config, relevant_chunks, question, chat_history)
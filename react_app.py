@@ -10,6 +10,7 @@ from typing import Dict, List, Optional, Union
 from datetime import datetime
 import asyncio
 import logging
+import threading
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Depends, BackgroundTasks, Request
@@ -21,9 +22,19 @@ from dotenv import load_dotenv
 
 # Import existing utilities
 from utils.chatbot_factory import ChatbotFactory, ChatbotConfig
-from utils.multi_source_rag import MultiSourceRAG
+from utils.multi_source_rag import MultiSourceRAG, relevance_settings, starter_questions
 from utils.cloud_multi_source_rag import CloudMultiSourceRAG
 from utils.pdf_processor import document_processor
+from utils.index_registry import get_index_registry
+from utils.tenant_pack import get_tenant_pack
+from utils.embedding_cache import get_embedding_cache
+from utils.query_cache import get_query_embedding_cache
+from utils.answer_cache import get_answer_cache
+from utils.response_cache import get_response_cache, aget_cached_response, astream_cached_response
+from utils.chat_executor import run_blocking, shutdown_chat_executor
+from utils.event_stream import format_sse, sse_response
+from utils.llm_clients import get_client_registry
+from utils.build_checkpoint import BuildCheckpoint, claim_interrupted_jobs
 
 # Import Firebase authentication and Firestore storage
 from utils.firebase_auth import get_current_user, get_current_user_hybrid
@@ -49,6 +60,16 @@ class CreateChatbotRequest(BaseModel):
     contact_persons: Optional[List[Dict]] = None
     behavior_settings: Optional[Dict] = None
     deployment_config: Optional[Dict] = None
+    embedding: Optional[Dict] = None  # {"backend": "openai|local|hashing", "model": ..., "dimensions": ...}
+    index: Optional[Dict] = None  # {"quantization": "none|fp16|sq8", "type": "auto|flat|hnsw|ivfpq", "dedup_threshold": 0.85}
+
+class WebsiteSourceRequest(BaseModel):
+    url: str = Field(..., min_length=1, max_length=2000)
+
+class RetrieveRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=1000)
+    top_k: int = Field(default=5, ge=1, le=50)
+    min_score: Optional[float] = None
 
 class UpdateChatbotRequest(BaseModel):
     name: Optional[str] = None
@@ -91,8 +112,14 @@ class ConversationMessage(BaseModel):
 chatbot_factory = None
 firestore_storage = None
 active_chats: Dict[str, MultiSourceRAG] = {}
+# One loader per chatbot, concurrent chat requests wait for it instead of loading twice
+chat_load_locks: Dict[str, threading.Lock] = {}
+chat_load_locks_guard = threading.Lock()
 creation_progress: Dict[str, Dict] = {}
 
+# How often to look for interrupted build jobs (seconds)
+BUILD_JOB_RESUME_INTERVAL = int(os.getenv("BUILD_JOB_RESUME_INTERVAL", "60"))
+
 # ─── Lifecycle Management ────────────────────────────────────────────────────
 
 @asynccontextmanager
@@ -110,11 +137,21 @@ async def lifespan(app: FastAPI):
     # Initialize active chats dictionary (will be loaded per-user as needed)
     logger.info("✅ Firestore storage initialized - chatbots will be loaded per-user")
     
+    # Open pooled LLM/embedding connections before the first chat request
+    await get_client_registry().awarm()
+    
+    # Resume chatbot builds interrupted by a restart (redeploy, OOM)
+    resume_task = asyncio.create_task(resume_interrupted_builds())
+    
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Chatbot Platform API...")
+    resume_task.cancel()
     active_chats.clear()
+    get_index_registry().clear()
+    await get_client_registry().aclose()
+    shutdown_chat_executor()
 
 # ─── FastAPI App Initialization ──────────────────────────────────────────────
 
@@ -165,6 +202,40 @@ def sanitize_filename(filename: str) -> str:
     import re
     return re.sub(r'[^\w\-_\.]', '_', filename)
 
+class MockUploadedFile:
+    """Wraps a stored upload so pdf_processor can read it like a Streamlit UploadedFile"""
+    def __init__(self, name, path, size):
+        self.name = name
+        self.file_path = Path(path)
+        self.size = size
+        self._content = None
+    
+    def read(self):
+        """Read file content (for pdf_processor compatibility)"""
+        if self._content is None:
+            self._content = self.file_path.read_bytes()
+        return self._content
+    
+    def getbuffer(self):
+        """Get buffer (for legacy compatibility)"""
+        return self.read()
+
+async def require_chatbot_owner(current_user: dict, chatbot_id: str) -> str:
+    """Return the user id if the current user owns the chatbot, else raise (Firestore lookup off the event loop)"""
+    user_id = current_user.get("id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found")
+    if not await run_blocking(firestore_storage.user_owns_chatbot, user_id, chatbot_id):
+        raise HTTPException(status_code=404, detail="Chatbot not found")
+    return user_id
+
+def get_rag_system(chatbot_id: str) -> MultiSourceRAG:
+    """Active RAG system of a chatbot or a fresh cloud-backed instance"""
+    rag_system = active_chats.get(chatbot_id)
+    if rag_system is None:
+        rag_system = CloudMultiSourceRAG(chatbot_id=chatbot_id, use_cloud_storage=True)
+    return rag_system
+
 # ─── Health Check ────────────────────────────────────────────────────────────
 
 @app.get("/api/health")
@@ -174,6 +245,13 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "active_chatbots": len(active_chats),
+        "index_registry": get_index_registry().stats(),
+        "tenant_pack": get_tenant_pack().stats(),
+        "embedding_cache": get_embedding_cache().stats() if get_embedding_cache() else None,
+        "query_embedding_cache": get_query_embedding_cache().stats(),
+        "answer_cache": get_answer_cache().stats() if get_answer_cache() else None,
+        "response_cache": get_response_cache().stats() if get_response_cache() else None,
+        "llm_clients": get_client_registry().stats(),
         "version": "2.0.0"
     }
 
@@ -337,23 +415,6 @@ async def create_chatbot_background(
             progress_callback("Processing uploaded files...", 0.1)
             
             # Create mock file objects that chatbot_factory can process
-            class MockUploadedFile:
-                def __init__(self, name, path, size):
-                    self.name = name
-                    self.file_path = Path(path)
-                    self.size = size
-                    self._content = None
-                
-                def read(self):
-                    """Read file content (for pdf_processor compatibility)"""
-                    if self._content is None:
-                        self._content = self.file_path.read_bytes()
-                    return self._content
-                
-                def getbuffer(self):
-                    """Get buffer (for legacy compatibility)"""
-                    return self.read()
-            
             for file_data in uploaded_file_paths:
                 mock_file = MockUploadedFile(
                     file_data["name"],
@@ -369,12 +430,15 @@ async def create_chatbot_background(
             "contact_persons": request.contact_persons or [],
             "behavior_settings": request.behavior_settings or {},
             "deployment_config": request.deployment_config or {},
-            "manual_text": request.manual_text or ""
+            "manual_text": request.manual_text or "",
+            "embedding": request.embedding or {},
+            "index": request.index or {}
         }
         
         # Create chatbot using existing factory
         progress_callback("Creating chatbot...", 0.2)
         
+        # The creation id doubles as build job id, so an interrupted build can be resumed
         chatbot_id = chatbot_factory.create_chatbot(
             name=request.name,
             description=request.description,
@@ -382,43 +446,14 @@ async def create_chatbot_background(
             uploaded_documents=uploaded_documents,
             branding=request.branding or {},
             extended_config=extended_config,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            build_job_id=creation_id,
+            job_context={"user_id": user_id}
         )
         
         # Store chatbot config in Supabase for user
         if chatbot_id:
-            progress_callback("Saving to user account...", 0.8)
-            
-            # Get the created chatbot config
-            chatbot_config = chatbot_factory.load_chatbot_config(chatbot_id)
-            if chatbot_config:
-                # Store in Supabase with user_id
-                firestore_storage.create_chatbot_config(user_id, chatbot_config)
-                logger.info(f"✅ Stored chatbot {chatbot_id} for user {user_id}")
-            
-            progress_callback("Initializing chat system...", 0.9)
-            
-            rag_system = CloudMultiSourceRAG(chatbot_id=chatbot_id, use_cloud_storage=True)
-            # Versuche RAG-System zu laden (lokal oder von Cloud)
-            try:
-                rag_system.load_rag_system()
-                active_chats[chatbot_id] = rag_system
-                logger.info(f"✅ Activated chatbot: {request.name} ({chatbot_id})")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to activate chatbot {chatbot_id}: {e}")
-                # Chatbot ist trotzdem erstellt, nur nicht sofort verfügbar
-            
-            # Update progress with completion
-            creation_progress[creation_id] = {
-                "message": "Chatbot created successfully!",
-                "progress": 1.0,
-                "timestamp": datetime.now().isoformat(),
-                "status": "completed",
-                "chatbot_id": chatbot_id,
-                "chatbot_url": f"/chatbot/{chatbot_id}",
-                "user_id": user_id,
-                "creation_id": creation_id  # Add creation_id for reference
-            }
+            finalize_created_chatbot(creation_id, user_id, chatbot_id, progress_callback)
         
         # Cleanup temp files
         upload_dir = Path("temp_uploads") / creation_id
@@ -436,11 +471,86 @@ async def create_chatbot_background(
             "error": str(e)
         }
 
+def finalize_created_chatbot(creation_id: str, user_id: str, chatbot_id: str, progress_callback):
+    """Store a freshly built chatbot for its user and activate it"""
+    progress_callback("Saving to user account...", 0.8)
+    
+    # Get the created chatbot config
+    chatbot_config = chatbot_factory.load_chatbot_config(chatbot_id)
+    if chatbot_config:
+        # Store in Supabase with user_id
+        firestore_storage.create_chatbot_config(user_id, chatbot_config)
+        logger.info(f"✅ Stored chatbot {chatbot_id} for user {user_id}")
+    
+    progress_callback("Initializing chat system...", 0.9)
+    
+    rag_system = CloudMultiSourceRAG(chatbot_id=chatbot_id, use_cloud_storage=True)
+    # Versuche RAG-System zu laden (lokal oder von Cloud)
+    try:
+        rag_system.load_rag_system()
+        active_chats[chatbot_id] = rag_system
+        logger.info(f"✅ Activated chatbot: {chatbot_id}")
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to activate chatbot {chatbot_id}: {e}")
+        # Chatbot ist trotzdem erstellt, nur nicht sofort verfügbar
+    
+    # Update progress with completion
+    creation_progress[creation_id] = {
+        "message": "Chatbot created successfully!",
+        "progress": 1.0,
+        "timestamp": datetime.now().isoformat(),
+        "status": "completed",
+        "chatbot_id": chatbot_id,
+        "chatbot_url": f"/chatbot/{chatbot_id}",
+        "user_id": user_id,
+        "creation_id": creation_id  # Add creation_id for reference
+    }
+
+async def resume_interrupted_builds():
+    """Periodically pick up build jobs whose process died and continue from their last checkpoint"""
+    while True:
+        try:
+            for checkpoint in await asyncio.to_thread(claim_interrupted_jobs):
+                job = checkpoint.load_job()
+                creation_id = checkpoint.job_id
+                user_id = job.get("context", {}).get("user_id")
+                logger.info(f"♻️ Resuming interrupted build {creation_id} (chatbot {job['chatbot_id']})")
+                
+                progress_callback = await progress_callback_factory(creation_id)
+                chatbot_id = await asyncio.to_thread(chatbot_factory.resume_build_job, checkpoint, progress_callback)
+                
+                if chatbot_id and user_id:
+                    await asyncio.to_thread(finalize_created_chatbot, creation_id, user_id, chatbot_id, progress_callback)
+                elif not chatbot_id:
+                    creation_progress[creation_id] = {
+                        "message": "Creation failed after restart",
+                        "progress": 0.0,
+                        "timestamp": datetime.now().isoformat(),
+                        "status": "error",
+                        "error": checkpoint.load_job().get("error", "unknown")
+                    }
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Build job resume failed: {e}")
+        
+        await asyncio.sleep(BUILD_JOB_RESUME_INTERVAL)
+
 @app.get("/api/chatbots/creation/{creation_id}/progress")
 async def get_creation_progress(creation_id: str):
     """Get chatbot creation progress"""
     if creation_id not in creation_progress:
-        raise HTTPException(status_code=404, detail="Creation ID not found")
+        # After a restart the in-memory progress is gone, but the build job may still be on disk
+        checkpoint = BuildCheckpoint(creation_id)
+        if not checkpoint.job_file.exists():
+            raise HTTPException(status_code=404, detail="Creation ID not found")
+        job = checkpoint.load_job()
+        return {
+            "message": job.get("error") or job.get("message") or "Waiting for build to resume...",
+            "progress": job.get("progress", 0.0),
+            "timestamp": datetime.fromtimestamp(job.get("heartbeat_at", 0)).isoformat(),
+            "status": "error" if job.get("status") == "failed" else "processing"
+        }
     
     return creation_progress[creation_id]
 
@@ -486,108 +596,395 @@ async def delete_chatbot(chatbot_id: str):
         logger.error(f"Failed to delete chatbot {chatbot_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# ─── Chat Endpoints ──────────────────────────────────────────────────────────
+# ─── Source Management Endpoints ─────────────────────────────────────────────
 
-@app.post("/api/chat/{chatbot_id}", response_model=ChatResponse)
-async def chat_with_bot(chatbot_id: str, message: ChatMessage):
-    """Send message to chatbot with conversation tracking"""
+@app.get("/api/chatbots/{chatbot_id}/sources")
+async def list_chatbot_sources(chatbot_id: str, current_user: dict = Depends(get_current_user_hybrid)):
+    """List the sources of a chatbot with their chunk counts"""
     try:
-        logger.info(f"🔍 Chat request for chatbot_id: {chatbot_id}")
+        await require_chatbot_owner(current_user, chatbot_id)
+        sources = await run_blocking(get_rag_system(chatbot_id).list_sources)
+        return {"chatbot_id": chatbot_id, "sources": sources}
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Chatbot index not found")
+    except Exception as e:
+        logger.error(f"Failed to list sources for {chatbot_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/chatbots/{chatbot_id}/sources/documents")
+async def add_chatbot_documents(
+    chatbot_id: str,
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    current_user: dict = Depends(get_current_user_hybrid)
+):
+    """Add (or replace) documents on an existing chatbot - only the new chunks are embedded"""
+    upload_dir = Path("temp_uploads") / f"{chatbot_id}-{uuid.uuid4().hex[:8]}"
+    try:
+        await require_chatbot_owner(current_user, chatbot_id)
+        upload_dir.mkdir(parents=True, exist_ok=True)
         
-        if chatbot_id not in active_chats:
-            # Try to load chatbot with Cloud Storage support
-            rag_system = CloudMultiSourceRAG(chatbot_id=chatbot_id, use_cloud_storage=True)
-            logger.info(f"🔍 Checking RAG files: index={rag_system.index_file}, metadata={rag_system.metadata_file}")
-            logger.info(f"🔍 Index exists: {rag_system.index_file.exists()}, Metadata exists: {rag_system.metadata_file.exists()}")
+        document_chunks = []
+        for file in files:
+            if not file.filename:
+                continue
+            content = await file.read()
+            file_path = upload_dir / sanitize_filename(file.filename)
+            file_path.write_bytes(content)
+            
+            mock_file = MockUploadedFile(file.filename, file_path, len(content))
+            document_chunks.extend(await run_blocking(document_processor.process_uploaded_file, mock_file))
+        
+        if not document_chunks:
+            raise HTTPException(status_code=422, detail="No processable content in uploaded files")
+        
+        rag_system = get_rag_system(chatbot_id)
+        result = await run_blocking(rag_system.add_documents, document_chunks)
+        logger.info(f"✅ Added documents to {chatbot_id}: {result}")
+        # New index version: starter answers are recomputed after the response
+        background_tasks.add_task(chatbot_factory.refresh_starter_answers, chatbot_id, rag_system)
+        return {"chatbot_id": chatbot_id, **result}
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Chatbot index not found")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to add documents to {chatbot_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        import shutil
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+@app.post("/api/chatbots/{chatbot_id}/sources/website")
+async def replace_chatbot_website(
+    chatbot_id: str,
+    request: WebsiteSourceRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user_hybrid)
+):
+    """Re-scrape a website and replace only its chunks"""
+    try:
+        await require_chatbot_owner(current_user, chatbot_id)
+        rag_system = get_rag_system(chatbot_id)
+        result = await run_blocking(rag_system.replace_website, request.url)
+        logger.info(f"✅ Replaced website {request.url} on {chatbot_id}: {result}")
+        background_tasks.add_task(chatbot_factory.refresh_starter_answers, chatbot_id, rag_system)
+        return {"chatbot_id": chatbot_id, **result}
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Chatbot index not found")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to replace website on {chatbot_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/api/chatbots/{chatbot_id}/sources")
+async def remove_chatbot_source(
+    chatbot_id: str,
+    source_type: str,
+    source_name: str,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user_hybrid)
+):
+    """Remove all chunks of one source and compact the index"""
+    try:
+        await require_chatbot_owner(current_user, chatbot_id)
+        rag_system = get_rag_system(chatbot_id)
+        removed = await run_blocking(rag_system.remove_source, source_type, source_name)
+        if not removed:
+            raise HTTPException(status_code=404, detail="Source not found")
+        background_tasks.add_task(chatbot_factory.refresh_starter_answers, chatbot_id, rag_system)
+        return {"chatbot_id": chatbot_id, "removed": removed}
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Chatbot index not found")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to remove source from {chatbot_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/chatbots/{chatbot_id}/retrieve")
+async def retrieve_many_chunks(
+    chatbot_id: str,
+    request: RetrieveRequest,
+    current_user: dict = Depends(get_current_user_hybrid)
+):
+    """Batch retrieval for many questions (evaluations, FAQ pre-answering, bulk QA)"""
+    try:
+        await require_chatbot_owner(current_user, chatbot_id)
+        results = await run_blocking(
+            get_rag_system(chatbot_id).retrieve_many, request.questions, request.top_k, request.min_score
+        )
+        return {
+            "chatbot_id": chatbot_id,
+            "results": [
+                {
+                    "question": question,
+                    "chunks": [
+                        {
+                            "chunk_id": chunk.get("chunk_id"),
+                            "text": chunk["text"],
+                            "source_type": chunk.get("source_type"),
+                            "source_name": chunk.get("source_name"),
+                            "source_url": chunk.get("source_url"),
+                            "score": chunk.get("score"),
+                            "match": chunk.get("match")
+                        }
+                        for chunk in chunks
+                    ]
+                }
+                for question, chunks in zip(request.questions, results)
+            ]
+        }
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Chatbot index not found")
+    except Exception as e:
+        logger.error(f"Batch retrieval failed for {chatbot_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ─── Chat Endpoints ──────────────────────────────────────────────────────────
+
+def load_active_chat(chatbot_id: str) -> MultiSourceRAG:
+    """
+    Active RAG system of a chatbot, loaded locally, from Firebase Storage or initialized on demand
+    
+    Blocking (downloads, index loading, builds) - call it through run_blocking from endpoints.
+    """
+    rag_system = active_chats.get(chatbot_id)
+    if rag_system is not None:
+        return rag_system
+    with chat_load_locks_guard:
+        load_lock = chat_load_locks.setdefault(chatbot_id, threading.Lock())
+    with load_lock:
+        return _load_active_chat(chatbot_id)
+
+def _load_active_chat(chatbot_id: str) -> MultiSourceRAG:
+    if chatbot_id not in active_chats:
+        # Try to load chatbot with Cloud Storage support
+        rag_system = CloudMultiSourceRAG(chatbot_id=chatbot_id, use_cloud_storage=True)
+        logger.info(f"🔍 Checking RAG files: index={rag_system.index_file}, metadata={rag_system.metadata_file}")
+        logger.info(f"🔍 Index exists: {rag_system.index_file.exists()}, Metadata exists: {rag_system.metadata_file.exists()}")
+        
+        # Try to load RAG system (locally or from Firebase Storage)
+        try:
+            rag_system.load_rag_system()
+            active_chats[chatbot_id] = rag_system
+            logger.info(f"✅ Successfully loaded chatbot {chatbot_id}")
+        except Exception as load_error:
+            logger.warning(f"⚠️ RAG system not found for {chatbot_id}, trying on-demand initialization... Error: {load_error}")
             
-            # Try to load RAG system (locally or from Firebase Storage)
             try:
-                rag_system.load_rag_system()
-                active_chats[chatbot_id] = rag_system
-                logger.info(f"✅ Successfully loaded chatbot {chatbot_id}")
-            except Exception as load_error:
-                logger.warning(f"⚠️ RAG system not found for {chatbot_id}, trying on-demand initialization... Error: {load_error}")
+                # Check if we have chatbot config in Firestore
+                # We need to find the owner first by checking all configs
+                all_configs = firestore_storage.db.collection(firestore_storage.COLLECTIONS['CHATBOT_CONFIGS']).where('id', '==', chatbot_id).stream()
+                config_doc = None
+                for doc in all_configs:
+                    config_doc = doc
+                    break
                 
-                try:
-                    # Check if we have chatbot config in Firestore
-                    # We need to find the owner first by checking all configs
-                    all_configs = firestore_storage.db.collection(firestore_storage.COLLECTIONS['CHATBOT_CONFIGS']).where('id', '==', chatbot_id).stream()
-                    config_doc = None
-                    for doc in all_configs:
-                        config_doc = doc
-                        break
+                if config_doc:
+                    config_data = config_doc.to_dict()
+                    logger.info(f"🔄 Found config for {chatbot_id}, initializing RAG system...")
                     
-                    if config_doc:
-                        config_data = config_doc.to_dict()
-                        logger.info(f"🔄 Found config for {chatbot_id}, initializing RAG system...")
-                        
-                        # Initialize RAG system with available data
-                        website_url = config_data.get('website_url')
-                        manual_text = config_data.get('manual_text')
+                    # Initialize RAG system with available data
+                    website_url = config_data.get('website_url')
+                    manual_text = config_data.get('manual_text')
+                    
+                    if website_url or manual_text:
+                        # Create RAG system on-demand
+                        success = rag_system.process_multiple_sources(
+                            website_url=website_url,
+                            manual_text=manual_text,
+                            progress_callback=lambda msg, progress: logger.info(f"RAG Progress: {msg} ({progress*100:.1f}%)")
+                        )
                         
-                        if website_url or manual_text:
-                            # Create RAG system on-demand
-                            success = rag_system.process_multiple_sources(
-                                website_url=website_url,
-                                manual_text=manual_text,
-                                progress_callback=lambda msg, progress: logger.info(f"RAG Progress: {msg} ({progress*100:.1f}%)")
-                            )
-                            
-                            if success:
-                                logger.info(f"✅ RAG system initialized on-demand for {chatbot_id}")
-                                active_chats[chatbot_id] = rag_system
-                            else:
-                                raise Exception("RAG initialization failed")
-                        else:
-                            # Create empty RAG system for text-only chatbot
-                            logger.info(f"📝 Creating text-only chatbot for {chatbot_id}")
-                            rag_system.process_multiple_sources(manual_text="This is a general assistant chatbot.")
+                        if success:
+                            logger.info(f"✅ RAG system initialized on-demand for {chatbot_id}")
                             active_chats[chatbot_id] = rag_system
+                        else:
+                            raise Exception("RAG initialization failed")
                     else:
-                        raise Exception(f"No config found for chatbot {chatbot_id}")
-                        
-                except Exception as init_error:
-                    logger.error(f"❌ On-demand initialization failed for {chatbot_id}: {init_error}")
-                    # Get comprehensive debug info from CloudMultiSourceRAG
-                    error_details = rag_system.get_debug_info()
-                    error_details["init_error"] = str(init_error)
-                    raise HTTPException(
-                        status_code=404, 
-                        detail=f"Chatbot not found and on-demand initialization failed. Debug: {error_details}"
-                    )
-            active_chats[chatbot_id] = rag_system
-        
-        rag_system = active_chats[chatbot_id]
-        
-        # Find chatbot owner and get config from Firestore
-        all_configs = firestore_storage.db.collection(firestore_storage.COLLECTIONS['CHATBOT_CONFIGS']).where('id', '==', chatbot_id).stream()
-        config_doc = None
-        for doc in all_configs:
-            config_doc = doc
-            break
-        
-        if not config_doc:
-            raise HTTPException(status_code=404, detail="Chatbot owner not found")
+                        # Create empty RAG system for text-only chatbot
+                        logger.info(f"📝 Creating text-only chatbot for {chatbot_id}")
+                        rag_system.process_multiple_sources(manual_text="This is a general assistant chatbot.")
+                        active_chats[chatbot_id] = rag_system
+                else:
+                    raise Exception(f"No config found for chatbot {chatbot_id}")
+                    
+            except Exception as init_error:
+                logger.error(f"❌ On-demand initialization failed for {chatbot_id}: {init_error}")
+                # Get comprehensive debug info from CloudMultiSourceRAG
+                error_details = rag_system.get_debug_info()
+                error_details["init_error"] = str(init_error)
+                raise HTTPException(
+                    status_code=404, 
+                    detail=f"Chatbot not found and on-demand initialization failed. Debug: {error_details}"
+                )
+        active_chats[chatbot_id] = rag_system
+    
+    return active_chats[chatbot_id]
+
+def load_chat_config(chatbot_id: str) -> tuple:
+    """Owner user id and chatbot config from Firestore"""
+    # Find chatbot owner and get config from Firestore
+    all_configs = firestore_storage.db.collection(firestore_storage.COLLECTIONS['CHATBOT_CONFIGS']).where('id', '==', chatbot_id).stream()
+    config_doc = None
+    for doc in all_configs:
+        config_doc = doc
+        break
+    
+    if not config_doc:
+        raise HTTPException(status_code=404, detail="Chatbot owner not found")
+    
+    config_data = config_doc.to_dict()
+    owner_user_id = config_data['user_id']
+    
+    # Create chatbot_config object from Supabase data
+    from utils.chatbot_factory import ChatbotConfig
+    chatbot_config = ChatbotConfig(
+        id=chatbot_id,
+        name=config_data.get('name', ''),
+        description=config_data.get('description', ''),
+        branding=config_data.get('branding', {}),
+        website_url=config_data.get('website_url'),
+        extended_config=config_data.get('extended_config', {})
+    )
+    
+    return owner_user_id, chatbot_config
+
+def chat_modal_metadata(chatbot_config: ChatbotConfig, user_message: str, conversation_id: str,
+                        owner_user_id: str) -> Dict:
+    """Email and contact modal triggers for one chat message (empty dict if none)"""
+    chatbot_id = chatbot_config.id
+    
+    # 🚀 VuBot 3.0 - ULTRA-EINFACHE Modal-Trigger-Logik
+    
+    # Einheitlich nur aus branding lesen (keine extended_config mehr)
+    branding = getattr(chatbot_config, 'branding', {})
+    features = branding.get('features', {})
+    contact_persons = branding.get('contact_persons', [])
+    
+    # Simple Feature-Flags
+    email_capture_enabled = features.get('email_capture_enabled', False)
+    contact_persons_enabled = features.get('contact_persons_enabled', False) and len(contact_persons) > 0
+    
+    # Debug logging (vereinfacht)
+    logger.info(f"🚀 VuBot 3.0 - Chatbot: {chatbot_id}")
+    logger.info(f"📧 Email enabled: {email_capture_enabled}")
+    logger.info(f"👥 Contact enabled: {contact_persons_enabled} (persons: {len(contact_persons)})")
+    
+    # NEUE EINFACHE TRIGGER-LOGIK (nur Keywords, keine Message-Counts)
+    user_message_lower = user_message.lower()
+    
+    # Email Modal Trigger
+    email_keywords = ['email', 'e-mail', 'kontakt', 'angebot', 'beratung', 'preise', 'hinterlassen']
+    show_email_modal = (
+        email_capture_enabled and 
+        any(keyword in user_message_lower for keyword in email_keywords)
+    )
+    
+    # Contact Modal Trigger  
+    contact_keywords = ['ansprechpartner', 'kontakt', 'beratung', 'hilfe', 'support', 'sprechen']
+    show_contact_modal = (
+        contact_persons_enabled and 
+        any(keyword in user_message_lower for keyword in contact_keywords)
+    )
+    
+    logger.info(f"🔍 User message: '{user_message_lower}'")
+    logger.info(f"📧 Email modal trigger: {show_email_modal}")
+    logger.info(f"👥 Contact modal trigger: {show_contact_modal}")
+    
+    # 🚀 VuBot 3.0 - ULTRA-EINFACH: Prüfe nur ob bereits erfasst
+    if show_email_modal:
+        # Prüfe nur ob Email bereits erfasst wurde
+        existing_leads = list(firestore_storage.db.collection(firestore_storage.COLLECTIONS['LEADS']).where('conversation_id', '==', conversation_id).stream())
+        if len(existing_leads) > 0:
+            show_email_modal = False  # Bereits erfasst
+            logger.info(f"📧 Email bereits erfasst - Modal wird nicht angezeigt")
+        else:
+            logger.info(f"✅ EMAIL MODAL WIRD ANGEZEIGT!")
+    
+    # 🚀 VuBot 3.0 - ULTRA-EINFACH: Contact Modal nur einmal pro Session zeigen
+    if show_contact_modal:
+        # Prüfe ob bereits in dieser Session gezeigt
+        conversation_messages = firestore_storage.get_conversation_history(owner_user_id, chatbot_id, conversation_id)
+        contact_already_shown = any(
+            msg.get('metadata', {}).get('contact_persons_shown', False) 
+            for msg in conversation_messages 
+            if msg.get('role') == 'assistant'
+        )
         
-        config_data = config_doc.to_dict()
-        owner_user_id = config_data['user_id']
+        if contact_already_shown:
+            show_contact_modal = False  # Bereits gezeigt
+            logger.info(f"👥 Contact Modal bereits gezeigt - wird nicht angezeigt")
+        else:
+            logger.info(f"✅ CONTACT MODAL WIRD ANGEZEIGT!")
+    
+    # 🚀 VuBot 3.0 - ULTRA-EINFACHE Response Metadata
+    metadata = {}
+    
+    if show_email_modal:
+        email_prompt = features.get('email_capture_config', {}).get('prompt', 
+            'Für detaillierte Informationen können Sie gerne Ihre Email-Adresse hinterlassen.')
+        metadata.update({
+            'show_email_modal': True,  # Neue eindeutige Namen
+            'email_prompt': email_prompt
+        })
+        logger.info(f"📧 Email Modal Metadata hinzugefügt")
+    
+    if show_contact_modal:
+        metadata.update({
+            'show_contact_modal': True,  # Neue eindeutige Namen
+            'contact_persons': contact_persons
+        })
+        logger.info(f"👥 Contact Modal Metadata hinzugefügt")
+    
+    return metadata
+
+def save_assistant_message(owner_user_id: str, chatbot_id: str, conversation_id: str,
+                           response_data: Dict, metadata: Dict):
+    """Save a bot response with its modal flags to the conversation history"""
+    firestore_storage.save_conversation_message(
+        user_id=owner_user_id,
+        chatbot_id=chatbot_id,
+        conversation_id=conversation_id,
+        role="assistant",
+        content=response_data["response"],
+        metadata={
+            "timestamp": datetime.now().isoformat(),
+            "email_capture_shown": metadata.get("show_email_modal", False),
+            "contact_persons_shown": metadata.get("show_contact_modal", False),
+            "sources": response_data.get("sources", [])
+        }
+    )
+
+@app.post("/api/chat/{chatbot_id}", response_model=ChatResponse)
+async def chat_with_bot(chatbot_id: str, message: ChatMessage):
+    """Send message to chatbot with conversation tracking"""
+    try:
+        logger.info(f"🔍 Chat request for chatbot_id: {chatbot_id}")
         
-        # Create chatbot_config object from Supabase data
-        from utils.chatbot_factory import ChatbotConfig
-        chatbot_config = ChatbotConfig(
-            id=chatbot_id,
-            name=config_data.get('name', ''),
-            description=config_data.get('description', ''),
-            branding=config_data.get('branding', {}),
-            website_url=config_data.get('website_url'),
-            extended_config=config_data.get('extended_config', {})
-        )
+        # Blocking work (Firestore, index loading, FAISS) runs in the bounded chat executor,
+        # the LLM call is async - the event loop stays free for other conversations
+        rag_system = await run_blocking(load_active_chat, chatbot_id)
+        owner_user_id, chatbot_config = await run_blocking(load_chat_config, chatbot_id)
         
         # Generate conversation_id if not provided
         conversation_id = message.conversation_id or str(uuid.uuid4())
         
         # Save user message to conversation history
-        firestore_storage.save_conversation_message(
+        await run_blocking(
+            firestore_storage.save_conversation_message,
             user_id=owner_user_id,
             chatbot_id=chatbot_id,
             conversation_id=conversation_id,
@@ -596,119 +993,29 @@ async def chat_with_bot(chatbot_id: str, message: ChatMessage):
             metadata={"timestamp": datetime.now().isoformat()}
         )
         
-        # Generate response
-        response_data = rag_system.get_response(
+        # Generate response (exact repeats come from the response cache,
+        # below the bot's relevance threshold no LLM call is made)
+        response_data = await aget_cached_response(
+            rag_system,
             query=message.message,
-            conversation_id=conversation_id
-        )
-        
-        # 🚀 VuBot 3.0 - ULTRA-EINFACHE Modal-Trigger-Logik
-        
-        # Einheitlich nur aus branding lesen (keine extended_config mehr)
-        branding = getattr(chatbot_config, 'branding', {})
-        features = branding.get('features', {})
-        contact_persons = branding.get('contact_persons', [])
-        
-        # Simple Feature-Flags
-        email_capture_enabled = features.get('email_capture_enabled', False)
-        contact_persons_enabled = features.get('contact_persons_enabled', False) and len(contact_persons) > 0
-        
-        # Debug logging (vereinfacht)
-        logger.info(f"🚀 VuBot 3.0 - Chatbot: {chatbot_id}")
-        logger.info(f"📧 Email enabled: {email_capture_enabled}")
-        logger.info(f"👥 Contact enabled: {contact_persons_enabled} (persons: {len(contact_persons)})")
-        
-        bot_response = response_data["response"]
-        
-        # NEUE EINFACHE TRIGGER-LOGIK (nur Keywords, keine Message-Counts)
-        user_message_lower = message.message.lower()
-        
-        # Email Modal Trigger
-        email_keywords = ['email', 'e-mail', 'kontakt', 'angebot', 'beratung', 'preise', 'hinterlassen']
-        show_email_modal = (
-            email_capture_enabled and 
-            any(keyword in user_message_lower for keyword in email_keywords)
-        )
-        
-        # Contact Modal Trigger  
-        contact_keywords = ['ansprechpartner', 'kontakt', 'beratung', 'hilfe', 'support', 'sprechen']
-        show_contact_modal = (
-            contact_persons_enabled and 
-            any(keyword in user_message_lower for keyword in contact_keywords)
+            conversation_id=conversation_id,
+            **relevance_settings(chatbot_config.branding)
         )
         
-        logger.info(f"🔍 User message: '{user_message_lower}'")
-        logger.info(f"📧 Email modal trigger: {show_email_modal}")
-        logger.info(f"👥 Contact modal trigger: {show_contact_modal}")
-        
-        # 🚀 VuBot 3.0 - ULTRA-EINFACH: Prüfe nur ob bereits erfasst
-        if show_email_modal:
-            # Prüfe nur ob Email bereits erfasst wurde
-            existing_leads = list(firestore_storage.db.collection(firestore_storage.COLLECTIONS['LEADS']).where('conversation_id', '==', conversation_id).stream())
-            if len(existing_leads) > 0:
-                show_email_modal = False  # Bereits erfasst
-                logger.info(f"📧 Email bereits erfasst - Modal wird nicht angezeigt")
-            else:
-                logger.info(f"✅ EMAIL MODAL WIRD ANGEZEIGT!")
-        
-        # 🚀 VuBot 3.0 - ULTRA-EINFACH: Contact Modal nur einmal pro Session zeigen
-        if show_contact_modal:
-            # Prüfe ob bereits in dieser Session gezeigt
-            conversation_messages = firestore_storage.get_conversation_history(owner_user_id, chatbot_id, conversation_id)
-            contact_already_shown = any(
-                msg.get('metadata', {}).get('contact_persons_shown', False) 
-                for msg in conversation_messages 
-                if msg.get('role') == 'assistant'
-            )
-            
-            if contact_already_shown:
-                show_contact_modal = False  # Bereits gezeigt
-                logger.info(f"👥 Contact Modal bereits gezeigt - wird nicht angezeigt")
-            else:
-                logger.info(f"✅ CONTACT MODAL WIRD ANGEZEIGT!")
+        metadata = await run_blocking(chat_modal_metadata, chatbot_config, message.message, conversation_id,
+                                      owner_user_id)
         
         # Save bot response to conversation history
-        firestore_storage.save_conversation_message(
-            user_id=owner_user_id,
-            chatbot_id=chatbot_id,
-            conversation_id=conversation_id,
-            role="assistant",
-            content=bot_response,
-            metadata={
-                "timestamp": datetime.now().isoformat(),
-                "email_capture_shown": show_email_modal,
-                "contact_persons_shown": show_contact_modal,
-                "sources": response_data.get("sources", [])
-            }
-        )
+        await run_blocking(save_assistant_message, owner_user_id, chatbot_id, conversation_id, response_data, metadata)
         
         # Prepare response
         chat_response = ChatResponse(
-            response=bot_response,
+            response=response_data["response"],
             sources=response_data.get("sources", []),
             conversation_id=conversation_id,
             timestamp=datetime.now()
         )
         
-        # 🚀 VuBot 3.0 - ULTRA-EINFACHE Response Metadata
-        metadata = {}
-        
-        if show_email_modal:
-            email_prompt = features.get('email_capture_config', {}).get('prompt', 
-                'Für detaillierte Informationen können Sie gerne Ihre Email-Adresse hinterlassen.')
-            metadata.update({
-                'show_email_modal': True,  # Neue eindeutige Namen
-                'email_prompt': email_prompt
-            })
-            logger.info(f"📧 Email Modal Metadata hinzugefügt")
-        
-        if show_contact_modal:
-            metadata.update({
-                'show_contact_modal': True,  # Neue eindeutige Namen
-                'contact_persons': contact_persons
-            })
-            logger.info(f"👥 Contact Modal Metadata hinzugefügt")
-        
         if metadata:
             chat_response.metadata = metadata
         
@@ -720,6 +1027,74 @@ async def chat_with_bot(chatbot_id: str, message: ChatMessage):
         logger.error(f"Chat error for {chatbot_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/{chatbot_id}/stream")
+async def stream_chat_with_bot(chatbot_id: str, message: ChatMessage):
+    """
+    Streaming variant of chat_with_bot (Server-Sent Events)
+    
+    Emits "token" events ({"content": ...}) as the completion arrives, then one "done" event
+    with the ChatResponse fields (full response, sources, conversation_id, timestamp, metadata).
+    The conversation is persisted once the stream has finished.
+    """
+    try:
+        logger.info(f"🔍 Streaming chat request for chatbot_id: {chatbot_id}")
+        rag_system = await run_blocking(load_active_chat, chatbot_id)
+        owner_user_id, chatbot_config = await run_blocking(load_chat_config, chatbot_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chat error for {chatbot_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    conversation_id = message.conversation_id or str(uuid.uuid4())
+    
+    def persist(response_data: Dict, metadata: Dict):
+        firestore_storage.save_conversation_message(
+            user_id=owner_user_id,
+            chatbot_id=chatbot_id,
+            conversation_id=conversation_id,
+            role="user",
+            content=message.message,
+            metadata={"timestamp": datetime.now().isoformat()}
+        )
+        save_assistant_message(owner_user_id, chatbot_id, conversation_id, response_data, metadata)
+    
+    async def events():
+        response_data = None
+        async for event in astream_cached_response(
+            rag_system,
+            query=message.message,
+            conversation_id=conversation_id,
+            **relevance_settings(chatbot_config.branding)
+        ):
+            if event["event"] == "done":
+                response_data = event["data"]
+            else:
+                yield format_sse(event["event"], event["data"])
+        
+        try:
+            metadata = await run_blocking(chat_modal_metadata, chatbot_config, message.message, conversation_id,
+                                          owner_user_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Modal check failed for {chatbot_id}: {e}")
+            metadata = {}
+        
+        yield format_sse("done", {
+            "response": response_data["response"],
+            "sources": response_data.get("sources", []),
+            "conversation_id": conversation_id,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": metadata
+        })
+        
+        # Persist only after the client has the complete answer
+        try:
+            await run_blocking(persist, response_data, metadata)
+        except Exception as e:
+            logger.error(f"Failed to save streamed conversation {conversation_id}: {e}")
+    
+    return sse_response(events())
+
 @app.post("/api/chat/{chatbot_id}/submit-lead")
 async def submit_lead(chatbot_id: str, lead_data: LeadSubmission):
     """Submit lead for chatbot"""
@@ -812,6 +1187,7 @@ async def get_chat_config(chatbot_id: str):
             "description": config.description,
             "branding": config.branding,
             "welcome_message": config.branding.get("welcome_message", f"Hallo! Ich bin {config.name}."),
+            "starter_questions": starter_questions(config.branding),
             "features": {
                 "email_capture": config.branding.get("email_capture_enabled", False) if config.branding else False,
                 "contact_persons": config.branding.get("contact_persons_enabled", False) if config.branding else False
@@ -1036,14 +1412,11 @@ async def get_analytics_overview(current_user: dict = Depends(get_current_user))
                 config = chatbot["config"]
                 chatbot_id = config.id
                 
-                # Count actual documents/chunks
+                # Count actual documents/chunks (precomputed in the chunk manifest)
                 rag_system = MultiSourceRAG(chatbot_id=chatbot_id)
                 if rag_system.metadata_file.exists():
                     try:
-                        import json
-                        with open(rag_system.metadata_file, 'r') as f:
-                            metadata = json.load(f)
-                            total_documents += len(metadata.get('chunks', []))
+                        total_documents += rag_system.get_chatbot_info()["total_chunks"]
                     except:
                         # If metadata reading fails, estimate based on config
                         if hasattr(config, 'website_url') and config.website_url:
@@ -0,0 +1,49 @@
+import random
+
+from utils.chunk_dedup import SimHashIndex, deduplicate_chunks, simhash
+
+
+def _random_texts(count, words=80, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"wort{i}" for i in range(5000)]
+    return [" ".join(rng.choice(vocab) for _ in range(words)) for _ in range(count)]
+
+
+def test_unrelated_texts_are_never_merged():
+    chunks = [{"text": text} for text in _random_texts(5000)]
+    kept, removed = deduplicate_chunks(chunks)
+    assert removed == 0
+    assert kept == chunks
+
+
+def test_duplicates_are_removed_and_first_occurrence_kept():
+    texts = _random_texts(3, seed=1)
+    chunks = [{"text": texts[0], "n": 0}, {"text": texts[1]}, {"text": "  " + texts[0].upper() + " ", "n": 2},
+              {"text": texts[2]}]
+    kept, removed = deduplicate_chunks(chunks)
+    assert removed == 1
+    assert [chunk.get("n") for chunk in kept] == [0, None, None]
+
+
+def test_existing_chunks_block_new_duplicates():
+    texts = _random_texts(2, seed=2)
+    kept, removed = deduplicate_chunks([{"text": texts[0]}, {"text": texts[1]}], existing=[{"text": texts[0]}])
+    assert removed == 1
+    assert kept == [{"text": texts[1]}]
+
+
+def test_index_finds_every_hash_within_max_distance():
+    index = SimHashIndex(0.95)
+    value = simhash(_random_texts(1, seed=3)[0])
+    index.add(value)
+    for bits in ((0,), (5, 40), (1, 31, 63)):
+        flipped = value
+        for bit in bits:
+            flipped ^= 1 << bit
+        assert index.find(flipped)
+    assert not index.find(value ^ 0b1111)
+
+
+def test_threshold_zero_disables_dedup():
+    chunks = [{"text": "gleich"}, {"text": "gleich"}]
+    assert deduplicate_chunks(chunks, threshold=0) == (chunks, 0)
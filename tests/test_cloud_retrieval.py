@@ -0,0 +1,66 @@
+import shutil
+
+import pytest
+
+pytest.importorskip("firebase_admin")
+
+from utils.cloud_multi_source_rag import CloudMultiSourceRAG
+from utils.embedders import HashingEmbedder
+from utils.index_registry import get_index_registry
+from utils.multi_source_rag import MultiSourceRAG
+
+
+class FakeStorage:
+    """Bucket-Ersatz: kopiert ein vorher gebautes Chatbot-Verzeichnis"""
+
+    def __init__(self, bucket_dir):
+        self.bucket_dir = bucket_dir
+        self.downloads = 0
+
+    def chatbot_exists_in_storage(self, chatbot_id):
+        return (self.bucket_dir / chatbot_id).exists()
+
+    def download_chatbot_files(self, chatbot_id, local_dir):
+        self.downloads += 1
+        shutil.copytree(self.bucket_dir / chatbot_id, local_dir, dirs_exist_ok=True)
+        return True
+
+
+@pytest.fixture
+def cloud_only_bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rag = MultiSourceRAG("bot", embedder=HashingEmbedder())
+    assert rag.process_multiple_sources(manual_text="Der Artikel XK-4711 kostet 19 Euro.\n\nLieferzeit: drei Tage.")
+
+    # Nur noch im Bucket vorhanden, Worker ohne lokale Dateien und ohne residenten Index
+    shutil.copytree(rag.chatbot_dir, tmp_path / "bucket" / "bot")
+    shutil.rmtree(rag.chatbot_dir)
+    get_index_registry().invalidate("bot")
+    return FakeStorage(tmp_path / "bucket")
+
+
+def _cloud_rag(storage):
+    rag = CloudMultiSourceRAG("bot", use_cloud_storage=False)
+    rag.use_cloud_storage, rag.firebase_storage = True, storage
+    return rag
+
+
+def test_retrieve_many_downloads_missing_bot(cloud_only_bot):
+    results = _cloud_rag(cloud_only_bot).retrieve_many(["XK-4711", "Wie lange ist die Lieferzeit?"], top_k=2)
+
+    assert cloud_only_bot.downloads == 1
+    assert len(results) == 2
+    assert "XK-4711" in results[0][0]["text"]
+    assert results[1]
+
+
+def test_retrieve_many_reuses_downloaded_files(cloud_only_bot):
+    _cloud_rag(cloud_only_bot).retrieve_many(["XK-4711"])
+    _cloud_rag(cloud_only_bot).retrieve_many(["XK-4711"])
+    assert cloud_only_bot.downloads == 1
+
+
+def test_missing_bot_raises_not_found(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        _cloud_rag(FakeStorage(tmp_path / "bucket")).retrieve_many(["XK-4711"])
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+
+DIMS = 16
+ENTRY_BYTES = DIMS * 4
+
+
+def _vectors(count, seed=0):
+    return np.random.default_rng(seed).random((count, DIMS), dtype="float32")
+
+
+def _table_size(cache):
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+
+def test_size_stays_within_bound_and_keeps_newest(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3", max_bytes=100 * ENTRY_BYTES)
+    for batch in range(10):
+        texts = [f"text-{batch}-{i}" for i in range(30)]
+        cache.put_many("model", DIMS, texts, _vectors(30, batch))
+        assert cache._total_size() == _table_size(cache) <= cache.max_bytes
+
+    # Neuester Batch vollständig vorhanden, älteste Batches verdrängt
+    assert len(cache.get_many("model", DIMS, [f"text-9-{i}" for i in range(30)])) == 30
+    assert cache.get_many("model", DIMS, [f"text-0-{i}" for i in range(30)]) == {}
+
+
+def test_batch_larger_than_cache_keeps_its_newest_entries(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3", max_bytes=10 * ENTRY_BYTES)
+    texts = [f"text-{i}" for i in range(25)]
+    cache.put_many("model", DIMS, texts, _vectors(25))
+
+    found = cache.get_many("model", DIMS, texts)
+    assert sorted(found) == list(range(16, 25))
+    assert cache._total_size() == _table_size(cache) == 9 * ENTRY_BYTES
+
+
+def test_overwriting_entries_does_not_inflate_size(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3", max_bytes=1000 * ENTRY_BYTES)
+    for seed in range(3):
+        cache.put_many("model", DIMS, ["a", "b"], _vectors(2, seed))
+    assert cache._total_size() == _table_size(cache) == 2 * ENTRY_BYTES
+    np.testing.assert_array_equal(cache.get_many("model", DIMS, ["a"])[0], _vectors(2, 2)[0])
+
+
+def test_size_counter_is_initialized_from_existing_cache(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE embeddings (
+            model TEXT NOT NULL, dimensions INTEGER NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL,
+            size INTEGER NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (model, dimensions, text_hash)
+        )
+    """)
+    conn.executemany("INSERT INTO embeddings VALUES ('model', 16, ?, ?, 64, 0)",
+                     [(str(i), b"\0" * 64) for i in range(5)])
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache(path, max_bytes=1000 * ENTRY_BYTES)
+    assert cache._total_size() == 5 * ENTRY_BYTES
+    # Zweites Öffnen zählt nicht doppelt
+    assert EmbeddingCache(path, max_bytes=1000 * ENTRY_BYTES)._total_size() == 5 * ENTRY_BYTES
+
+
+def test_hit_and_miss_counters_are_exact_across_threads(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite3", max_bytes=1000 * ENTRY_BYTES)
+    cache.put_many("model", DIMS, ["a"], _vectors(1))
+
+    def lookups():
+        for _ in range(50):
+            cache.get_many("model", DIMS, ["a", "b"])
+
+    threads = [threading.Thread(target=lookups) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 200
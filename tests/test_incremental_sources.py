@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip("httpx")
+
+from utils.answer_cache import SemanticAnswerCache
+from utils.embedders import HashingEmbedder
+from utils.multi_source_rag import MultiSourceRAG
+from utils.response_cache import ResponseCache
+
+
+def _document(name, paragraphs):
+    return [
+        {"source_type": "document", "source_name": name, "chunk_index": i, "text": text, "metadata": {"file": name}}
+        for i, text in enumerate(paragraphs)
+    ]
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rag = MultiSourceRAG("bot", embedder=HashingEmbedder())
+    assert rag.process_multiple_sources(manual_text="Der Artikel XK-4711 kostet 19 Euro.\n\nLieferzeit: drei Tage.")
+    return rag
+
+
+def _ids_by_text(rag):
+    _, chunks = rag.load_rag_system()
+    return {chunk["text"]: chunk["chunk_id"] for chunk in chunks}
+
+
+def test_add_and_remove_keep_existing_chunk_ids(rag):
+    before = _ids_by_text(rag)
+
+    result = rag.add_documents(_document("a.pdf", ["Rückgabe innerhalb von 30 Tagen.", "Versand nach Österreich."]))
+    assert result["added"] == 2 and result["removed"] == 0
+    after_add = _ids_by_text(rag)
+    assert {text: after_add[text] for text in before} == before
+    new_ids = set(after_add.values()) - set(before.values())
+    assert len(new_ids) == 2 and min(new_ids) > max(before.values())
+
+    assert rag.remove_source("document", "a.pdf") == 2
+    assert _ids_by_text(rag) == before
+    assert all(chunk["source_name"] != "a.pdf" for chunk in rag.retrieve_many(["Rückgabe"], top_k=5)[0])
+
+    # Entfernte IDs werden nicht wiederverwendet
+    rag.add_documents(_document("b.pdf", ["Zahlung per Rechnung."]))
+    (added_id,) = set(_ids_by_text(rag).values()) - set(before.values())
+    assert added_id not in new_ids
+
+
+def test_replacing_a_document_only_touches_its_chunks(rag):
+    rag.add_documents(_document("a.pdf", ["Alte Fassung."]))
+    rag.add_documents(_document("b.pdf", ["Andere Datei."]))
+    untouched = {text: chunk_id for text, chunk_id in _ids_by_text(rag).items() if text != "Alte Fassung."}
+
+    result = rag.add_documents(_document("a.pdf", ["Neue Fassung."]))
+    assert result["added"] == 1 and result["removed"] == 1
+    ids = _ids_by_text(rag)
+    assert "Alte Fassung." not in ids
+    assert {text: ids[text] for text in untouched} == untouched
+
+
+def test_response_version_changes_with_index_and_settings(rag):
+    version = rag.response_version()
+    assert version is not None
+    assert rag.response_version() == version
+    assert rag.response_version(min_score=0.9) != version
+    assert rag.response_version(fallback_response="Weiß ich nicht.") != version
+
+    rag.add_documents(_document("a.pdf", ["Neuer Inhalt."]))
+    assert rag.response_version() != version
+
+
+def test_caches_miss_after_index_update(rag):
+    responses, answers = ResponseCache(), SemanticAnswerCache(threshold=0.9)
+    old_version = rag.response_version()
+    responses.put("bot", old_version, "Was kostet XK-4711?", {"response": "19 Euro"})
+    answers.put("bot", old_version, [1.0, 0.0], {"response": "19 Euro"})
+    assert responses.get("bot", old_version, "was kostet  xk-4711?") == {"response": "19 Euro"}
+
+    rag.add_documents(_document("a.pdf", ["Der Preis von XK-4711 ist jetzt 25 Euro."]))
+    new_version = rag.response_version()
+    assert responses.get("bot", new_version, "Was kostet XK-4711?") is None
+    assert answers.get("bot", new_version, [1.0, 0.0]) is None
+    # Der veraltete Eimer ist verworfen, auch die alte Version trifft nicht mehr
+    assert answers.get("bot", old_version, [1.0, 0.0]) is None
+
+
+def test_starter_answers_expire_with_the_index(rag, monkeypatch):
+    monkeypatch.setattr(rag, "_answer_from_chunks",
+                        lambda question, chunks, budget: {"response": "19 Euro", "sources": [], "fallback": False})
+    assert rag.precompute_starter_answers(["Was kostet XK-4711?"]) == 1
+    assert rag.get_starter_answer("was kostet xk-4711?")["response"] == "19 Euro"
+    assert rag.get_starter_answer("Was kostet XK-4711?", min_score=0.9) is None
+
+    rag.add_documents(_document("a.pdf", ["Neuer Inhalt."]))
+    assert rag.get_starter_answer("Was kostet XK-4711?") is None
@@ -0,0 +1,73 @@
+import faiss
+import numpy as np
+
+from utils.chunk_columns import CHUNK_MANIFEST_FILE, write_chunk_columns
+from utils.index_registry import IndexRegistry
+
+
+def _write_bot(embeddings_dir, texts):
+    index = faiss.IndexFlatL2(4)
+    index.add(np.random.default_rng(len(texts)).random((len(texts), 4), dtype="float32"))
+    faiss.write_index(index, str(embeddings_dir / "index.faiss"))
+    write_chunk_columns([{"text": text, "source_type": "text", "source_name": "t"} for text in texts],
+                        embeddings_dir)
+
+
+def _texts(entry):
+    return [chunk["text"] for chunk in entry["chunks"]]
+
+
+def test_rewritten_files_are_reloaded(tmp_path):
+    registry = IndexRegistry(load_mode="memory")
+    index_file, metadata_file = tmp_path / "index.faiss", tmp_path / CHUNK_MANIFEST_FILE
+    _write_bot(tmp_path, ["a", "b"])
+
+    first = registry.get_entry("bot", index_file, metadata_file)
+    assert registry.get_entry("bot", index_file, metadata_file) is first
+
+    _write_bot(tmp_path, ["a", "b", "c"])
+    entry = registry.get_entry("bot", index_file, metadata_file)
+    assert _texts(entry) == ["a", "b", "c"]
+    assert entry["index"].ntotal == 3
+    assert registry.loads == 2
+
+
+def test_write_during_load_is_not_cached_as_current(tmp_path, monkeypatch):
+    registry = IndexRegistry(load_mode="memory")
+    index_file, metadata_file = tmp_path / "index.faiss", tmp_path / CHUNK_MANIFEST_FILE
+    _write_bot(tmp_path, ["a", "b"])
+
+    # Neuaufbau landet zwischen Index und Chunks des ersten Ladevorgangs
+    load_chunks = registry._load_chunks
+    writes = []
+
+    def load_chunks_with_concurrent_write(path):
+        if not writes:
+            writes.append(True)
+            _write_bot(tmp_path, ["x", "y", "z"])
+        return load_chunks(path)
+
+    monkeypatch.setattr(registry, "_load_chunks", load_chunks_with_concurrent_write)
+
+    entry = registry.get_entry("bot", index_file, metadata_file)
+    assert entry["index"].ntotal == len(entry["chunks"]) == 3
+    assert _texts(entry) == ["x", "y", "z"]
+    assert registry.get_entry("bot", index_file, metadata_file) is entry
+
+
+def test_files_changing_on_every_load_are_not_cached(tmp_path, monkeypatch):
+    registry = IndexRegistry(load_mode="memory")
+    index_file, metadata_file = tmp_path / "index.faiss", tmp_path / CHUNK_MANIFEST_FILE
+    _write_bot(tmp_path, ["a"])
+
+    load_chunks = registry._load_chunks
+    sizes = iter(range(2, 100))
+
+    def load_chunks_with_concurrent_write(path):
+        _write_bot(tmp_path, ["t"] * next(sizes))
+        return load_chunks(path)
+
+    monkeypatch.setattr(registry, "_load_chunks", load_chunks_with_concurrent_write)
+
+    registry.get_entry("bot", index_file, metadata_file)
+    assert not registry.is_resident("bot")
@@ -0,0 +1,162 @@
+# platform/utils/answer_cache.py
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Semantischer Antwort-Cache: Paraphrasen bereits beantworteter Fragen ohne Retrieval + LLM
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "true").lower() == "true"
+# Mindest-Kosinus-Ähnlichkeit zwischen neuer und gecachter Frage
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES_PER_BOT = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES_PER_BOT", "500"))
+ANSWER_CACHE_MAX_BOTS = int(os.getenv("ANSWER_CACHE_MAX_BOTS", "1000"))
+
+class _BotAnswers:
+    """Antworten eines Chatbots: normierte Frage-Vektoren als Matrix, Antworten parallel dazu"""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.vectors: Optional[np.ndarray] = None
+        self.answers = []
+        self.stored_at = np.empty(0, dtype="float64")
+        self.used_at = np.empty(0, dtype="float64")
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def find(self, vector: np.ndarray, threshold: float, ttl_seconds: int, now: float) -> Optional[Dict]:
+        if not self.answers or self.vectors.shape[1] != len(vector):
+            return None
+        scores = self.vectors[:len(self)] @ vector
+        scores[self.stored_at[:len(self)] < now - ttl_seconds] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        self.used_at[best] = now
+        return self.answers[best]
+
+    def add(self, vector: np.ndarray, answer: Dict, max_entries: int, ttl_seconds: int, now: float):
+        if self.vectors is None or self.vectors.shape[1] != len(vector):
+            self.vectors = np.empty((16, len(vector)), dtype="float32")
+            self.answers = []
+            self.stored_at = np.empty(16, dtype="float64")
+            self.used_at = np.empty(16, dtype="float64")
+
+        count = len(self)
+        if count >= max_entries:
+            # Abgelaufene zuerst, sonst am längsten nicht genutzte Antwort verdrängen (LRU)
+            expired = np.flatnonzero(self.stored_at[:count] < now - ttl_seconds)
+            position = int(expired[0]) if len(expired) else int(np.argmin(self.used_at[:count]))
+        else:
+            position = count
+            if count == len(self.vectors):
+                capacity = min(max_entries, count * 2)
+                self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+                self.stored_at = np.resize(self.stored_at, capacity)
+                self.used_at = np.resize(self.used_at, capacity)
+            self.answers.append(None)
+
+        self.vectors[position] = vector
+        self.answers[position] = answer
+        self.stored_at[position] = now
+        self.used_at[position] = now
+
+class SemanticAnswerCache:
+    """
+    Prozessweiter semantischer Antwort-Cache pro Chatbot
+    Jeder Chatbot hat einen Eimer mit Version (Index-Version + Konfiguration); weicht
+    die Version ab, wird der Eimer verworfen. Chatbots selbst werden per LRU verdrängt.
+    """
+
+    def __init__(self,
+                 threshold: float = ANSWER_CACHE_THRESHOLD,
+                 ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+                 max_entries_per_bot: int = ANSWER_CACHE_MAX_ENTRIES_PER_BOT,
+                 max_bots: int = ANSWER_CACHE_MAX_BOTS):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_bot = max_entries_per_bot
+        self.max_bots = max_bots
+        self._bots: "OrderedDict[str, _BotAnswers]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype="float32").reshape(-1)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def get(self, chatbot_id: str, version: str, vector) -> Optional[Dict]:
+        """Gecachte Antwort auf eine ausreichend ähnliche Frage (gleiche Version) oder None"""
+        vector = self._normalize(vector)
+        with self._lock:
+            bot = self._bots.get(chatbot_id)
+            if bot is not None and bot.version != version:
+                # Index neu gebaut oder Konfiguration geändert
+                del self._bots[chatbot_id]
+                bot = None
+            answer = bot.find(vector, self.threshold, self.ttl_seconds, time.time()) if bot else None
+            if answer is None:
+                self.misses += 1
+                return None
+            self._bots.move_to_end(chatbot_id)
+            self.hits += 1
+            return answer
+
+    def put(self, chatbot_id: str, version: str, vector, answer: Dict):
+        vector = self._normalize(vector)
+        with self._lock:
+            bot = self._bots.get(chatbot_id)
+            if bot is None or bot.version != version:
+                bot = self._bots[chatbot_id] = _BotAnswers(version)
+            bot.add(vector, answer, self.max_entries_per_bot, self.ttl_seconds, time.time())
+            self._bots.move_to_end(chatbot_id)
+            while len(self._bots) > self.max_bots:
+                self._bots.popitem(last=False)
+
+    def invalidate(self, chatbot_id: str):
+        with self._lock:
+            self._bots.pop(chatbot_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._bots.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        with self._lock:
+            entries = sum(len(bot) for bot in self._bots.values())
+        return {
+            "bots": len(self._bots),
+            "entries": entries,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+# Globale Cache-Instanz
+answer_cache = None
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Singleton Pattern für den semantischen Antwort-Cache
+
+    Returns:
+        SemanticAnswerCache Instance oder None, wenn deaktiviert
+    """
+    global answer_cache
+    if answer_cache is None and ANSWER_CACHE:
+        answer_cache = SemanticAnswerCache()
+    return answer_cache
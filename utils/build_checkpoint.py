@@ -0,0 +1,198 @@
+# platform/utils/build_checkpoint.py
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Build-Jobs liegen außerhalb der Chatbot-Verzeichnisse (überleben deren Cleanup)
+BUILD_JOBS_DIR = Path(os.getenv("BUILD_JOBS_DIR", "data/build_jobs"))
+# Ohne Heartbeat seit so vielen Sekunden gilt ein laufender Job als abgebrochen
+BUILD_JOB_STALE_SECONDS = int(os.getenv("BUILD_JOB_STALE_SECONDS", "300"))
+# Heartbeat höchstens alle n Sekunden auf die Platte schreiben
+HEARTBEAT_INTERVAL_SECONDS = 5
+
+def _chunks_hash(chunks: List[Dict]) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk["text"].encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _write_json_atomic(path: Path, data):
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+class BuildCheckpoint:
+    """
+    Checkpoint eines Chatbot-Builds
+    Speichert die fertig gechunkten Daten und jeden embedded Batch, damit ein
+    abgebrochener Build (Redeploy, OOM) ab dem letzten Batch fortgesetzt wird.
+
+    Layout: <jobs_dir>/<job_id>/job.json, chunks.json, batches/*.npz
+    """
+
+    def __init__(self, job_id: str, jobs_dir: Path = BUILD_JOBS_DIR):
+        self.job_id = job_id
+        self.job_dir = Path(jobs_dir) / job_id
+        self.job_file = self.job_dir / "job.json"
+        self.chunks_file = self.job_dir / "chunks.json"
+        self.batches_dir = self.job_dir / "batches"
+        self._last_heartbeat = 0.0
+
+    @classmethod
+    def create(cls, job_id: str, chatbot_id: str, context: Optional[Dict] = None,
+               jobs_dir: Path = BUILD_JOBS_DIR) -> "BuildCheckpoint":
+        """Legt einen neuen Build-Job an (Status running)"""
+        checkpoint = cls(job_id, jobs_dir)
+        checkpoint.batches_dir.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        _write_json_atomic(checkpoint.job_file, {
+            "job_id": job_id,
+            "chatbot_id": chatbot_id,
+            "status": "running",
+            "created_at": datetime.now().isoformat(),
+            "heartbeat_at": now,
+            "message": "",
+            "progress": 0.0,
+            "context": context or {}
+        })
+        checkpoint._last_heartbeat = now
+        return checkpoint
+
+    def load_job(self) -> Dict:
+        with open(self.job_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def update(self, **fields):
+        job = self.load_job()
+        job.update(fields)
+        _write_json_atomic(self.job_file, job)
+
+    @property
+    def chatbot_id(self) -> str:
+        return self.load_job()["chatbot_id"]
+
+    def heartbeat(self, message: Optional[str] = None, progress: Optional[float] = None, force: bool = False):
+        """Markiert den Job als lebendig (gedrosselt)"""
+        now = time.time()
+        if not force and now - self._last_heartbeat < HEARTBEAT_INTERVAL_SECONDS:
+            return
+        self._last_heartbeat = now
+        fields = {"heartbeat_at": now}
+        if message is not None:
+            fields["message"] = message
+        if progress is not None:
+            fields["progress"] = progress
+        self.update(**fields)
+
+    def save_chunks(self, chunks: List[Dict]):
+        """Speichert die zu embeddenden Chunks; bei anderen Chunks werden alte Batches verworfen"""
+        chunks_hash = _chunks_hash(chunks)
+        if self.load_job().get("chunks_hash") != chunks_hash and self.batches_dir.exists():
+            shutil.rmtree(self.batches_dir)
+        self.batches_dir.mkdir(parents=True, exist_ok=True)
+
+        _write_json_atomic(self.chunks_file, chunks)
+        self.update(chunks_hash=chunks_hash, chunk_count=len(chunks))
+
+    def load_chunks(self) -> Optional[List[Dict]]:
+        if not self.chunks_file.exists():
+            return None
+        with open(self.chunks_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_batch(self, positions: np.ndarray, vectors: np.ndarray):
+        """Speichert einen embedded Batch (Positionen in der Chunk-Liste + Vektoren)"""
+        positions = np.asarray(positions, dtype="int64")
+        name = f"batch_{int(positions[0]):07d}_{len(positions):05d}"
+        tmp_path = self.batches_dir / f"{name}.tmp.npz"
+        np.savez(tmp_path, positions=positions, vectors=np.asarray(vectors, dtype="float32"))
+        os.replace(tmp_path, self.batches_dir / f"{name}.npz")
+        self.heartbeat()
+
+    def load_vectors(self, total: int) -> Dict[int, np.ndarray]:
+        """
+        Bereits embedded Vektoren
+
+        Returns:
+            Dict von Position in der Chunk-Liste -> float32-Vektor
+        """
+        found: Dict[int, np.ndarray] = {}
+        if not self.batches_dir.exists():
+            return found
+
+        for batch_file in sorted(self.batches_dir.glob("batch_*.npz")):
+            if batch_file.name.endswith(".tmp.npz"):
+                continue
+            try:
+                with np.load(batch_file) as data:
+                    for position, vector in zip(data["positions"], data["vectors"]):
+                        if 0 <= position < total:
+                            found[int(position)] = vector
+            except (OSError, ValueError, KeyError) as e:
+                # Unvollständig geschriebener Batch wird einfach neu embedded
+                logger.warning(f"⚠️ Checkpoint-Batch {batch_file.name} unlesbar: {e}")
+        return found
+
+    def is_stale(self, stale_seconds: int = BUILD_JOB_STALE_SECONDS) -> bool:
+        job = self.load_job()
+        return job.get("status") == "running" and time.time() - job.get("heartbeat_at", 0) > stale_seconds
+
+    def claim(self) -> bool:
+        """
+        Übernimmt einen abgebrochenen Job (genau ein Prozess gewinnt)
+
+        Der Claim-Dateiname enthält den letzten Heartbeat, dadurch kann
+        derselbe Job nach einem erneuten Abbruch wieder übernommen werden.
+        """
+        heartbeat_at = self.load_job().get("heartbeat_at", 0)
+        claim_file = self.job_dir / f"claim-{heartbeat_at}"
+        try:
+            fd = os.open(claim_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        self.heartbeat(message="Build wird fortgesetzt...", force=True)
+        return True
+
+    def fail(self, error: str):
+        """Markiert den Job als fehlgeschlagen und gibt die Checkpoint-Daten frei"""
+        shutil.rmtree(self.batches_dir, ignore_errors=True)
+        self.chunks_file.unlink(missing_ok=True)
+        self.update(status="failed", error=error, heartbeat_at=time.time())
+
+    def discard(self):
+        """Entfernt den Job samt Checkpoints"""
+        shutil.rmtree(self.job_dir, ignore_errors=True)
+
+def claim_interrupted_jobs(jobs_dir: Path = BUILD_JOBS_DIR,
+                           stale_seconds: int = BUILD_JOB_STALE_SECONDS) -> List[BuildCheckpoint]:
+    """Findet abgebrochene Build-Jobs und übernimmt sie für diesen Prozess"""
+    jobs_dir = Path(jobs_dir)
+    if not jobs_dir.exists():
+        return []
+
+    claimed = []
+    for job_dir in sorted(jobs_dir.iterdir()):
+        checkpoint = BuildCheckpoint(job_dir.name, jobs_dir)
+        try:
+            if checkpoint.job_file.exists() and checkpoint.is_stale(stale_seconds) and checkpoint.claim():
+                claimed.append(checkpoint)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Build-Job {job_dir.name} nicht lesbar: {e}")
+    return claimed
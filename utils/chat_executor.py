@@ -0,0 +1,46 @@
+# platform/utils/chat_executor.py
+
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Threads für blockierende Chat-Arbeit (FAISS-Suche, Query-Embedding, Index-Laden, Firestore)
+CHAT_EXECUTOR_WORKERS = int(os.getenv("CHAT_EXECUTOR_WORKERS", "16"))
+
+# Globale Executor-Instanz (prozessweit, von allen Chat-Endpoints geteilt)
+chat_executor = None
+
+def get_chat_executor() -> ThreadPoolExecutor:
+    """
+    Singleton Pattern für den begrenzten Chat-Executor
+
+    Returns:
+        ThreadPoolExecutor Instance
+    """
+    global chat_executor
+    if chat_executor is None:
+        chat_executor = ThreadPoolExecutor(max_workers=CHAT_EXECUTOR_WORKERS, thread_name_prefix="chat")
+    return chat_executor
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """
+    Führt eine blockierende Funktion im Chat-Executor aus, ohne den Event-Loop anzuhalten
+
+    Mehr gleichzeitige Aufrufe als CHAT_EXECUTOR_WORKERS warten in der Queue des Executors,
+    statt unbegrenzt viele Threads zu starten.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_chat_executor(), functools.partial(func, *args, **kwargs))
+
+def shutdown_chat_executor():
+    """Beendet den Executor (Shutdown der App), noch wartende Aufgaben werden verworfen"""
+    global chat_executor
+    if chat_executor is not None:
+        chat_executor.shutdown(wait=False, cancel_futures=True)
+        chat_executor = None
@@ -13,8 +13,11 @@ import streamlit as st
 from dataclasses import dataclass, asdict
 import shutil
 
-from .multi_source_rag import MultiSourceRAG, create_chatbot_id
+from .multi_source_rag import MultiSourceRAG, create_chatbot_id, relevance_settings, starter_questions
 from .cloud_multi_source_rag import CloudMultiSourceRAG
+from .index_registry import get_index_registry
+from .embedders import get_embedder
+from .build_checkpoint import BuildCheckpoint
 
 @dataclass
 class ChatbotConfig:
@@ -120,7 +123,9 @@ class ChatbotFactory:
                       uploaded_documents: Optional[List] = None,
                       branding: Optional[Dict] = None,
                       extended_config: Optional[Dict] = None,
-                      progress_callback=None) -> Optional[str]:
+                      progress_callback=None,
+                      build_job_id: Optional[str] = None,
+                      job_context: Optional[Dict] = None) -> Optional[str]:
         """
         Erstellt einen neuen Chatbot
         
@@ -132,10 +137,13 @@ class ChatbotFactory:
             branding: Branding-Konfiguration
             extended_config: Erweiterte Konfiguration (Email-Capture, Kontaktpersonen, etc.)
             progress_callback: Callback für Progress Updates
+            build_job_id: Optionale Job-ID, macht den Build fortsetzbar (siehe resume_build_job)
+            job_context: Zusatzdaten für die Fortsetzung (z.B. user_id)
             
         Returns:
             Chatbot-ID wenn erfolgreich, None sonst
         """
+        checkpoint = None
         try:
             # Erstelle eindeutige ID
             chatbot_id = create_chatbot_id()
@@ -191,8 +199,14 @@ class ChatbotFactory:
             # Speichere Konfiguration ZUERST (für Firebase Storage Upload)
             self._save_chatbot_config(config)
             
-            # Erstelle Cloud-enabled RAG-System
-            rag_system = CloudMultiSourceRAG(chatbot_id, use_cloud_storage=True)
+            # Erstelle Cloud-enabled RAG-System (Embedding-Backend und Index-Format optional pro Chatbot)
+            rag_system = self._create_rag_system(chatbot_id, extended_config)
+            
+            # Fortsetzbarer Build: Chunks und embedded Batches werden gecheckpointet
+            if build_job_id:
+                checkpoint = BuildCheckpoint.create(build_job_id, chatbot_id, context=job_context)
+                rag_system.checkpoint = checkpoint
+                progress_callback = self._with_heartbeat(checkpoint, progress_callback)
             
             if progress_callback:
                 progress_callback("Erstelle Wissensbasis...", 0.2)
@@ -209,18 +223,15 @@ class ChatbotFactory:
             if not success:
                 # Cleanup bei Fehler
                 self._cleanup_chatbot(chatbot_id)
+                if checkpoint:
+                    checkpoint.fail("Verarbeitung der Datenquellen fehlgeschlagen")
                 return None
             
-            # Registriere Chatbot
-            self.registry["chatbots"][chatbot_id] = {
-                "name": name,
-                "description": description,
-                "created_at": config.created_at,
-                "website_url": website_url,
-                "document_count": len(config.documents),
-                "status": "active"
-            }
-            self._save_registry()
+            self.refresh_starter_answers(chatbot_id, rag_system, config, progress_callback)
+            
+            self._register_chatbot(config)
+            if checkpoint:
+                checkpoint.discard()
             
             if progress_callback:
                 progress_callback("✅ Chatbot erfolgreich erstellt!", 1.0)
@@ -231,8 +242,120 @@ class ChatbotFactory:
             st.error(f"Fehler beim Erstellen des Chatbots: {str(e)}")
             if 'chatbot_id' in locals():
                 self._cleanup_chatbot(chatbot_id)
+            if checkpoint:
+                checkpoint.fail(str(e))
             return None
     
+    def resume_build_job(self, checkpoint: BuildCheckpoint, progress_callback=None) -> Optional[str]:
+        """
+        Setzt einen abgebrochenen Build fort
+        
+        Die gecheckpointeten Chunks werden wiederverwendet (kein erneutes Scraping),
+        nur noch nicht embedded Batches laufen erneut über die API.
+        
+        Returns:
+            Chatbot-ID wenn erfolgreich, None sonst
+        """
+        chatbot_id = checkpoint.chatbot_id
+        try:
+            config = self.load_chatbot_config(chatbot_id)
+            chunks = checkpoint.load_chunks()
+            if config is None or not chunks:
+                # Abbruch vor dem Chunking: nichts fortzusetzen
+                self._cleanup_chatbot(chatbot_id)
+                checkpoint.fail("Build vor dem ersten Checkpoint abgebrochen")
+                return None
+            
+            rag_system = self._create_rag_system(chatbot_id, config.extended_config)
+            rag_system.checkpoint = checkpoint
+            progress_callback = self._with_heartbeat(checkpoint, progress_callback)
+            progress_callback(f"Setze Build fort ({len(chunks)} Chunks)...", 0.7)
+            
+            success = rag_system.process_multiple_sources(
+                document_chunks=chunks,
+                progress_callback=progress_callback
+            )
+            
+            if not success:
+                self._cleanup_chatbot(chatbot_id)
+                checkpoint.fail("Verarbeitung der Datenquellen fehlgeschlagen")
+                return None
+            
+            self.refresh_starter_answers(chatbot_id, rag_system, config, progress_callback)
+            
+            self._register_chatbot(config)
+            checkpoint.discard()
+            progress_callback("✅ Chatbot erfolgreich erstellt!", 1.0)
+            return chatbot_id
+            
+        except Exception as e:
+            print(f"Fehler beim Fortsetzen des Builds {checkpoint.job_id}: {e}")
+            self._cleanup_chatbot(chatbot_id)
+            checkpoint.fail(str(e))
+            return None
+    
+    def refresh_starter_answers(self, chatbot_id: str, rag_system: Optional[MultiSourceRAG] = None,
+                                config: Optional[ChatbotConfig] = None, progress_callback=None) -> int:
+        """
+        Berechnet die Antworten auf die Startfragen (branding.starter_questions) neu
+        
+        Nach jedem Build bzw. Index-Update aufrufen, ältere Antworten gelten dann nicht mehr.
+        Fehler brechen den Build nicht ab, die Fragen laufen dann über den normalen RAG-Pfad.
+        Im Build den Heartbeat-Callback übergeben: er läuft einmal pro Frage, damit ein
+        laufender Build nicht als verwaist gilt.
+        
+        Returns:
+            Anzahl vorberechneter Antworten
+        """
+        try:
+            config = config or self.load_chatbot_config(chatbot_id)
+            if config is None:
+                return 0
+            rag_system = rag_system or CloudMultiSourceRAG(chatbot_id, use_cloud_storage=True)
+            return rag_system.precompute_starter_answers(
+                starter_questions(config.branding),
+                **relevance_settings(config.branding),
+                progress_callback=progress_callback
+            )
+        except Exception as e:
+            print(f"Fehler beim Vorberechnen der Startfragen für {chatbot_id}: {e}")
+            return 0
+    
+    def _create_rag_system(self, chatbot_id: str, extended_config: Optional[Dict]) -> CloudMultiSourceRAG:
+        """RAG-System für einen neuen Build (Embedding-Backend und Index-Format aus der Konfiguration)"""
+        embedding_config = (extended_config or {}).get("embedding") or {}
+        embedder = get_embedder(**embedding_config) if embedding_config else None
+        index_config = (extended_config or {}).get("index") or {}
+        return CloudMultiSourceRAG(
+            chatbot_id,
+            use_cloud_storage=True,
+            embedder=embedder,
+            index_quantization=index_config.get("quantization"),
+            dedup_threshold=index_config.get("dedup_threshold"),
+            index_type=index_config.get("type")
+        )
+    
+    @staticmethod
+    def _with_heartbeat(checkpoint: BuildCheckpoint, progress_callback=None):
+        """Progress-Callback, der zusätzlich den Heartbeat des Build-Jobs aktualisiert"""
+        def callback(message: str, progress: float):
+            checkpoint.heartbeat(message, progress)
+            if progress_callback:
+                progress_callback(message, progress)
+        return callback
+    
+    def _register_chatbot(self, config: ChatbotConfig):
+        """Trägt einen fertig gebauten Chatbot in die Registry ein"""
+        self.registry["chatbots"][config.id] = {
+            "name": config.name,
+            "description": config.description,
+            "created_at": config.created_at,
+            "website_url": config.website_url,
+            "document_count": len(config.documents),
+            "status": "active"
+        }
+        self._save_registry()
+    
     def _save_chatbot_config(self, config: ChatbotConfig):
         """Speichert Chatbot-Konfiguration"""
         config_dir = self.chatbots_dir / config.id
@@ -299,6 +422,8 @@ class ChatbotFactory:
     
     def _cleanup_chatbot(self, chatbot_id: str):
         """Löscht alle Dateien eines Chatbots"""
+        get_index_registry().invalidate(chatbot_id)
+        
         chatbot_dir = self.chatbots_dir / chatbot_id
         if chatbot_dir.exists():
             shutil.rmtree(chatbot_dir)
@@ -318,7 +443,7 @@ class ChatbotFactory:
             rag_system = MultiSourceRAG(chatbot_id)
             
             # Prüfe ob RAG-System initialisiert ist
-            if rag_system.index_file.exists() and rag_system.metadata_file.exists():
+            if rag_system.index_file.exists() and rag_system.has_chunk_metadata():
                 return rag_system
             else:
                 return None
@@ -0,0 +1,241 @@
+# platform/utils/chunk_columns.py
+
+import os
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from collections.abc import Sequence
+
+import numpy as np
+
+# Spaltenformat der Chunk-Metadaten (ersetzt meta.pkl), alle Dateien im embeddings-Verzeichnis
+CHUNK_COLUMNS_FORMAT = "columnar-v1"
+CHUNK_MANIFEST_FILE = "chunks.manifest.json"
+CHUNK_COLUMN_FILES = {
+    "text": "chunks.text.bin",
+    "text_offsets": "chunks.text_offsets.npy",
+    "source_ids": "chunks.source_ids.npy",
+    "ids": "chunks.ids.npy",
+    "token_counts": "chunks.tokens.npy",
+    "extra": "chunks.extra.jsonl",
+    "extra_offsets": "chunks.extra_offsets.npy",
+}
+
+# Felder mit eigener Spalte, alle übrigen landen als JSON in der extra-Spalte
+_COLUMN_FIELDS = ("text", "source_type", "source_name", "chunk_id", "token_count")
+
+def _replace(path: Path, write):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def _encode_blob(values: List[bytes]):
+    offsets = np.zeros(len(values) + 1, dtype="int64")
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    return b"".join(values), offsets
+
+def write_chunk_columns(chunks: List[Dict], embeddings_dir: Path) -> Dict:
+    """
+    Schreibt Chunks spaltenweise
+
+    Layout:
+        chunks.text.bin / chunks.text_offsets.npy    UTF-8-Texte hintereinander + Byte-Offsets (n + 1)
+        chunks.source_ids.npy                        Zeile in der Quellen-Tabelle pro Chunk
+        chunks.ids.npy                               Chunk-IDs (nur wenn alle Chunks eine haben)
+        chunks.tokens.npy                            Token-Anzahl pro Chunk (nur wenn alle Chunks eine haben)
+        chunks.extra.jsonl / chunks.extra_offsets.npy übrige Felder (chunk_index, metadata, ...)
+        chunks.manifest.json                         Quellen-Tabelle und Statistiken
+
+    Das Manifest wird zuletzt ersetzt und dient als Versionsmarke (Index-Registry).
+
+    Returns:
+        Das geschriebene Manifest
+    """
+    embeddings_dir = Path(embeddings_dir)
+    paths = {name: embeddings_dir / file for name, file in CHUNK_COLUMN_FILES.items()}
+
+    source_rows: Dict[tuple, int] = {}
+    source_counts: List[int] = []
+    source_ids = np.empty(len(chunks), dtype="int32")
+    texts, extras = [], []
+    for position, chunk in enumerate(chunks):
+        key = (chunk.get("source_type"), chunk.get("source_name"))
+        row = source_rows.setdefault(key, len(source_rows))
+        if row == len(source_counts):
+            source_counts.append(0)
+        source_counts[row] += 1
+        source_ids[position] = row
+
+        texts.append(chunk.get("text", "").encode("utf-8"))
+        extra = {key: value for key, value in chunk.items() if key not in _COLUMN_FIELDS}
+        extras.append(json.dumps(extra, ensure_ascii=False).encode("utf-8") if extra else b"")
+
+    has_ids = bool(chunks) and all("chunk_id" in chunk for chunk in chunks)
+    has_token_counts = bool(chunks) and all("token_count" in chunk for chunk in chunks)
+    text_blob, text_offsets = _encode_blob(texts)
+    extra_blob, extra_offsets = _encode_blob(extras)
+
+    _replace(paths["text"], lambda f: f.write(text_blob))
+    _replace(paths["text_offsets"], lambda f: np.save(f, text_offsets))
+    _replace(paths["source_ids"], lambda f: np.save(f, source_ids))
+    _replace(paths["extra"], lambda f: f.write(extra_blob))
+    _replace(paths["extra_offsets"], lambda f: np.save(f, extra_offsets))
+    if has_ids:
+        ids = np.array([chunk["chunk_id"] for chunk in chunks], dtype="int64")
+        _replace(paths["ids"], lambda f: np.save(f, ids))
+    elif paths["ids"].exists():
+        paths["ids"].unlink()
+    if has_token_counts:
+        token_counts = np.array([chunk["token_count"] for chunk in chunks], dtype="int32")
+        _replace(paths["token_counts"], lambda f: np.save(f, token_counts))
+    elif paths["token_counts"].exists():
+        paths["token_counts"].unlink()
+
+    source_types: Dict[str, int] = {}
+    for (source_type, _), count in zip(source_rows, source_counts):
+        source_types[source_type or "unknown"] = source_types.get(source_type or "unknown", 0) + count
+
+    manifest = {
+        "format": CHUNK_COLUMNS_FORMAT,
+        "chunk_count": len(chunks),
+        "text_bytes": len(text_blob),
+        "has_ids": has_ids,
+        "has_token_counts": has_token_counts,
+        "token_count": sum(chunk["token_count"] for chunk in chunks) if has_token_counts else None,
+        "sources": [
+            {"source_type": source_type, "source_name": source_name, "chunks": count}
+            for (source_type, source_name), count in zip(source_rows, source_counts)
+        ],
+        "source_types": source_types
+    }
+    manifest_bytes = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+    _replace(embeddings_dir / CHUNK_MANIFEST_FILE, lambda f: f.write(manifest_bytes))
+    return manifest
+
+def read_chunk_manifest(embeddings_dir: Path) -> Optional[Dict]:
+    """Manifest mit Statistiken (ohne Chunk-Daten anzufassen) oder None"""
+    try:
+        with open(Path(embeddings_dir) / CHUNK_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+class LazyChunkIds:
+    """Dict-artiger Zugriff Chunk-ID -> Chunk (wie by_id in der Index-Registry)"""
+
+    def __init__(self, chunks: Sequence):
+        # Chunk-Liste mit position_of (ColumnarChunks, ChunkStore)
+        self._chunks = chunks
+
+    def __contains__(self, chunk_id) -> bool:
+        return self._chunks.position_of(int(chunk_id)) is not None
+
+    def __getitem__(self, chunk_id) -> Dict:
+        position = self._chunks.position_of(int(chunk_id))
+        if position is None:
+            raise KeyError(chunk_id)
+        return self._chunks[position]
+
+    def get(self, chunk_id, default=None):
+        position = self._chunks.position_of(int(chunk_id))
+        return default if position is None else self._chunks[position]
+
+def _map_file(path: Path):
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        return (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""), size
+
+class ColumnarChunks(Sequence):
+    """
+    Read-only Chunk-Liste über die gemappten Spalten
+    Nur das Manifest (Quellen-Tabelle) liegt im Heap, ein Chunk wird erst beim
+    Zugriff zusammengesetzt. Zugriff per Position oder per Chunk-ID (Bisektion).
+    """
+
+    def __init__(self, embeddings_dir: Path):
+        """
+        Raises:
+            FileNotFoundError: Wenn Manifest oder Spalten fehlen
+            ValueError: Wenn Spalten und Manifest nicht zusammenpassen (z.B. während eines Updates)
+        """
+        embeddings_dir = Path(embeddings_dir)
+        paths = {name: embeddings_dir / file for name, file in CHUNK_COLUMN_FILES.items()}
+        with open(embeddings_dir / CHUNK_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != CHUNK_COLUMNS_FORMAT:
+            raise ValueError(f"Unbekanntes Chunk-Format: {self.manifest.get('format')}")
+
+        self._sources = [(source["source_type"], source["source_name"]) for source in self.manifest["sources"]]
+        self._text, text_size = _map_file(paths["text"])
+        self._text_offsets = np.load(paths["text_offsets"], mmap_mode="r")
+        self._source_ids = np.load(paths["source_ids"], mmap_mode="r")
+        self._extra, extra_size = _map_file(paths["extra"])
+        self._extra_offsets = np.load(paths["extra_offsets"], mmap_mode="r")
+        self._ids = np.load(paths["ids"], mmap_mode="r") if self.manifest.get("has_ids") else None
+        self._token_counts = (np.load(paths["token_counts"], mmap_mode="r")
+                              if self.manifest.get("has_token_counts") else None)
+
+        count = self.manifest["chunk_count"]
+        if (len(self._text_offsets) != count + 1 or int(self._text_offsets[-1]) != text_size
+                or len(self._extra_offsets) != count + 1 or int(self._extra_offsets[-1]) != extra_size
+                or len(self._source_ids) != count or (self._ids is not None and len(self._ids) != count)
+                or (self._token_counts is not None and len(self._token_counts) != count)):
+            raise ValueError(f"Chunk-Spalten inkonsistent: {embeddings_dir}")
+
+    def __len__(self) -> int:
+        return len(self._source_ids)
+
+    def _position(self, position: int) -> int:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return position
+
+    def text(self, position: int) -> str:
+        """Nur der Text eines Chunks (ohne übrige Felder zu dekodieren)"""
+        position = self._position(position)
+        start, end = int(self._text_offsets[position]), int(self._text_offsets[position + 1])
+        return self._text[start:end].decode("utf-8")
+
+    def source(self, position: int) -> tuple:
+        """(source_type, source_name) eines Chunks aus der Quellen-Tabelle"""
+        return self._sources[int(self._source_ids[self._position(position)])]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        position = self._position(position)
+        chunk = {"text": self.text(position)}
+        source_type, source_name = self._sources[int(self._source_ids[position])]
+        if source_type is not None:
+            chunk["source_type"] = source_type
+        if source_name is not None:
+            chunk["source_name"] = source_name
+        start, end = int(self._extra_offsets[position]), int(self._extra_offsets[position + 1])
+        if end > start:
+            chunk.update(json.loads(self._extra[start:end]))
+        if self._token_counts is not None:
+            chunk["token_count"] = int(self._token_counts[position])
+        if self._ids is not None:
+            chunk["chunk_id"] = int(self._ids[position])
+        return chunk
+
+    def __iter__(self) -> Iterator[Dict]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def position_of(self, chunk_id: int) -> Optional[int]:
+        if self._ids is None:
+            return None
+        # Chunk-IDs sind aufsteigend (neue IDs immer größer)
+        position = int(np.searchsorted(self._ids, chunk_id))
+        if position < len(self._ids) and self._ids[position] == chunk_id:
+            return position
+        return None
+
+    def id_lookup(self) -> Optional[LazyChunkIds]:
+        """Dict-artiger Zugriff Chunk-ID -> Chunk oder None ohne ID-Spalte"""
+        return LazyChunkIds(self) if self._ids is not None else None
@@ -0,0 +1,104 @@
+# platform/utils/chunk_dedup.py
+
+import os
+import re
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Ab dieser SimHash-Ähnlichkeit (1 - Hamming-Distanz / 64) gilt ein Chunk als Duplikat, 0 = aus
+# 0.95 = höchstens 3 abweichende Bits; deutlich mehr trifft auch unabhängige Texte
+CHUNK_DEDUP_THRESHOLD = float(os.getenv("CHUNK_DEDUP_THRESHOLD", "0.95"))
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def simhash(text: str) -> int:
+    """64-Bit-SimHash über Wort-Shingles (robust gegen kleine Abweichungen)"""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) >= SHINGLE_SIZE:
+        features = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    else:
+        features = tokens or [text.strip().lower()]
+
+    digests = b"".join(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features)
+    # Bits aller Feature-Hashes als Matrix (n x 64), Mehrheitsentscheid pro Bit
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(features), SIMHASH_BITS)
+    majority = bits.sum(axis=0) * 2 > len(features)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+def similarity(a: int, b: int) -> float:
+    """Ähnlichkeit zweier SimHashes (1.0 = identisch)"""
+    return 1.0 - bin(a ^ b).count("1") / SIMHASH_BITS
+
+class SimHashIndex:
+    """
+    Nachschlage-Index für Near-Duplicates (LSH über Bit-Bänder)
+    Der SimHash wird in max_distance + 1 Bänder geteilt. Liegen zwei Hashes höchstens
+    max_distance Bits auseinander, stimmt mindestens ein Band exakt überein
+    (Schubfachprinzip). Eine Anfrage prüft daher nur die Kandidaten aus den
+    Band-Buckets statt aller Einträge.
+    """
+
+    def __init__(self, threshold: float):
+        self.max_distance = int(round(SIMHASH_BITS * (1.0 - threshold)))
+        band_count = self.max_distance + 1
+        width = -(-SIMHASH_BITS // band_count)
+        self._bands = [(shift, (1 << min(width, SIMHASH_BITS - shift)) - 1)
+                       for shift in range(0, SIMHASH_BITS, width)]
+        # Pro Band: Bandwert -> SimHashes
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in self._bands]
+
+    def find(self, value: int) -> bool:
+        """True wenn ein gespeicherter SimHash innerhalb der Distanz liegt"""
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            for candidate in buckets.get((value >> shift) & mask, ()):
+                if bin(candidate ^ value).count("1") <= self.max_distance:
+                    return True
+        return False
+
+    def add(self, value: int):
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            buckets.setdefault((value >> shift) & mask, []).append(value)
+
+def deduplicate_chunks(chunks: List[Dict],
+                       threshold: Optional[float] = None,
+                       existing: Optional[List[Dict]] = None) -> Tuple[List[Dict], int]:
+    """
+    Entfernt (nahezu) doppelte Chunks vor dem Embedding
+
+    Der erste Chunk einer Gruppe bleibt erhalten. Bereits indexierte Chunks
+    (existing) werden nie entfernt, verhindern aber neue Duplikate davon.
+
+    Args:
+        chunks: Neue Chunks (mit "text")
+        threshold: SimHash-Ähnlichkeit ab der ein Chunk als Duplikat gilt (Standard:
+            CHUNK_DEDUP_THRESHOLD, 0 deaktiviert die Deduplizierung)
+        existing: Bereits vorhandene Chunks
+
+    Returns:
+        (behaltene Chunks, Anzahl entfernter Chunks)
+    """
+    threshold = CHUNK_DEDUP_THRESHOLD if threshold is None else threshold
+    if threshold <= 0:
+        return list(chunks), 0
+
+    index = SimHashIndex(min(threshold, 1.0))
+    for chunk in existing or []:
+        index.add(simhash(chunk["text"]))
+
+    kept = []
+    for chunk in chunks:
+        value = simhash(chunk["text"])
+        if index.find(value):
+            continue
+        index.add(value)
+        kept.append(chunk)
+
+    return kept, len(chunks) - len(kept)
@@ -0,0 +1,147 @@
+# platform/utils/chunk_store.py
+
+import json
+from typing import Dict, Iterable, Iterator, Optional
+from collections.abc import Sequence
+
+import numpy as np
+
+from .chunk_columns import LazyChunkIds
+
+# Kein chunk_index (oder kein int) -> Feld landet in einer eigenen Spalte
+_NO_CHUNK_INDEX = np.iinfo(np.int64).min
+# Chunk hat das Feld nicht
+_MISSING = -1
+# Felder mit eigener Darstellung, alles andere wird feldweise interniert
+_FIXED_FIELDS = ("text", "source_type", "source_name", "chunk_id", "token_count")
+
+class ChunkStore(Sequence):
+    """
+    Kompakte Chunk-Liste im Heap (Lademodus "memory" der Index-Registry)
+
+    Statt eines Dicts pro Chunk liegen die Felder in parallelen Arrays:
+    alle Texte als ein UTF-8-Blob mit Offsets, Quellen (source_type, source_name)
+    als Tabelle und jedes übrige Feld in einer eigenen Spalte. Auch die Felder
+    in metadata (url, original_filename, ...) bekommen je eine Spalte; jede Spalte
+    interniert ihre Werte, wiederholte Werte liegen also nur einmal im Speicher.
+    Dicts entstehen erst beim Zugriff, bei der Suche also nur für die Top-k-Treffer.
+    """
+
+    __slots__ = ("_text", "_text_offsets", "_source_ids", "_sources", "_chunk_indexes",
+                 "_fields", "_ids", "_token_counts")
+
+    def __init__(self, chunks: Iterable[Dict]):
+        sources: Dict[tuple, int] = {}
+        # Feldpfad ((key,) oder (key, unterkey) bei Dicts wie metadata) -> (Wert-IDs pro Chunk, Werte)
+        fields: Dict[tuple, tuple] = {}
+        texts, source_ids, chunk_indexes, ids, token_counts = [], [], [], [], []
+
+        def intern(path: tuple, position: int, value):
+            column = fields.get(path)
+            if column is None:
+                column = fields[path] = ([], {})
+            value_ids, values = column
+            value_ids.extend([_MISSING] * (position - len(value_ids)))
+            encoded = json.dumps(value, ensure_ascii=False, sort_keys=True)
+            value_ids.append(values.setdefault(encoded, len(values)))
+
+        for position, chunk in enumerate(chunks):
+            texts.append(chunk.get("text", "").encode("utf-8"))
+            source = (chunk.get("source_type"), chunk.get("source_name"))
+            source_ids.append(sources.setdefault(source, len(sources)))
+
+            chunk_index = chunk.get("chunk_index")
+            has_index = type(chunk_index) is int
+            chunk_indexes.append(chunk_index if has_index else _NO_CHUNK_INDEX)
+
+            for key, value in chunk.items():
+                if key in _FIXED_FIELDS or (key == "chunk_index" and has_index):
+                    continue
+                if isinstance(value, dict):
+                    # Leeres Dict als Platzhalter, die Einträge bekommen eigene Spalten
+                    intern((key,), position, {})
+                    for sub_key, sub_value in value.items():
+                        intern((key, sub_key), position, sub_value)
+                else:
+                    intern((key,), position, value)
+            ids.append(chunk.get("chunk_id"))
+            token_counts.append(chunk.get("token_count"))
+
+        self._text = b"".join(texts)
+        self._text_offsets = np.zeros(len(texts) + 1, dtype="int64")
+        np.cumsum([len(text) for text in texts], out=self._text_offsets[1:])
+        self._source_ids = np.array(source_ids, dtype="int32")
+        self._sources = tuple(sources)
+        self._chunk_indexes = np.array(chunk_indexes, dtype="int64")
+        # Top-Level-Spalten vor den Unterfeldern, damit das Dict beim Zugriff schon existiert
+        self._fields = tuple(
+            (path, np.array(value_ids + [_MISSING] * (len(texts) - len(value_ids)), dtype="int32"), tuple(values))
+            for path, (value_ids, values) in sorted(fields.items(), key=lambda item: len(item[0]))
+        )
+        # Chunk-IDs nur, wenn alle Chunks eine haben (aufsteigend, Suche per Bisektion)
+        self._ids = np.array(ids, dtype="int64") if ids and None not in ids else None
+        # Vorberechnete Token-Anzahlen (Kontext-Budget), nur wenn alle Chunks eine haben
+        self._token_counts = np.array(token_counts, dtype="int32") if token_counts and None not in token_counts else None
+
+    def __len__(self) -> int:
+        return len(self._source_ids)
+
+    def _position(self, position: int) -> int:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return position
+
+    def text(self, position: int) -> str:
+        """Nur der Text eines Chunks"""
+        position = self._position(position)
+        return self._text[self._text_offsets[position]:self._text_offsets[position + 1]].decode("utf-8")
+
+    def source(self, position: int) -> tuple:
+        """(source_type, source_name) eines Chunks aus der internierten Quellen-Tabelle"""
+        return self._sources[self._source_ids[self._position(position)]]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        position = self._position(position)
+        chunk = {"text": self.text(position)}
+        source_type, source_name = self._sources[self._source_ids[position]]
+        if source_type is not None:
+            chunk["source_type"] = source_type
+        if source_name is not None:
+            chunk["source_name"] = source_name
+        if self._chunk_indexes[position] != _NO_CHUNK_INDEX:
+            chunk["chunk_index"] = int(self._chunk_indexes[position])
+        for path, value_ids, values in self._fields:
+            value_id = value_ids[position]
+            if value_id == _MISSING:
+                continue
+            # Frisch dekodiert, Aufrufer dürfen das Dict (inkl. metadata) verändern
+            value = json.loads(values[value_id])
+            if len(path) == 1:
+                chunk[path[0]] = value
+            else:
+                chunk[path[0]][path[1]] = value
+        if self._token_counts is not None:
+            chunk["token_count"] = int(self._token_counts[position])
+        if self._ids is not None:
+            chunk["chunk_id"] = int(self._ids[position])
+        return chunk
+
+    def __iter__(self) -> Iterator[Dict]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def position_of(self, chunk_id: int) -> Optional[int]:
+        if self._ids is None:
+            return None
+        position = int(np.searchsorted(self._ids, chunk_id))
+        if position < len(self._ids) and self._ids[position] == chunk_id:
+            return position
+        return None
+
+    def id_lookup(self) -> Optional[LazyChunkIds]:
+        """Dict-artiger Zugriff Chunk-ID -> Chunk oder None ohne Chunk-IDs"""
+        return LazyChunkIds(self) if self._ids is not None else None
@@ -17,6 +17,7 @@ import tempfile
 
 from .firebase_storage import get_firebase_storage
 from .multi_source_rag import MultiSourceRAG
+from .embedders import Embedder
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -27,16 +28,23 @@ class CloudMultiSourceRAG(MultiSourceRAG):
     Kombiniert lokale Verarbeitung mit persistenter Cloud-Speicherung
     """
     
-    def __init__(self, chatbot_id: str, use_cloud_storage: bool = True):
+    def __init__(self, chatbot_id: str, use_cloud_storage: bool = True, embedder: Optional[Embedder] = None,
+                 index_quantization: Optional[str] = None, dedup_threshold: Optional[float] = None,
+                 index_type: Optional[str] = None):
         """
         Initialisiert Cloud-enabled RAG System
         
         Args:
             chatbot_id: ID des Chatbots
             use_cloud_storage: Ob Firebase Storage verwendet werden soll
+            embedder: Optionaler Embedder (Standard: aus Manifest bzw. Deployment)
+            index_quantization: Speicherformat der Vektoren (none | fp16 | sq8)
+            dedup_threshold: SimHash-Schwelle für Near-Duplicate-Chunks (0 = aus)
+            index_type: auto | flat | hnsw | ivfpq
         """
         # Parent Klasse initialisieren
-        super().__init__(chatbot_id)
+        super().__init__(chatbot_id, embedder=embedder, index_quantization=index_quantization,
+                         dedup_threshold=dedup_threshold, index_type=index_type)
         
         self.use_cloud_storage = use_cloud_storage
         
@@ -92,7 +100,7 @@ class CloudMultiSourceRAG(MultiSourceRAG):
                     local_files_check = {
                         "config.json": (self.chatbot_dir / "config.json").exists(),
                         "index.faiss": (self.chatbot_dir / "embeddings/index.faiss").exists(),
-                        "meta.pkl": (self.chatbot_dir / "embeddings/meta.pkl").exists(),
+                        "chunks.manifest.json": self.metadata_file.exists(),
                         "all_chunks.json": (self.chatbot_dir / "chunks/all_chunks.json").exists()
                     }
                     logger.info(f"📋 Local files status: {local_files_check}")
@@ -126,34 +134,62 @@ class CloudMultiSourceRAG(MultiSourceRAG):
                 progress_callback(f"Fehler: {str(e)}", 0.0)
             return False
     
-    def load_rag_system(self):
+    def _after_index_update(self):
+        """Synchronisiert inkrementelle Index-Updates mit Firebase Storage"""
+        if self.use_cloud_storage and self.firebase_storage:
+            self.sync_to_cloud()
+    
+    def _after_metadata_migration(self):
+        """Lädt das migrierte Spaltenformat hoch, veraltete Dateien werden danach im Bucket gelöscht"""
+        if self.use_cloud_storage and self.firebase_storage:
+            self.sync_to_cloud()
+    
+    def precompute_starter_answers(self, questions: List[str], min_score: Optional[float] = None,
+                                   fallback_response: Optional[str] = None,
+                                   context_budget: Optional[int] = None, progress_callback=None) -> int:
+        """Berechnet die Startfragen-Antworten und lädt nur diese Datei zu Firebase Storage hoch"""
+        count = super().precompute_starter_answers(questions, min_score, fallback_response, context_budget,
+                                                   progress_callback)
+        if self.use_cloud_storage and self.firebase_storage:
+            cloud_path = f"chatbots/{self.chatbot_id}/embeddings/{self.starter_answers_file.name}"
+            if self.starter_answers_file.exists():
+                self.firebase_storage.upload_file(self.starter_answers_file, cloud_path)
+            else:
+                self.firebase_storage.delete_file(cloud_path)
+        return count
+    
+    def load_rag_entry(self) -> Dict:
         """
-        Lädt RAG-System - erst lokal, dann von Firebase Storage falls nötig
+        Lädt den Registry-Eintrag - erst lokal, dann von Firebase Storage falls nötig
+        
+        Alle Lesepfade (Chat, retrieve_many, Quellen-Endpoints) laufen hierüber, damit
+        auch ein frischer Worker ohne lokale Dateien den Chatbot findet.
         """
         try:
-            # Zuerst versuchen lokal zu laden
-            if self.index_file.exists() and self.metadata_file.exists():
-                logger.info(f"📁 Loading RAG system locally for {self.chatbot_id}")
-                return super().load_rag_system()
+            # Zuerst versuchen lokal zu laden (bzw. aus dem Tenant-Pack)
+            try:
+                return super().load_rag_entry()
+            except FileNotFoundError:
+                if not (self.use_cloud_storage and self.firebase_storage):
+                    raise
             
             # Falls lokal nicht verfügbar und Cloud Storage aktiviert: Download versuchen
-            if self.use_cloud_storage and self.firebase_storage:
-                logger.info(f"☁️ Attempting to download RAG system from Firebase Storage for {self.chatbot_id}")
+            logger.info(f"☁️ Attempting to download RAG system from Firebase Storage for {self.chatbot_id}")
+            
+            if self.firebase_storage.chatbot_exists_in_storage(self.chatbot_id):
+                # Download von Firebase Storage
+                download_success = self.firebase_storage.download_chatbot_files(
+                    self.chatbot_id,
+                    self.chatbot_dir
+                )
                 
-                if self.firebase_storage.chatbot_exists_in_storage(self.chatbot_id):
-                    # Download von Firebase Storage
-                    download_success = self.firebase_storage.download_chatbot_files(
-                        self.chatbot_id,
-                        self.chatbot_dir
-                    )
-                    
-                    if download_success and self.index_file.exists() and self.metadata_file.exists():
-                        logger.info(f"✅ Successfully downloaded and loaded RAG system for {self.chatbot_id}")
-                        return super().load_rag_system()
-                    else:
-                        logger.error(f"❌ Download failed or files incomplete for {self.chatbot_id}")
+                if download_success and self.index_file.exists() and self.has_chunk_metadata():
+                    logger.info(f"✅ Successfully downloaded and loaded RAG system for {self.chatbot_id}")
+                    return super().load_rag_entry()
                 else:
-                    logger.warning(f"⚠️ Chatbot {self.chatbot_id} not found in Firebase Storage")
+                    logger.error(f"❌ Download failed or files incomplete for {self.chatbot_id}")
+            else:
+                logger.warning(f"⚠️ Chatbot {self.chatbot_id} not found in Firebase Storage")
             
             # Wenn weder lokal noch in Cloud verfügbar
             raise FileNotFoundError(f"RAG system files not found for chatbot {self.chatbot_id}")
@@ -207,7 +243,7 @@ class CloudMultiSourceRAG(MultiSourceRAG):
                 logger.warning("Cloud storage not enabled")
                 return False
             
-            if not (self.index_file.exists() and self.metadata_file.exists()):
+            if not (self.index_file.exists() and self.has_chunk_metadata()):
                 logger.error(f"Local RAG files missing for {self.chatbot_id}")
                 return False
             
@@ -0,0 +1,119 @@
+# platform/utils/context_packer.py
+
+import os
+import re
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from .token_utils import count_tokens, count_tokens_batch, truncate_to_tokens
+
+load_dotenv()
+
+# Token-Budget für den RAG-Kontext im Prompt (pro Chatbot über behavior_settings.context_token_budget)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# Tokenizer für Budget und vorberechnete Chunk-Token-Anzahlen (ohne tiktoken: Schätzung)
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+
+# Aufschlag pro Chunk für Trenner und Quellenangabe im Prompt
+CHUNK_OVERHEAD_TOKENS = 8
+# Kürzere Überlappungen zwischen Chunks werden nicht gekürzt
+MIN_OVERLAP_CHARS = 40
+
+_WHITESPACE = re.compile(r"\s+")
+
+def count_chunk_tokens(texts: List[str]) -> List[int]:
+    """Token-Anzahlen vieler Chunk-Texte (Build-Zeit, gebündelt)"""
+    return count_tokens_batch(texts, TOKEN_ENCODING)
+
+def _overlap(left: str, right: str) -> int:
+    """
+    Länge des längsten echten Endes von left, mit dem right beginnt (mind. MIN_OVERLAP_CHARS)
+
+    Linear per KMP: right (ohne letztes Zeichen) ist das Muster, das Ende von left
+    (ohne erstes Zeichen) der durchsuchte Text.
+    """
+    pattern = right[:-1]
+    if len(pattern) < MIN_OVERLAP_CHARS or len(left) <= MIN_OVERLAP_CHARS:
+        return 0
+    text = left[1:][-len(pattern):]
+
+    failure = [0] * len(pattern)
+    k = 0
+    for i in range(1, len(pattern)):
+        while k and pattern[i] != pattern[k]:
+            k = failure[k - 1]
+        if pattern[i] == pattern[k]:
+            k += 1
+        failure[i] = k
+
+    matched = 0
+    for char in text:
+        while matched and (matched == len(pattern) or char != pattern[matched]):
+            matched = failure[matched - 1]
+        if char == pattern[matched]:
+            matched += 1
+    return matched if matched >= MIN_OVERLAP_CHARS else 0
+
+def _relevance(chunk: Dict) -> float:
+    score = chunk.get("rrf_score")
+    if score is None:
+        score = chunk.get("score")
+    return score if score is not None else 0.0
+
+def pack_context(chunks: List[Dict], budget: Optional[int] = None) -> List[Dict]:
+    """
+    Wählt Chunks für den Prompt bis zum Token-Budget
+
+    Chunks werden nach Relevanz (RRF- bzw. Kosinus-Score) aufgenommen. Doppelte und
+    in bereits gewählten Chunks enthaltene Texte entfallen, überlappende Anfänge bzw.
+    Enden werden abgeschnitten. Passt ein Chunk nicht mehr ins Budget, wird der nächste
+    probiert; nur der relevanteste Chunk wird notfalls auf das Budget gekürzt.
+
+    Args:
+        chunks: Treffer aus retrieve_chunks (mit vorberechnetem "token_count", falls vorhanden)
+        budget: Token-Budget (Standard: CONTEXT_TOKEN_BUDGET)
+
+    Returns:
+        Kopien der gewählten Chunks (ggf. gekürzter "text", "token_count" passend dazu)
+    """
+    budget = CONTEXT_TOKEN_BUDGET if budget is None else budget
+    packed: List[Dict] = []
+    normalized: List[str] = []
+    used = 0
+
+    for chunk in sorted(chunks, key=_relevance, reverse=True):
+        text = chunk["text"].strip()
+        key = _WHITESPACE.sub(" ", text).lower()
+        if not key or any(key in selected for selected in normalized):
+            continue
+
+        # Überlappungen mit bereits gewählten Chunks entfernen
+        trimmed = False
+        for selected in packed:
+            head = _overlap(selected["text"], text)
+            if head:
+                text, trimmed = text[head:].lstrip(), True
+            tail = _overlap(text, selected["text"])
+            if tail:
+                text, trimmed = text[:-tail].rstrip(), True
+        if len(text) < MIN_OVERLAP_CHARS and trimmed:
+            continue
+
+        tokens = chunk.get("token_count")
+        if trimmed or tokens is None:
+            tokens = count_tokens(text, TOKEN_ENCODING)
+        cost = tokens + CHUNK_OVERHEAD_TOKENS
+
+        if used + cost > budget:
+            if packed or budget <= CHUNK_OVERHEAD_TOKENS:
+                continue
+            text = truncate_to_tokens(text, budget - CHUNK_OVERHEAD_TOKENS, TOKEN_ENCODING)
+            tokens = count_tokens(text, TOKEN_ENCODING)
+            cost = tokens + CHUNK_OVERHEAD_TOKENS
+
+        packed.append({**chunk, "text": text, "token_count": tokens})
+        normalized.append(_WHITESPACE.sub(" ", text).lower())
+        used += cost
+
+    return packed
@@ -0,0 +1,288 @@
+# platform/utils/embedders.py
+
+import os
+import re
+import time
+import queue
+import hashlib
+import threading
+from functools import partial
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import openai
+from dotenv import load_dotenv
+
+from .token_utils import count_tokens_batch
+from .llm_clients import get_client_registry
+from .embedding_executor import (
+    AsyncEmbeddingExecutor, RETRYABLE_ERRORS, EMBED_MAX_RETRIES,
+    compute_retry_delay, get_embedding_rate_limiter, run_coroutine_sync
+)
+
+load_dotenv()
+
+# Standard-Backend der Deployment-Instanz (openai | local | hashing)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+# Reduzierte Dimension für neue Indizes (z.B. 512 bei text-embedding-3-*), leer = Modell-Standard
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+
+# Limits pro Embedding-Request (OpenAI erlaubt max. 2048 Inputs / 300k Tokens)
+EMBED_MAX_BATCH_INPUTS = int(os.getenv("EMBED_MAX_BATCH_INPUTS", "2048"))
+EMBED_MAX_BATCH_TOKENS = int(os.getenv("EMBED_MAX_BATCH_TOKENS", "100000"))
+
+# Callback(done_texts, total_texts, done_batches, total_batches)
+ProgressFn = Callable[[int, int, int, int], None]
+# Callback(start, end, vectors) nach jedem fertigen Batch (z.B. für Checkpoints)
+BatchFn = Callable[[int, int, np.ndarray], None]
+
+def plan_token_batches(texts: List[str],
+                       max_tokens: int = EMBED_MAX_BATCH_TOKENS,
+                       max_inputs: int = EMBED_MAX_BATCH_INPUTS) -> List[tuple[int, int, int]]:
+    """
+    Teilt Texte in Batches nach Token-Anzahl auf
+
+    Returns:
+        Liste von (start, end, tokens) Bereichen über texts
+    """
+    token_counts = count_tokens_batch(texts)
+    batches = []
+    start = 0
+    batch_tokens = 0
+
+    for i, tokens in enumerate(token_counts):
+        batch_full = batch_tokens + tokens > max_tokens or i - start >= max_inputs
+        if i > start and batch_full:
+            batches.append((start, i, batch_tokens))
+            start = i
+            batch_tokens = 0
+        batch_tokens += tokens
+
+    if start < len(texts):
+        batches.append((start, len(texts), batch_tokens))
+
+    return batches
+
+class Embedder(ABC):
+    """
+    Schnittstelle für Embedding-Backends
+    Ein Chatbot wird immer mit genau einem Embedder gebaut und abgefragt,
+    die Beschreibung (describe) wird dafür im Index-Manifest gespeichert.
+    """
+
+    backend: str = ""
+
+    def __init__(self, model: str, dimensions: Optional[int] = None):
+        self.model = model
+        self.dimensions = dimensions
+
+    @property
+    def cache_namespace(self) -> str:
+        """Modell-Schlüssel für Embedding- und Query-Caches"""
+        return f"{self.backend}/{self.model}"
+
+    def describe(self) -> Dict:
+        return {"backend": self.backend, "model": self.model, "dimensions": self.dimensions}
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embedded wenige Texte synchron (z.B. Nutzerfragen), float32-Matrix"""
+
+    def embed_many(self, texts: List[str], progress: Optional[ProgressFn] = None, batch_size: int = 64,
+                   on_batch: Optional[BatchFn] = None) -> np.ndarray:
+        """Embedded viele Texte batchweise, float32-Matrix (len(texts) x dim)"""
+        embeddings = None
+        total_batches = (len(texts) + batch_size - 1) // batch_size
+
+        for batch_number, start in enumerate(range(0, len(texts), batch_size), 1):
+            vectors = self.embed(texts[start:start + batch_size])
+            if embeddings is None:
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype="float32")
+            embeddings[start:start + len(vectors)] = vectors
+            if on_batch:
+                on_batch(start, start + len(vectors), vectors)
+            if progress:
+                progress(start + len(vectors), len(texts), batch_number, total_batches)
+
+        return embeddings
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI Embeddings API (Standard)"""
+
+    backend = "openai"
+
+    def __init__(self, model: str = "text-embedding-3-small", dimensions: Optional[int] = None, api_key: Optional[str] = None):
+        super().__init__(model, dimensions)
+        self.api_key = api_key or os.getenv("OPENAI_EMBED_API_KEY")
+        # Geteilter Client pro API-Key (Verbindungs-Pool über alle RAG-Instanzen)
+        self.client = get_client_registry().client(self.api_key)
+
+    @property
+    def cache_namespace(self) -> str:
+        # Bestehende Cache-Einträge liefen unter dem reinen Modellnamen
+        return self.model
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Ein API-Call für alle Texte (synchron, mit geteiltem Rate-Limit)"""
+        rate_limiter = get_embedding_rate_limiter()
+        token_count = sum(count_tokens_batch(texts))
+
+        for attempt in range(EMBED_MAX_RETRIES):
+            rate_limiter.acquire_sync(token_count)
+            try:
+                kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+                response = self.client.embeddings.create(
+                    model=self.model,
+                    input=texts,
+                    timeout=30,  # 30 Sekunden Timeout
+                    **kwargs
+                )
+                # Reihenfolge über den Index absichern
+                data = sorted(response.data, key=lambda item: item.index)
+                return np.array([item.embedding for item in data], dtype="float32")
+            except RETRYABLE_ERRORS as e:
+                print(f"Embedding-Fehler (Versuch {attempt + 1}/{EMBED_MAX_RETRIES}): {e}")
+                if attempt < EMBED_MAX_RETRIES - 1:
+                    delay = compute_retry_delay(attempt, e)
+                    if isinstance(e, openai.RateLimitError):
+                        rate_limiter.pause(delay)
+                    time.sleep(delay)
+                else:
+                    raise Exception(f"Embedding fehlgeschlagen nach {EMBED_MAX_RETRIES} Versuchen: {e}")
+
+    def embed_many(self, texts: List[str], progress: Optional[ProgressFn] = None, batch_size: int = 64,
+                   on_batch: Optional[BatchFn] = None) -> np.ndarray:
+        """Token-basierte Batches, nebenläufig über den asynchronen Executor"""
+        batches = plan_token_batches(texts)
+        state = {"embeddings": None, "done_texts": 0, "done_batches": 0}
+
+        def on_batch_done(batch_index: int, vectors: List[List[float]]):
+            start, end, _ = batches[batch_index]
+            # Matrix erst allokieren, wenn die Dimension bekannt ist
+            if state["embeddings"] is None:
+                state["embeddings"] = np.empty((len(texts), len(vectors[0])), dtype="float32")
+            state["embeddings"][start:end] = vectors
+            if on_batch:
+                on_batch(start, end, state["embeddings"][start:end])
+            state["done_texts"] += end - start
+            state["done_batches"] += 1
+            if progress:
+                progress(state["done_texts"], len(texts), state["done_batches"], len(batches))
+
+        # Callbacks (Checkpoint, Fortschritt) laufen im aufrufenden Thread, nicht im Embedding-Loop
+        pending_calls = queue.SimpleQueue()
+        executor = AsyncEmbeddingExecutor(api_key=self.api_key, model=self.model, dimensions=self.dimensions)
+        run_coroutine_sync(executor.embed_batches(
+            [texts[start:end] for start, end, _ in batches],
+            [tokens for _, _, tokens in batches],
+            lambda batch_index, vectors: pending_calls.put(partial(on_batch_done, batch_index, vectors))
+        ), pending_calls)
+
+        return state["embeddings"]
+
+class LocalEmbedder(Embedder):
+    """
+    Lokales Sentence-Embedding auf der CPU (sentence-transformers)
+    Kein Netzwerk-Hop pro Anfrage, das Modell wird einmal pro Prozess geladen
+    """
+
+    backend = "local"
+    _models: Dict[str, object] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", dimensions: Optional[int] = None):
+        super().__init__(model, dimensions)
+
+    def _load_model(self):
+        with LocalEmbedder._lock:
+            if self.model not in LocalEmbedder._models:
+                from sentence_transformers import SentenceTransformer
+                LocalEmbedder._models[self.model] = SentenceTransformer(self.model, device="cpu")
+            return LocalEmbedder._models[self.model]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self._load_model().encode(
+            list(texts),
+            batch_size=32,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        vectors = np.asarray(vectors, dtype="float32")
+        if self.dimensions:
+            vectors = np.ascontiguousarray(vectors[:, :self.dimensions])
+        return vectors
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministischer Hashing-Embedder (Feature Hashing über Wörter und Zeichen-Trigramme)
+    Keine Abhängigkeiten und kein Netzwerk: für Tests, Benchmarks und Offline-Builds
+    """
+
+    backend = "hashing"
+    _TOKEN = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, model: str = "hashing-v1", dimensions: Optional[int] = None):
+        super().__init__(model, dimensions or 384)
+
+    def _features(self, text: str) -> List[str]:
+        words = self._TOKEN.findall(text.lower())
+        features = [f"w:{word}" for word in words]
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype="float32")
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                vectors[row, (value >> 1) % self.dimensions] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+EMBEDDER_BACKENDS = {
+    OpenAIEmbedder.backend: OpenAIEmbedder,
+    LocalEmbedder.backend: LocalEmbedder,
+    HashingEmbedder.backend: HashingEmbedder,
+}
+
+def get_embedder(backend: Optional[str] = None, model: Optional[str] = None, dimensions: Optional[int] = None) -> Embedder:
+    """
+    Erstellt einen Embedder
+
+    Args:
+        backend: openai | local | hashing (Standard: EMBEDDING_BACKEND)
+        model: Modellname (Standard: EMBEDDING_MODEL bzw. Backend-Standard)
+        dimensions: Optionale reduzierte Dimension
+
+    Raises:
+        ValueError: Bei unbekanntem Backend
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in EMBEDDER_BACKENDS:
+        raise ValueError(f"Unbekanntes Embedding-Backend: {backend}")
+
+    deployment_default = backend == EMBEDDING_BACKEND
+    kwargs = {"dimensions": dimensions or (EMBEDDING_DIMENSIONS if deployment_default else None)}
+    model = model or (EMBEDDING_MODEL if deployment_default else None)
+    if model:
+        kwargs["model"] = model
+    return EMBEDDER_BACKENDS[backend](**kwargs)
+
+def embedder_from_manifest(manifest: Dict) -> Embedder:
+    """Embedder, mit dem ein bestehender Index gebaut wurde (ältere Indizes: OpenAI)"""
+    spec = manifest.get("embedder")
+    if not spec:
+        return OpenAIEmbedder(model=manifest.get("embed_model", "text-embedding-3-small"))
+    # Exakt wie gebaut, ohne Deployment-Standards (Modell/Dimension) einzumischen
+    backend = spec.get("backend", OpenAIEmbedder.backend)
+    if backend not in EMBEDDER_BACKENDS:
+        raise ValueError(f"Unbekanntes Embedding-Backend: {backend}")
+    return EMBEDDER_BACKENDS[backend](model=spec["model"], dimensions=spec.get("dimensions"))
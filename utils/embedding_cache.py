@@ -0,0 +1,221 @@
+# platform/utils/embedding_cache.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+
+def text_hash(text: str) -> str:
+    """Content-Adresse eines Textes (sha256)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Persistenter, chatbot-übergreifender Embedding-Cache (SQLite)
+    Schlüssel ist (Modell, Dimensionen, sha256(Text)). Bei Überschreiten der
+    Maximalgröße werden die am längsten nicht genutzten Einträge entfernt.
+    """
+
+    # Nach dem Evicten bis auf diesen Anteil der Maximalgröße freigeben
+    EVICT_TARGET_RATIO = 0.9
+    # SQLite-Limit für Parameter pro Statement
+    LOOKUP_CHUNK_SIZE = 500
+
+    def __init__(self, db_path: str = EMBEDDING_CACHE_PATH, max_bytes: int = EMBEDDING_CACHE_MAX_MB * 1024 * 1024):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        # WAL erlaubt parallele Leser aus mehreren Worker-Prozessen
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, dimensions, text_hash)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._init_size_counter()
+
+    def _init_size_counter(self):
+        """
+        Laufende Gesamtgröße in einer Meta-Zeile, von Triggern gepflegt
+
+        So braucht die Eviction-Prüfung kein SUM über die ganze Tabelle, und der Zähler
+        stimmt auch, wenn mehrere Worker-Prozesse in dieselbe Datenbank schreiben.
+        Bestehende Caches werden einmalig aus der Tabelle initialisiert.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS embeddings_size_insert AFTER INSERT ON embeddings BEGIN
+                    UPDATE cache_meta SET value = value + new.size WHERE key = 'total_size';
+                END
+            """)
+            self._conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS embeddings_size_update AFTER UPDATE OF size ON embeddings BEGIN
+                    UPDATE cache_meta SET value = value + new.size - old.size WHERE key = 'total_size';
+                END
+            """)
+            self._conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS embeddings_size_delete AFTER DELETE ON embeddings BEGIN
+                    UPDATE cache_meta SET value = value - old.size WHERE key = 'total_size';
+                END
+            """)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_meta (key, value) "
+                "SELECT 'total_size', COALESCE(SUM(size), 0) FROM embeddings"
+            )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _total_size(self) -> int:
+        return self._conn.execute("SELECT value FROM cache_meta WHERE key = 'total_size'").fetchone()[0]
+
+    def get_many(self, model: str, dimensions: Optional[int], texts: List[str]) -> Dict[int, np.ndarray]:
+        """
+        Sucht Embeddings für mehrere Texte
+
+        Returns:
+            Dict von Position in texts -> float32-Vektor (nur Treffer)
+        """
+        dims = dimensions or 0
+        hashes = [text_hash(text) for text in texts]
+        positions: Dict[str, List[int]] = {}
+        for i, h in enumerate(hashes):
+            positions.setdefault(h, []).append(i)
+
+        found: Dict[int, np.ndarray] = {}
+        unique_hashes = list(positions)
+        now = time.time()
+
+        with self._lock:
+            for offset in range(0, len(unique_hashes), self.LOOKUP_CHUNK_SIZE):
+                chunk = unique_hashes[offset:offset + self.LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND dimensions = ? AND text_hash IN ({placeholders})",
+                    [model, dims, *chunk]
+                ).fetchall()
+
+                for h, blob in rows:
+                    vector = np.frombuffer(blob, dtype="float32")
+                    for i in positions[h]:
+                        found[i] = vector
+
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND dimensions = ? AND text_hash = ?",
+                        [(now, model, dims, h) for h, _ in rows]
+                    )
+            self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, model: str, dimensions: Optional[int], texts: List[str], vectors: np.ndarray):
+        """Speichert Embeddings und entfernt bei Bedarf alte Einträge"""
+        dims = dimensions or 0
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            blob = np.asarray(vector, dtype="float32").tobytes()
+            rows.append((model, dims, text_hash(text), blob, len(blob), now))
+
+        with self._lock:
+            # Upsert statt INSERT OR REPLACE: REPLACE löst keine Delete-Trigger aus
+            self._conn.executemany(
+                "INSERT INTO embeddings (model, dimensions, text_hash, vector, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (model, dimensions, text_hash) DO UPDATE SET "
+                "vector = excluded.vector, size = excluded.size, last_used = excluded.last_used",
+                rows
+            )
+            self._conn.commit()
+            self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        """LRU-Eviction nach Gesamtgröße (Aufrufer hält den Lock)"""
+        total = self._total_size()
+        if total <= self.max_bytes:
+            return
+
+        to_free = total - int(self.max_bytes * self.EVICT_TARGET_RATIO)
+        freed = 0
+        rowids = []
+        # Genau die ältesten Einträge bis to_free; Einträge eines Batches teilen sich last_used,
+        # die rowid als Tiebreaker verhindert, dass ein gerade geschriebener Batch komplett verschwindet
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM embeddings ORDER BY last_used ASC, rowid ASC"):
+            if freed >= to_free:
+                break
+            freed += size
+            rowids.append(rowid)
+
+        if rowids:
+            self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", [(rowid,) for rowid in rowids])
+            self._conn.commit()
+            logger.info(f"🧹 Embedding-Cache: {len(rowids)} Einträge entfernt ({freed / 1024 / 1024:.1f} MB)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            total = self._total_size()
+            hits, misses = self.hits, self.misses
+        return {
+            "entries": entries,
+            "size_mb": round(total / 1024 / 1024, 2),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+            "hits": hits,
+            "misses": misses
+        }
+
+# Globale Cache-Instanz
+embedding_cache = None
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Singleton Pattern für den Embedding-Cache
+
+    Returns:
+        EmbeddingCache Instance oder None wenn deaktiviert/nicht verfügbar
+    """
+    global embedding_cache
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    if embedding_cache is None:
+        try:
+            embedding_cache = EmbeddingCache()
+        except sqlite3.Error as e:
+            logger.error(f"❌ Embedding-Cache konnte nicht geöffnet werden: {e}")
+            return None
+    return embedding_cache
@@ -0,0 +1,251 @@
+# platform/utils/embedding_executor.py
+
+import os
+import time
+import queue
+import random
+import asyncio
+import threading
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Callable, List, Optional
+
+import openai
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from .llm_clients import get_client_registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Limits des Embedding-Accounts (prozessweit geteilt zwischen allen Builds)
+EMBED_REQUESTS_PER_MINUTE = int(os.getenv("EMBED_REQUESTS_PER_MINUTE", "3000"))
+EMBED_TOKENS_PER_MINUTE = int(os.getenv("EMBED_TOKENS_PER_MINUTE", "1000000"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+
+# Fehler, bei denen sich ein erneuter Versuch lohnt
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+class TokenBucket:
+    """
+    Thread-sicherer Token Bucket (Kapazität = Rate pro Minute)
+    Reservierungen dürfen den Bucket ins Minus ziehen, der Aufrufer wartet
+    dann entsprechend lange. Dadurch funktioniert der Bucket über mehrere
+    Event-Loops und Threads hinweg.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Reserviert amount Tokens und gibt die nötige Wartezeit in Sekunden zurück"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            # Einzelne Anfragen größer als die Kapazität nicht ewig blockieren
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+class EmbeddingRateLimiter:
+    """Kombiniert Requests- und Tokens-pro-Minute-Limits plus globale 429-Pause"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, token_count: int) -> float:
+        wait = max(self.requests.reserve(1), self.tokens.reserve(token_count))
+        return max(wait, self.blocked_until - time.monotonic())
+
+    async def acquire(self, token_count: int):
+        wait = self._reserve(token_count)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, token_count: int):
+        wait = self._reserve(token_count)
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Pausiert alle Anfragen (z.B. nach 429 mit Retry-After)"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Liest Retry-After (Sekunden, Millisekunden oder HTTP-Datum) aus einer API-Fehlerantwort"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+    return None
+
+def compute_retry_delay(attempt: int, error: Exception, base_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """Exponential Backoff mit Full Jitter, Retry-After hat Vorrang"""
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        return min(max_delay, retry_after + random.uniform(0, base_delay))
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class AsyncEmbeddingExecutor:
+    """
+    Asynchroner Embedding-Executor
+    Schickt mehrere Batches parallel (begrenzte Concurrency), hält die
+    prozessweiten RPM/TPM-Limits ein und wiederholt fehlgeschlagene Batches
+    """
+
+    def __init__(self,
+                 api_key: str,
+                 model: str,
+                 dimensions: Optional[int] = None,
+                 rate_limiter: Optional[EmbeddingRateLimiter] = None,
+                 max_concurrency: int = EMBED_MAX_CONCURRENCY,
+                 max_retries: int = EMBED_MAX_RETRIES):
+        self.api_key = api_key
+        self.model = model
+        self.dimensions = dimensions
+        self.rate_limiter = rate_limiter or get_embedding_rate_limiter()
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+
+    async def _embed_batch(self, client: AsyncOpenAI, texts: List[str], token_count: int) -> List[List[float]]:
+        for attempt in range(self.max_retries):
+            await self.rate_limiter.acquire(token_count)
+            try:
+                kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+                response = await client.embeddings.create(model=self.model, input=texts, **kwargs)
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries - 1:
+                    raise Exception(f"Embedding fehlgeschlagen nach {self.max_retries} Versuchen: {e}")
+                delay = compute_retry_delay(attempt, e)
+                if isinstance(e, openai.RateLimitError):
+                    # Alle laufenden Builds drosseln, nicht nur diesen Batch
+                    self.rate_limiter.pause(delay)
+                logger.warning(f"Embedding-Fehler (Versuch {attempt + 1}/{self.max_retries}), neuer Versuch in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def embed_batches(self,
+                            batches: List[List[str]],
+                            token_counts: List[int],
+                            on_batch_done: Optional[Callable[[int, List[List[float]]], None]] = None) -> List[List[List[float]]]:
+        """
+        Embedded alle Batches nebenläufig
+
+        Args:
+            batches: Liste von Text-Batches
+            token_counts: Token-Anzahl pro Batch (für das TPM-Limit)
+            on_batch_done: Callback(batch_index, vectors) nach jedem fertigen Batch
+
+        Returns:
+            Vektoren pro Batch in Eingabereihenfolge
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: List[Optional[List[List[float]]]] = [None] * len(batches)
+
+        # Gepoolter Client des Build-Loops, Wiederholungen übernimmt _embed_batch
+        client = get_client_registry().async_client(self.api_key).with_options(max_retries=0)
+
+        async def run(batch_index: int):
+            async with semaphore:
+                vectors = await self._embed_batch(client, batches[batch_index], token_counts[batch_index])
+            results[batch_index] = vectors
+            if on_batch_done:
+                on_batch_done(batch_index, vectors)
+
+        await asyncio.gather(*(run(i) for i in range(len(batches))))
+
+        return results
+
+# Langlebiger Event-Loop aller Builds
+embedding_loop = None
+_embedding_loop_lock = threading.Lock()
+
+def get_embedding_loop() -> asyncio.AbstractEventLoop:
+    """
+    Singleton Pattern für den Event-Loop der Embedding-Builds (eigener Daemon-Thread)
+
+    Asynchrone Clients sind an ihren Loop gebunden. Ein Loop pro Build (asyncio.run)
+    hieße pro Build ein neuer Verbindungs-Pool samt TLS-Handshakes, über den
+    langlebigen Loop nutzen alle Builds den gepoolten Client der Registry.
+
+    Returns:
+        asyncio.AbstractEventLoop Instance
+    """
+    global embedding_loop
+    with _embedding_loop_lock:
+        if embedding_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="embedding-executor", daemon=True).start()
+            embedding_loop = loop
+        return embedding_loop
+
+def run_coroutine_sync(coro, pending_calls: Optional[queue.SimpleQueue] = None):
+    """
+    Führt eine Coroutine aus synchronem Code auf dem Embedding-Loop aus
+    Der aufrufende Thread wartet blockierend, auch wenn in ihm bereits ein
+    Event-Loop läuft (FastAPI).
+
+    Args:
+        coro: Coroutine
+        pending_calls: Queue mit Funktionen, die der wartende Thread ausführt, solange
+            die Coroutine läuft (z.B. Fortschritts-Callbacks, die im Thread des Aufrufers
+            laufen müssen wie bei Streamlit)
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_embedding_loop())
+    if pending_calls is None:
+        return future.result()
+
+    # None markiert das Ende, alle Callbacks der Coroutine liegen davor in der Queue
+    future.add_done_callback(lambda _: pending_calls.put(None))
+    try:
+        for call in iter(pending_calls.get, None):
+            call()
+    except BaseException:
+        future.cancel()
+        raise
+    return future.result()
+
+# Globale Rate-Limiter-Instanz
+embedding_rate_limiter = None
+
+def get_embedding_rate_limiter() -> EmbeddingRateLimiter:
+    """
+    Singleton Pattern für den prozessweiten Embedding-Rate-Limiter
+
+    Returns:
+        EmbeddingRateLimiter Instance
+    """
+    global embedding_rate_limiter
+    if embedding_rate_limiter is None:
+        embedding_rate_limiter = EmbeddingRateLimiter(EMBED_REQUESTS_PER_MINUTE, EMBED_TOKENS_PER_MINUTE)
+    return embedding_rate_limiter
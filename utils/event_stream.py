@@ -0,0 +1,22 @@
+# platform/utils/event_stream.py
+
+import json
+from typing import Dict, Iterable
+
+from fastapi.responses import StreamingResponse
+
+# Proxies (z.B. nginx) dürfen Events nicht puffern
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def format_sse(event: str, data: Dict) -> str:
+    """Ein Server-Sent Event, data als einzeiliges JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+def sse_response(events: Iterable[str]) -> StreamingResponse:
+    """
+    StreamingResponse für formatierte Events
+
+    Asynchrone Generatoren laufen im Event-Loop (blockierende Arbeit darin über
+    run_blocking), synchrone im Threadpool von Starlette.
+    """
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
@@ -10,6 +10,36 @@ from firebase_admin import storage
 
 logger = logging.getLogger(__name__)
 
+# Optionale RAG-Dateien (fehlen bei älteren Chatbots), relativ zum Chatbot-Verzeichnis
+OPTIONAL_CHATBOT_FILES = [
+    "embeddings/manifest.json",
+    "embeddings/vectors.npy",
+    "embeddings/ids.npy",
+    "embeddings/chunks.manifest.json",
+    "embeddings/chunks.text.bin",
+    "embeddings/chunks.text_offsets.npy",
+    "embeddings/chunks.source_ids.npy",
+    "embeddings/chunks.ids.npy",
+    "embeddings/chunks.tokens.npy",
+    "embeddings/chunks.extra.jsonl",
+    "embeddings/chunks.extra_offsets.npy",
+    "embeddings/starter_answers.json",
+    # BM25-Index der hybriden Suche
+    "embeddings/bm25.terms.npy",
+    "embeddings/bm25.offsets.npy",
+    "embeddings/bm25.postings.npy",
+    "embeddings/bm25.doclens.npy",
+    # Ältere Chatbots (werden beim Laden ins Spaltenformat migriert)
+    "embeddings/meta.pkl"
+]
+
+# Metadaten-Formate älterer Versionen, nach der Migration nur noch Altlasten im Bucket
+LEGACY_CHATBOT_FILES = [
+    "embeddings/meta.pkl",
+    "embeddings/meta.jsonl",
+    "embeddings/meta.offsets.npy"
+]
+
 class FirebaseStorageManager:
     """
     Verwaltet RAG-Dateien in Firebase Storage
@@ -197,10 +227,17 @@ class FirebaseStorageManager:
             files_to_upload = [
                 (local_chatbot_dir / "config.json", f"chatbots/{chatbot_id}/config.json"),
                 (local_chatbot_dir / "embeddings/index.faiss", f"chatbots/{chatbot_id}/embeddings/index.faiss"),
-                (local_chatbot_dir / "embeddings/meta.pkl", f"chatbots/{chatbot_id}/embeddings/meta.pkl"),
                 (local_chatbot_dir / "chunks/all_chunks.json", f"chatbots/{chatbot_id}/chunks/all_chunks.json")
             ]
             
+            # Optionale Dateien (fehlen bei älteren Chatbots)
+            optional_files = [
+                (local_chatbot_dir / path, f"chatbots/{chatbot_id}/{path}") for path in OPTIONAL_CHATBOT_FILES
+            ]
+            files_to_upload.extend(
+                (local_file, cloud_path) for local_file, cloud_path in optional_files if local_file.exists()
+            )
+            
             logger.info(f"📋 Attempting to upload {len(files_to_upload)} files for chatbot {chatbot_id}")
             
             for local_file, cloud_path in files_to_upload:
@@ -224,6 +261,9 @@ class FirebaseStorageManager:
             final_status = "successful" if success else "completed with errors"
             logger.info(f"📈 Upload summary for {chatbot_id}: {uploaded_count}/{len(files_to_upload)} files uploaded, status: {final_status}")
             
+            if success:
+                self.delete_stale_chatbot_files(chatbot_id, local_chatbot_dir)
+            
             return success
             
         except Exception as e:
@@ -232,6 +272,27 @@ class FirebaseStorageManager:
             logger.error(f"📍 Stack trace: {traceback.format_exc()}")
             return False
     
+    def delete_stale_chatbot_files(self, chatbot_id: str, local_chatbot_dir: Path) -> int:
+        """
+        Löscht optionale und veraltete Dateien, die lokal nicht mehr existieren
+        
+        Betrifft z.B. meta.pkl nach der Migration ins Spaltenformat oder chunks.ids.npy,
+        wenn ein Update die ID-Spalte entfernt hat. Nur nach erfolgreichem Upload aufrufen.
+        
+        Returns:
+            Anzahl gelöschter Dateien
+        """
+        prefix = f"chatbots/{chatbot_id}/"
+        cloud_files = set(self.list_files(prefix))
+        deleted = 0
+        for path in dict.fromkeys(OPTIONAL_CHATBOT_FILES + LEGACY_CHATBOT_FILES):
+            if prefix + path in cloud_files and not (local_chatbot_dir / path).exists():
+                if self.delete_file(prefix + path):
+                    deleted += 1
+        if deleted:
+            logger.info(f"🧹 Removed {deleted} stale files for chatbot {chatbot_id}")
+        return deleted
+    
     def download_chatbot_files(self, chatbot_id: str, local_chatbot_dir: Path) -> bool:
         """
         Lädt alle RAG-Dateien eines Chatbots von Firebase Storage herunter
@@ -254,14 +315,22 @@ class FirebaseStorageManager:
             files_to_download = [
                 (f"chatbots/{chatbot_id}/config.json", local_chatbot_dir / "config.json"),
                 (f"chatbots/{chatbot_id}/embeddings/index.faiss", local_chatbot_dir / "embeddings/index.faiss"),
-                (f"chatbots/{chatbot_id}/embeddings/meta.pkl", local_chatbot_dir / "embeddings/meta.pkl"),
                 (f"chatbots/{chatbot_id}/chunks/all_chunks.json", local_chatbot_dir / "chunks/all_chunks.json")
             ]
             
+            # Optionale Dateien (fehlen bei älteren Chatbots)
+            optional_files = [
+                (f"chatbots/{chatbot_id}/{path}", local_chatbot_dir / path) for path in OPTIONAL_CHATBOT_FILES
+            ]
+            
             for cloud_path, local_file in files_to_download:
                 if not self.download_file(cloud_path, local_file):
                     success = False
             
+            for cloud_path, local_file in optional_files:
+                if self.file_exists(cloud_path):
+                    self.download_file(cloud_path, local_file)
+            
             logger.info(f"✅ Chatbot {chatbot_id} files download {'successful' if success else 'completed with errors'}")
             return success
             
@@ -0,0 +1,246 @@
+# platform/utils/index_builder.py
+
+import os
+import math
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import faiss
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Vektor-Speicherformat neuer Indizes: none (float32) | fp16 | sq8
+INDEX_QUANTIZATION = os.getenv("INDEX_QUANTIZATION", "none")
+
+# Index-Typ neuer Indizes: auto (nach Chunk-Anzahl) | flat | hnsw | ivfpq
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+# Ab diesen Chunk-Anzahlen wählt "auto" HNSW bzw. IVF-PQ statt Brute Force
+INDEX_HNSW_MIN_CHUNKS = int(os.getenv("INDEX_HNSW_MIN_CHUNKS", "20000"))
+INDEX_IVFPQ_MIN_CHUNKS = int(os.getenv("INDEX_IVFPQ_MIN_CHUNKS", "500000"))
+
+# Build- und Standard-Suchparameter (Suchparameter landen im Manifest und sind dort tunebar)
+INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", "32"))
+INDEX_HNSW_EF_CONSTRUCTION = int(os.getenv("INDEX_HNSW_EF_CONSTRUCTION", "80"))
+INDEX_HNSW_EF_SEARCH = int(os.getenv("INDEX_HNSW_EF_SEARCH", "64"))
+INDEX_IVF_NPROBE = int(os.getenv("INDEX_IVF_NPROBE", "16"))
+
+# Neue Indizes vergleichen normierte Vektoren per Skalarprodukt (= Kosinus-Ähnlichkeit)
+INDEX_METRIC = "ip"
+METRICS = {
+    "ip": faiss.METRIC_INNER_PRODUCT,
+    "l2": faiss.METRIC_L2,
+}
+
+QUANTIZATIONS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+# PQ-Codebooks brauchen je 256 Trainingspunkte, darunter wird HNSW gebaut
+IVFPQ_MIN_TRAINING_POINTS = 10000
+
+def select_index_type(count: int, index_type: Optional[str] = None) -> str:
+    """Index-Typ für eine Chunk-Anzahl (explizite Typen werden durchgereicht)"""
+    index_type = index_type or INDEX_TYPE
+    if index_type == "auto":
+        if count >= INDEX_IVFPQ_MIN_CHUNKS:
+            index_type = "ivfpq"
+        elif count >= INDEX_HNSW_MIN_CHUNKS:
+            index_type = "hnsw"
+        else:
+            index_type = "flat"
+    elif index_type not in INDEX_TYPES:
+        raise ValueError(f"Unbekannter Index-Typ: {index_type}")
+
+    if index_type == "ivfpq" and count < IVFPQ_MIN_TRAINING_POINTS:
+        return "hnsw"
+    return index_type
+
+def default_search_params(index_type: str) -> Dict:
+    if index_type == "hnsw":
+        return {"efSearch": INDEX_HNSW_EF_SEARCH}
+    if index_type == "ivfpq":
+        return {"nprobe": INDEX_IVF_NPROBE}
+    return {}
+
+def plan_index(count: int, index_type: Optional[str] = None) -> Dict:
+    """
+    Index-Plan für das Manifest
+
+    Returns:
+        {"index_type": flat | hnsw | ivfpq, "metric": ip, "search_params": {...}}
+    """
+    selected = select_index_type(count, index_type)
+    return {"index_type": selected, "metric": INDEX_METRIC, "search_params": default_search_params(selected)}
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """L2-normierte float32-Kopie (Nullvektoren bleiben unverändert)"""
+    vectors = np.array(vectors, dtype="float32", order="C", ndmin=2)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def similarity_scores(distances: np.ndarray, metric: str) -> np.ndarray:
+    """
+    Rechnet FAISS-Distanzen in Kosinus-Ähnlichkeiten um (1.0 = identisch)
+
+    Ältere L2-Indizes liefern quadrierte Distanzen; für normierte Embeddings
+    (z.B. OpenAI) gilt cos = 1 - d² / 2.
+    """
+    if metric == "ip":
+        return distances
+    return 1.0 - distances / 2.0
+
+def ivf_list_count(count: int) -> int:
+    """Anzahl IVF-Listen (~4 * sqrt(n), genug Trainingspunkte pro Liste)"""
+    return int(min(max(16, 4 * math.sqrt(count)), max(16, count // 39), 65536))
+
+def pq_subquantizers(dim: int) -> int:
+    """Größte PQ-Aufteilung (max. 64 Bytes/Vektor), die dim teilt und >= 4 Dimensionen pro Teil lässt"""
+    for m in range(min(64, dim // 4), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+def apply_search_params(index: faiss.Index, search_params: Optional[Dict]):
+    """Setzt efSearch / nprobe auf dem (ggf. ID-gemappten) Index"""
+    if not search_params:
+        return
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if "efSearch" in search_params and hasattr(base, "hnsw"):
+        base.hnsw.efSearch = int(search_params["efSearch"])
+    if "nprobe" in search_params and hasattr(base, "nprobe"):
+        base.nprobe = int(search_params["nprobe"])
+
+def _training_sample(vectors: np.ndarray, size: int, seed: int = 42) -> np.ndarray:
+    if len(vectors) <= size:
+        return vectors
+    rows = np.random.default_rng(seed).choice(len(vectors), size, replace=False)
+    return vectors[np.sort(rows)]
+
+def build_index(vectors: np.ndarray, quantization: Optional[str] = None, ids: Optional[np.ndarray] = None,
+                plan: Optional[Dict] = None) -> faiss.Index:
+    """
+    Baut einen FAISS-Index über die Vektoren
+
+    Args:
+        vectors: float32-Matrix (n x dim)
+        quantization: none | fp16 | sq8 für Flat/HNSW (Standard: INDEX_QUANTIZATION)
+        ids: Optionale stabile int64 Chunk-IDs (ergibt einen IndexIDMap2)
+        plan: Index-Plan aus plan_index (Standard: flat mit L2-Distanz)
+
+    Raises:
+        ValueError: Bei unbekannter Quantisierung oder unbekanntem Index-Typ
+    """
+    quantization = quantization or INDEX_QUANTIZATION
+    plan = plan or {"index_type": "flat", "search_params": {}}
+    index_type = plan["index_type"]
+    metric_name = plan.get("metric", "l2")
+    if metric_name not in METRICS:
+        raise ValueError(f"Unbekannte Index-Metrik: {metric_name}")
+    metric = METRICS[metric_name]
+
+    if metric_name == "ip":
+        vectors = normalize_vectors(vectors)
+    else:
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+    count, dim = vectors.shape
+
+    if quantization != "none" and quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unbekannte Index-Quantisierung: {quantization}")
+
+    if index_type == "flat":
+        if quantization == "none":
+            index = faiss.IndexFlat(dim, metric)
+        else:
+            index = faiss.IndexScalarQuantizer(dim, QUANTIZATIONS[quantization], metric)
+            # SQ8 lernt Wertebereiche pro Dimension, fp16 braucht kein Training
+            index.train(vectors)
+    elif index_type == "hnsw":
+        if quantization == "none":
+            index = faiss.IndexHNSWFlat(dim, INDEX_HNSW_M, metric)
+        else:
+            index = faiss.IndexHNSWSQ(dim, QUANTIZATIONS[quantization], INDEX_HNSW_M, metric)
+            index.train(vectors)
+        index.hnsw.efConstruction = INDEX_HNSW_EF_CONSTRUCTION
+    elif index_type == "ivfpq":
+        # PQ komprimiert selbst, die Quantisierungs-Einstellung gilt hier nicht
+        nlist = ivf_list_count(count)
+        quantizer = faiss.IndexFlat(dim, metric)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_subquantizers(dim), 8, metric)
+        index.train(_training_sample(vectors, max(64 * nlist, 10000)))
+        # Der Index übernimmt den Quantizer (sonst gibt Python ihn frei)
+        index.own_fields = True
+        quantizer.this.disown()
+    else:
+        raise ValueError(f"Unbekannter Index-Typ: {index_type}")
+
+    apply_search_params(index, plan.get("search_params"))
+
+    if ids is not None:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(vectors, np.ascontiguousarray(ids, dtype="int64"))
+    else:
+        index.add(vectors)
+    return index
+
+def bytes_per_vector(index: faiss.Index) -> int:
+    """Speicherbedarf eines Vektors im Index (ohne Graph-/Listen-Overhead)"""
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFPQ)):
+        return index.code_size
+    return index.d * 4
+
+def recall_at_k(expected: np.ndarray, found: np.ndarray) -> float:
+    """Anteil der erwarteten Top-k-IDs (Baseline), die auch im Ergebnis des Kandidaten stehen"""
+    hits = sum(len(set(e[e >= 0]) & set(f[f >= 0])) for e, f in zip(expected, found))
+    total = sum(len(e[e >= 0]) for e in expected)
+    return hits / total if total else 1.0
+
+def compare_recall(vectors: np.ndarray,
+                   queries: Optional[np.ndarray] = None,
+                   k: int = 5,
+                   quantizations: Iterable[str] = ("fp16", "sq8"),
+                   index_types: Iterable[str] = ()) -> Dict[str, Dict]:
+    """
+    Vergleicht quantisierte Indizes und ANN-Indizes mit dem Flat-Baseline-Index
+
+    Ohne Queries werden die ersten (max. 200) Vektoren selbst als Anfragen genutzt.
+
+    Returns:
+        Dict pro Quantisierung bzw. Index-Typ mit recall@k, Bytes pro Vektor und Suchzeit
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    if queries is None:
+        queries = vectors[:min(len(vectors), 200)]
+    # Gleiche Metrik wie im Betrieb (normierte Vektoren, Skalarprodukt)
+    queries = normalize_vectors(queries)
+    k = min(k, len(vectors))
+
+    flat_plan = plan_index(len(vectors), "flat")
+    baseline = build_index(vectors, "none", plan=flat_plan)
+    _, expected = baseline.search(queries, k)
+    results = {}
+
+    candidates = [(quantization, quantization, flat_plan) for quantization in ("none", *quantizations)]
+    candidates += [(index_type, "none", plan_index(len(vectors), index_type)) for index_type in index_types]
+
+    for label, quantization, plan in candidates:
+        index = baseline if label == "none" else build_index(vectors, quantization, plan=plan)
+
+        started = time.perf_counter()
+        _, found = index.search(queries, k)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        results[label] = {
+            f"recall@{k}": round(recall_at_k(expected, found), 4),
+            "bytes_per_vector": bytes_per_vector(index),
+            "search_ms": round(elapsed_ms, 2)
+        }
+
+    return results
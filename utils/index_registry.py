@@ -0,0 +1,205 @@
+# platform/utils/index_registry.py
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+from dotenv import load_dotenv
+
+from .chunk_columns import ColumnarChunks
+from .chunk_store import ChunkStore
+from .lexical_index import LexicalIndex
+from .index_builder import apply_search_params
+
+load_dotenv()
+
+# mmap: Vektoren und Chunk-Metadaten über den Page-Cache mit anderen Workern teilen
+# memory: alles in den Heap des Prozesses laden
+INDEX_LOAD_MODE = os.getenv("INDEX_LOAD_MODE", "mmap")
+
+MANIFEST_FILE = "manifest.json"
+
+# Leseversuche, falls die Dateien während des Ladens neu geschrieben werden
+LOAD_ATTEMPTS = 3
+
+def read_index(index_file: Path, mode: str = INDEX_LOAD_MODE) -> faiss.Index:
+    """
+    Liest einen FAISS-Index, im mmap-Modus ohne Kopie in den Heap
+
+    IO_FLAG_MMAP_IFC gibt es erst ab faiss 1.11, ältere Versionen laden normal.
+    """
+    if mode == "mmap" and hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        try:
+            return faiss.read_index(str(index_file), faiss.IO_FLAG_MMAP_IFC)
+        except RuntimeError:
+            pass
+    return faiss.read_index(str(index_file))
+
+
+class IndexRegistry:
+    """
+    Prozessweite Registry für FAISS-Indizes und Chunk-Metadaten
+    Hält jeden Chatbot nach dem ersten Laden im Speicher und prüft bei jedem
+    Zugriff nur per os.stat (mtime + Größe), ob die Dateien neu geschrieben wurden
+    """
+
+    def __init__(self, load_mode: str = INDEX_LOAD_MODE):
+        self.load_mode = load_mode
+        self._entries: Dict[str, Dict] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    @staticmethod
+    def _signature(index_file: Path, metadata_file: Path) -> Tuple:
+        """
+        Günstige Versionssignatur der Dateien (mtime in ns + Größe)
+        Das Manifest ist optional, geänderte Suchparameter laden den Index neu.
+        """
+        signature = []
+        for file in (index_file, metadata_file):
+            stat = os.stat(file)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        try:
+            stat = os.stat(Path(metadata_file).parent / MANIFEST_FILE)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+        return tuple(signature)
+
+    def _key_lock(self, chatbot_id: str) -> threading.Lock:
+        with self._lock:
+            if chatbot_id not in self._key_locks:
+                self._key_locks[chatbot_id] = threading.Lock()
+            return self._key_locks[chatbot_id]
+
+    def get_entry(self, chatbot_id: str, index_file: Path, metadata_file: Path) -> Dict:
+        """
+        Gibt den residenten Eintrag eines Chatbots zurück
+        (Keys: index, chunks, by_id, lexical, metric, version, signature)
+
+        Lädt nur dann von der Platte, wenn der Chatbot noch nicht resident ist
+        oder sich die Signatur der Dateien geändert hat.
+
+        Raises:
+            FileNotFoundError: Wenn Index oder Metadaten fehlen
+        """
+        signature = self._signature(index_file, metadata_file)
+
+        entry = self._entries.get(chatbot_id)
+        if entry and entry["signature"] == signature:
+            self.hits += 1
+            return entry
+
+        # Pro Chatbot nur ein Ladevorgang gleichzeitig
+        with self._key_lock(chatbot_id):
+            entry = self._entries.get(chatbot_id)
+            if entry and entry["signature"] == signature:
+                self.hits += 1
+                return entry
+
+            # Wird parallel neu geschrieben, ändert sich die Signatur während des Lesens:
+            # dann erneut lesen, damit kein Mischstand unter der neuen Signatur landet
+            for _ in range(LOAD_ATTEMPTS):
+                entry = self._load_entry(index_file, metadata_file, signature)
+                current = self._signature(index_file, metadata_file)
+                if current == signature:
+                    self._entries[chatbot_id] = entry
+                    self.loads += 1
+                    return entry
+                signature = current
+
+            # Dateien ändern sich weiterhin: Eintrag ausliefern, aber nicht cachen,
+            # der nächste Zugriff lädt dann erneut
+            self.loads += 1
+            return entry
+
+    def _load_entry(self, index_file: Path, metadata_file: Path, signature: Tuple) -> Dict:
+        """Liest Index, Chunks und BM25-Index eines Chatbots von der Platte"""
+        manifest = self._read_manifest(metadata_file)
+        index = read_index(index_file, self.load_mode)
+        apply_search_params(index, manifest.get("search_params"))
+        chunks = self._load_chunks(metadata_file)
+
+        return {
+            "index": index,
+            "chunks": chunks,
+            # ID-gemappte Indizes liefern stabile Chunk-IDs statt Positionen
+            "by_id": chunks.id_lookup(),
+            # BM25-Index (None bei älteren Chatbots ohne lexikalischen Index)
+            "lexical": LexicalIndex.load(Path(metadata_file).parent, len(chunks)),
+            # Chatbots ohne Metrik im Manifest haben L2-Indizes
+            "metric": manifest.get("metric", "l2"),
+            # Index-Version aus dem Manifest (z.B. für Antwort-Caches)
+            "version": manifest.get("version"),
+            # Signatur von vor dem Lesen: ein paralleler Schreibvorgang erzwingt Neuladen
+            "signature": signature
+        }
+
+    @staticmethod
+    def _read_manifest(metadata_file: Path) -> Dict:
+        """Manifest neben den Metadaten (Suchparameter, Metrik), leer bei alten Chatbots"""
+        try:
+            with open(Path(metadata_file).parent / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load_chunks(self, metadata_file: Path):
+        """
+        Chunk-Metadaten aus dem Spaltenformat (metadata_file ist dessen Manifest):
+        gemappt im mmap-Modus, sonst als kompakter ChunkStore in den Heap
+        """
+        chunks = ColumnarChunks(Path(metadata_file).parent)
+        if self.load_mode == "mmap":
+            return chunks
+        return ChunkStore(chunks)
+
+    def get(self, chatbot_id: str, index_file: Path, metadata_file: Path) -> Tuple[faiss.Index, List[Dict]]:
+        """Gibt Index und Chunks eines Chatbots zurück (siehe get_entry)"""
+        entry = self.get_entry(chatbot_id, index_file, metadata_file)
+        return entry["index"], entry["chunks"]
+
+    def invalidate(self, chatbot_id: str):
+        """Entfernt einen Chatbot aus der Registry (z.B. nach Neuaufbau oder Löschen)"""
+        with self._lock:
+            self._entries.pop(chatbot_id, None)
+            self._key_locks.pop(chatbot_id, None)
+
+    def clear(self):
+        """Leert die komplette Registry"""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+    def is_resident(self, chatbot_id: str) -> bool:
+        return chatbot_id in self._entries
+
+    def stats(self) -> Dict:
+        """Statistiken für Health-Endpoints"""
+        return {
+            "load_mode": self.load_mode,
+            "resident_indexes": len(self._entries),
+            "resident_chunks": sum(len(e["chunks"]) for e in list(self._entries.values())),
+            "hits": self.hits,
+            "loads": self.loads
+        }
+
+# Globale Registry-Instanz
+index_registry = None
+
+def get_index_registry() -> IndexRegistry:
+    """
+    Singleton Pattern für die Index-Registry
+
+    Returns:
+        IndexRegistry Instance
+    """
+    global index_registry
+    if index_registry is None:
+        index_registry = IndexRegistry()
+    return index_registry
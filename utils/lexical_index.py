@@ -0,0 +1,212 @@
+# platform/utils/lexical_index.py
+
+import os
+import re
+import math
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Hybride Suche (BM25 + Vektoren, Reciprocal Rank Fusion) für Chatbots mit lexikalischem Index
+LEXICAL_SEARCH = os.getenv("LEXICAL_SEARCH", "true").lower() == "true"
+# Eindeutige lexikalische Treffer ohne Embedding-Aufruf beantworten
+LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "true").lower() == "true"
+# Fast Path: Anteil der (IDF-gewichteten) Suchbegriffe im besten Chunk und Abstand zum zweitbesten
+LEXICAL_FAST_PATH_COVERAGE = float(os.getenv("LEXICAL_FAST_PATH_COVERAGE", "0.9"))
+LEXICAL_FAST_PATH_MARGIN = float(os.getenv("LEXICAL_FAST_PATH_MARGIN", "1.5"))
+# Längere Fragen sind meist semantisch und gehen immer über die Vektorsuche
+LEXICAL_FAST_PATH_MAX_TERMS = int(os.getenv("LEXICAL_FAST_PATH_MAX_TERMS", "6"))
+# Lexikalische Treffer mit geringerer Abdeckung gelten als nicht relevant
+LEXICAL_MIN_COVERAGE = float(os.getenv("LEXICAL_MIN_COVERAGE", "0.5"))
+RRF_K = 60
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_LENGTH = 32
+MAX_QUERY_TERMS = 32
+
+# Dateien neben index.faiss (Begriffe sortiert, CSR-Postings: Chunk-Position + Häufigkeit)
+LEXICAL_FILES = {
+    "terms": "bm25.terms.npy",
+    "offsets": "bm25.offsets.npy",
+    "postings": "bm25.postings.npy",
+    "doc_lengths": "bm25.doclens.npy",
+}
+
+# Wörter inkl. Produktcodes, Preise und Versionen (z.B. "xk-200", "19.99", "v2.1")
+_TOKEN = re.compile(r"\w+(?:[-./,]\w+)*", re.UNICODE)
+_SEPARATOR = re.compile(r"[-./,]")
+_DIGIT = re.compile(r"\d")
+
+def tokenize(text: str) -> List[str]:
+    """Begriffe eines Textes (zusammengesetzte Codes zusätzlich in ihren Teilen)"""
+    tokens = []
+    for token in _TOKEN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if len(token) <= MAX_TERM_LENGTH:
+            tokens.append(token)
+        if _SEPARATOR.search(token):
+            tokens.extend(part for part in _SEPARATOR.split(token) if part and len(part) <= MAX_TERM_LENGTH)
+    return tokens
+
+def write_lexical_index(chunks: List[Dict], embeddings_dir: Path):
+    """
+    Baut den BM25-Index über die Chunk-Texte (Positionen wie in der Chunk-Liste)
+
+    Alle Dateien werden über temporäre Dateien ersetzt (wie in write_chunk_columns).
+    """
+    term_ids: Dict[str, int] = {}
+    rows, cols, freqs = [], [], []
+    doc_lengths = np.zeros(len(chunks), dtype="float32")
+
+    for position, chunk in enumerate(chunks):
+        counts = Counter(tokenize(chunk["text"]))
+        doc_lengths[position] = sum(counts.values())
+        for term, freq in counts.items():
+            rows.append(term_ids.setdefault(term, len(term_ids)))
+            cols.append(position)
+            freqs.append(freq)
+
+    # Begriffe sortieren, damit die Suche per Bisektion auf dem gemappten Array läuft
+    terms = np.array(sorted(term_ids), dtype=f"<U{MAX_TERM_LENGTH}")
+    rank = np.empty(len(term_ids), dtype="int64")
+    rank[[term_ids[term] for term in terms.tolist()]] = np.arange(len(term_ids))
+
+    rows = rank[np.asarray(rows, dtype="int64")]
+    cols = np.asarray(cols, dtype="int32")
+    order = np.lexsort((cols, rows))
+    postings = np.stack([cols[order], np.asarray(freqs, dtype="int32")[order]], axis=1)
+    offsets = np.zeros(len(terms) + 1, dtype="int64")
+    np.cumsum(np.bincount(rows, minlength=len(terms)), out=offsets[1:])
+
+    arrays = {"terms": terms, "offsets": offsets, "postings": postings, "doc_lengths": doc_lengths}
+    for name, array in arrays.items():
+        path = Path(embeddings_dir) / LEXICAL_FILES[name]
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+class LexicalIndex:
+    """
+    BM25-Index eines Chatbots über gemappte Arrays
+    Treffer sind Positionen in der Chunk-Liste (wie bei den gepagten Metadaten).
+    """
+
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, postings: np.ndarray, doc_lengths: np.ndarray):
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.doc_count = len(doc_lengths)
+        self.avg_length = max(float(doc_lengths.mean()), 1.0) if self.doc_count else 1.0
+
+    @classmethod
+    def load(cls, embeddings_dir: Path, chunk_count: int) -> Optional["LexicalIndex"]:
+        """
+        Lädt den Index (mmap) oder None, wenn er fehlt oder nicht zu den Chunks passt
+        (ältere Chatbots, laufender Neuaufbau)
+        """
+        paths = {name: Path(embeddings_dir) / file for name, file in LEXICAL_FILES.items()}
+        if not all(path.exists() for path in paths.values()):
+            return None
+        try:
+            arrays = {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+        except (OSError, ValueError):
+            return None
+        if (len(arrays["doc_lengths"]) != chunk_count
+                or len(arrays["offsets"]) != len(arrays["terms"]) + 1
+                or int(arrays["offsets"][-1]) != len(arrays["postings"])):
+            return None
+        return cls(**arrays)
+
+    def _idf(self, doc_freq: int) -> float:
+        return math.log(1.0 + (self.doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def _row(self, term: str) -> Optional[int]:
+        row = int(np.searchsorted(self.terms, term))
+        if row < len(self.terms) and self.terms[row] == term:
+            return row
+        return None
+
+    def query_terms(self, query: str) -> List[str]:
+        return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+    def search(self, query: str, top_k: int = 20) -> List[Tuple[int, float, float]]:
+        """
+        BM25-Suche
+
+        Returns:
+            Liste von (Chunk-Position, BM25-Score, Abdeckung) absteigend nach Score.
+            Abdeckung = IDF-gewichteter Anteil der Suchbegriffe, die im Chunk vorkommen.
+        """
+        query_terms = self.query_terms(query)
+        if not query_terms or not self.doc_count:
+            return []
+
+        scores = np.zeros(self.doc_count, dtype="float32")
+        matched_idf = np.zeros(self.doc_count, dtype="float32")
+        total_idf = 0.0
+
+        for term in query_terms:
+            row = self._row(term)
+            if row is None:
+                # Unbekannte Codes/Zahlen senken die Abdeckung, unbekannte Wörter gelten als Füllwörter
+                if _DIGIT.search(term):
+                    total_idf += self._idf(0)
+                continue
+            start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+            idf = self._idf(end - start)
+            total_idf += idf
+
+            positions = self.postings[start:end, 0]
+            freqs = self.postings[start:end, 1].astype("float32")
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_lengths[positions] / self.avg_length)
+            scores[positions] += idf * freqs * (BM25_K1 + 1.0) / (freqs + norm)
+            matched_idf[positions] += idf
+
+        candidates = np.flatnonzero(scores)
+        if not len(candidates) or not total_idf:
+            return []
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            (int(position), float(scores[position]), float(matched_idf[position] / total_idf))
+            for position in candidates
+        ]
+
+    def is_confident(self, query: str, hits: List[Tuple[int, float, float]]) -> bool:
+        """
+        True wenn der beste Treffer eindeutig ist: kurze Frage, deren Begriffe überwiegend
+        im Index vorkommen, volle Abdeckung und klarer Abstand zum zweitbesten Treffer
+        """
+        query_terms = self.query_terms(query)
+        if not hits or len(query_terms) > LEXICAL_FAST_PATH_MAX_TERMS:
+            return False
+        known = sum(1 for term in query_terms if self._row(term) is not None)
+        if known * 2 < len(query_terms):
+            return False
+        _, best_score, coverage = hits[0]
+        if coverage < LEXICAL_FAST_PATH_COVERAGE:
+            return False
+        return len(hits) == 1 or best_score >= LEXICAL_FAST_PATH_MARGIN * hits[1][1]
+
+def reciprocal_rank_fusion(*rankings: List, k: int = RRF_K) -> Dict:
+    """
+    Reciprocal Rank Fusion mehrerer Rankings
+
+    Returns:
+        Dict Schlüssel -> RRF-Score (Summe von 1 / (k + Rang))
+    """
+    fused: Dict = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return fused
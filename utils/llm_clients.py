@@ -0,0 +1,173 @@
+# platform/utils/llm_clients.py
+
+import os
+import asyncio
+import threading
+import logging
+import importlib.util
+from typing import Dict, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI
+
+from .chat_executor import run_blocking
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Verbindungs-Pools der geteilten HTTP-Clients (pro Client, d.h. pro API-Key und Endpoint)
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_SECONDS = float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "90"))
+# Timeouts: Verbindungsaufbau kurz, Lesen lang genug für Completions
+LLM_HTTP_CONNECT_TIMEOUT = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# HTTP/2 (auto = wenn das Paket h2 installiert ist)
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "auto").lower()
+
+def http2_enabled() -> bool:
+    if LLM_HTTP2 == "auto":
+        return importlib.util.find_spec("h2") is not None
+    return LLM_HTTP2 == "true"
+
+def _http_settings() -> Dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_SECONDS
+        ),
+        "timeout": httpx.Timeout(LLM_HTTP_TIMEOUT, connect=LLM_HTTP_CONNECT_TIMEOUT),
+        "http2": http2_enabled(),
+        "follow_redirects": True
+    }
+
+class ClientRegistry:
+    """
+    Prozessweite, langlebige OpenAI-kompatible Clients (OpenRouter-LLM, OpenAI-Embeddings)
+
+    Ein Client pro (API-Key, Endpoint) mit eigenem Verbindungs-Pool: Keep-Alive statt
+    TLS-Handshake pro Nachricht. Asynchrone Clients sind an ihren Event-Loop gebunden
+    und werden pro Loop angelegt (Chat: Loop der App, Builds: Embedding-Loop).
+    """
+
+    def __init__(self):
+        # (API-Key, Base-URL) -> (Client, httpx-Pool), asynchron zusätzlich pro Loop
+        self._clients: Dict[Tuple[Optional[str], Optional[str]], Tuple[OpenAI, httpx.Client]] = {}
+        self._async_clients: Dict[Tuple[Optional[str], Optional[str], asyncio.AbstractEventLoop],
+                                  Tuple[AsyncOpenAI, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+
+    def client(self, api_key: Optional[str], base_url: Optional[str] = None) -> OpenAI:
+        """Synchroner Client (Embeddings, Builds), base_url None = OpenAI"""
+        key = (api_key, base_url)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                http_client = httpx.Client(**_http_settings())
+                client = OpenAI(api_key=api_key, base_url=base_url, max_retries=LLM_MAX_RETRIES,
+                                http_client=http_client)
+                entry = (client, http_client)
+                self._clients[key] = entry
+            return entry[0]
+
+    def async_client(self, api_key: Optional[str], base_url: Optional[str] = None) -> AsyncOpenAI:
+        """Asynchroner Client für den laufenden Event-Loop (Chat-Endpoints)"""
+        key = (api_key, base_url, asyncio.get_running_loop())
+        with self._lock:
+            entry = self._async_clients.get(key)
+            if entry is None:
+                # Clients geschlossener Loops sind unbrauchbar (z.B. nach asyncio.run in Skripten)
+                for stale in [stale for stale in self._async_clients if stale[2].is_closed()]:
+                    del self._async_clients[stale]
+                http_client = httpx.AsyncClient(**_http_settings())
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=LLM_MAX_RETRIES,
+                                     http_client=http_client)
+                entry = (client, http_client)
+                self._async_clients[key] = entry
+            return entry[0]
+
+    def openrouter(self) -> Optional[OpenAI]:
+        """OpenRouter-Client oder None ohne OPENROUTER_API_KEY"""
+        api_key = os.getenv("OPENROUTER_API_KEY")
+        return self.client(api_key, OPENROUTER_BASE_URL) if api_key else None
+
+    def async_openrouter(self) -> Optional[AsyncOpenAI]:
+        """Asynchroner OpenRouter-Client oder None ohne OPENROUTER_API_KEY"""
+        api_key = os.getenv("OPENROUTER_API_KEY")
+        return self.async_client(api_key, OPENROUTER_BASE_URL) if api_key else None
+
+    def warm(self):
+        """
+        Legt die synchronen Clients an und baut je eine Verbindung auf (TLS + Keep-Alive)
+
+        Fehler werden nur geloggt, der erste echte Aufruf verbindet dann selbst.
+        """
+        if os.getenv("OPENROUTER_API_KEY"):
+            self.openrouter()
+        if os.getenv("OPENAI_EMBED_API_KEY"):
+            self.client(os.getenv("OPENAI_EMBED_API_KEY"))
+        with self._lock:
+            entries = list(self._clients.values())
+        for client, http_client in entries:
+            try:
+                http_client.head(str(client.base_url))
+            except Exception as e:
+                logger.warning(f"⚠️ Warm-up of {client.base_url} failed: {e}")
+
+    async def awarm(self):
+        """Wie warm, zusätzlich für den asynchronen OpenRouter-Client des laufenden Loops"""
+        await run_blocking(self.warm)
+        if self.async_openrouter() is None:
+            return
+        key = (os.getenv("OPENROUTER_API_KEY"), OPENROUTER_BASE_URL, asyncio.get_running_loop())
+        _, http_client = self._async_clients[key]
+        try:
+            await http_client.head(OPENROUTER_BASE_URL)
+        except Exception as e:
+            logger.warning(f"⚠️ Async warm-up of {OPENROUTER_BASE_URL} failed: {e}")
+
+    async def aclose(self):
+        """Schließt alle Clients (Shutdown der App), asynchrone jeweils auf ihrem eigenen Loop"""
+        with self._lock:
+            http_clients = [http_client for _, http_client in self._clients.values()]
+            async_http_clients = [(key[2], http_client) for key, (_, http_client) in self._async_clients.items()]
+            self._clients.clear()
+            self._async_clients.clear()
+        for http_client in http_clients:
+            http_client.close()
+        current_loop = asyncio.get_running_loop()
+        for loop, http_client in async_http_clients:
+            if loop is current_loop:
+                await http_client.aclose()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(http_client.aclose(), loop))
+
+    def stats(self) -> Dict:
+        return {
+            "clients": len(self._clients),
+            "async_clients": len(self._async_clients),
+            "http2": http2_enabled(),
+            "max_connections": LLM_HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": LLM_HTTP_MAX_KEEPALIVE
+        }
+
+# Globale Registry-Instanz
+client_registry = None
+
+def get_client_registry() -> ClientRegistry:
+    """
+    Singleton Pattern für die geteilten LLM- und Embedding-Clients
+
+    Returns:
+        ClientRegistry Instance
+    """
+    global client_registry
+    if client_registry is None:
+        client_registry = ClientRegistry()
+    return client_registry
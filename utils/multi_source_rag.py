@@ -5,39 +5,156 @@ import json
 import pickle
 import numpy as np
 import faiss
-from typing import List, Dict, Union, Optional
+from typing import List, Dict, Union, Optional, AsyncIterator
 from pathlib import Path
-from openai import OpenAI
-import openai
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import streamlit as st
 import uuid
 import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from .index_registry import get_index_registry
+from .chunk_columns import write_chunk_columns, read_chunk_manifest, CHUNK_MANIFEST_FILE
+from .lexical_index import (write_lexical_index, reciprocal_rank_fusion, LEXICAL_SEARCH, LEXICAL_FAST_PATH,
+                            LEXICAL_MIN_COVERAGE)
+from .embedding_cache import get_embedding_cache
+from .query_cache import get_query_embedding_cache, normalize_query
+from .embedders import Embedder, get_embedder, embedder_from_manifest
+from .index_builder import (build_index, plan_index, normalize_vectors, similarity_scores,
+                            INDEX_QUANTIZATION, INDEX_TYPE)
+from .chunk_dedup import deduplicate_chunks
+from .tenant_pack import get_tenant_pack, TENANT_PACK
+from .answer_cache import get_answer_cache
+from .context_packer import pack_context, count_chunk_tokens
+from .build_checkpoint import BuildCheckpoint
+from .chat_executor import run_blocking
+from .llm_clients import get_client_registry
+from .file_lock import file_lock
 
 load_dotenv()
 
+# Mindest-Ähnlichkeit (Kosinus) eines Chunks, darunter antwortet der Chatbot ohne LLM-Aufruf
+RAG_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", "0.2"))
+NO_MATCH_RESPONSE = "Entschuldigung, ich konnte keine relevanten Informationen zu Ihrer Frage finden."
+MISSING_ROUTER_KEY_RESPONSE = "Fehler: OpenRouter API-Key nicht konfiguriert."
+# LLM für die Antworten (über OpenRouter)
+LLM_MODEL = "mistralai/mistral-small-3.2-24b-instruct:free"
+# Höchstzahl vorberechneter Startfragen pro Chatbot (branding.starter_questions)
+MAX_STARTER_QUESTIONS = int(os.getenv("MAX_STARTER_QUESTIONS", "20"))
+
+# Ein inkrementelles Update pro Chatbot gleichzeitig: Thread-Lock im Prozess,
+# Lock-Datei im embeddings-Verzeichnis über alle Worker-Prozesse hinweg
+UPDATE_LOCK_FILE = ".update.lock"
+_update_locks: Dict[str, threading.Lock] = {}
+_update_locks_guard = threading.Lock()
+
+@contextmanager
+def _update_lock(chatbot_id: str, embeddings_dir: Path):
+    with _update_locks_guard:
+        if chatbot_id not in _update_locks:
+            _update_locks[chatbot_id] = threading.Lock()
+        lock = _update_locks[chatbot_id]
+    with lock, file_lock(Path(embeddings_dir) / UPDATE_LOCK_FILE):
+        yield
+
+def source_key(chunk: Dict) -> tuple:
+    """Gruppierungsschlüssel einer Quelle (Typ, Name)"""
+    return (chunk.get("source_type", "unknown"), chunk.get("source_name", "unknown"))
+
+def relevance_settings(branding: Optional[Dict]) -> Dict:
+    """
+    Relevanz-Schwelle, Fallback-Antwort und Kontext-Budget eines Chatbots (aus branding.behavior_settings)
+    
+    Returns:
+        Dict mit min_score, fallback_response und context_budget (Keyword-Argumente für get_response)
+    """
+    behavior = (branding or {}).get("behavior_settings") or {}
+    min_score = behavior.get("min_relevance_score")
+    context_budget = behavior.get("context_token_budget")
+    return {
+        "min_score": RAG_MIN_SCORE if min_score is None else float(min_score),
+        "fallback_response": behavior.get("fallback_message") or None,
+        "context_budget": int(context_budget) if context_budget else None
+    }
+
+def starter_questions(branding: Optional[Dict]) -> List[str]:
+    """Startfragen eines Chatbots (branding.starter_questions), bereinigt und ohne Duplikate"""
+    questions, seen = [], set()
+    for question in (branding or {}).get("starter_questions") or []:
+        question = str(question).strip()
+        key = normalize_query(question)
+        if key and key not in seen:
+            seen.add(key)
+            questions.append(question)
+    return questions[:MAX_STARTER_QUESTIONS]
+
 class MultiSourceRAG:
     """
     Erweiterte RAG-Pipeline für multiple Datenquellen
     Kombiniert Website-Scraping und Dokument-Upload
     """
     
-    def __init__(self, chatbot_id: str):
+    def __init__(self, chatbot_id: str, embedder: Optional[Embedder] = None, index_quantization: Optional[str] = None,
+                 dedup_threshold: Optional[float] = None, index_type: Optional[str] = None):
         self.chatbot_id = chatbot_id
-        self.embed_api_key = openai.api_key = os.getenv("OPENAI_EMBED_API_KEY")
-        self.embed_model = "text-embedding-3-small"
-        self.embed_client = OpenAI(api_key=self.embed_api_key)
+        # Speicherformat der Vektoren beim nächsten Build (none | fp16 | sq8)
+        self.index_quantization = index_quantization or INDEX_QUANTIZATION
+        # Index-Typ (auto = nach Chunk-Anzahl flat / hnsw / ivfpq)
+        self.index_type = index_type or INDEX_TYPE
+        # SimHash-Schwelle für Near-Duplicate-Chunks (None = CHUNK_DEDUP_THRESHOLD, 0 = aus)
+        self.dedup_threshold = dedup_threshold
+        self.duplicates_dropped = 0
+        # Optionaler Build-Checkpoint (fortsetzbare Builds, siehe ChatbotFactory)
+        self.checkpoint: Optional[BuildCheckpoint] = None
         
         # Chatbot-spezifische Pfade
         self.chatbot_dir = Path(f"data/chatbots/{chatbot_id}")
         self.chunks_dir = self.chatbot_dir / "chunks"
         self.embeddings_dir = self.chatbot_dir / "embeddings"
         self.index_file = self.embeddings_dir / "index.faiss"
-        self.metadata_file = self.embeddings_dir / "meta.pkl"
+        # Chunk-Metadaten im Spaltenformat (Manifest als Versionsmarke), meta.pkl nur noch bei älteren Chatbots
+        self.metadata_file = self.embeddings_dir / CHUNK_MANIFEST_FILE
+        self.legacy_metadata_file = self.embeddings_dir / "meta.pkl"
+        self.manifest_file = self.embeddings_dir / "manifest.json"
+        # Rohvektoren + Chunk-IDs für inkrementelle Updates ohne Neu-Embedding
+        self.vectors_file = self.embeddings_dir / "vectors.npy"
+        self.ids_file = self.embeddings_dir / "ids.npy"
+        # Vorberechnete Antworten auf die Startfragen (gültig für eine Antwort-Version)
+        self.starter_answers_file = self.embeddings_dir / "starter_answers.json"
+        self._starter_answers: Optional[tuple] = None
         
         # Erstelle Verzeichnisse
         self.chunks_dir.mkdir(parents=True, exist_ok=True)
         self.embeddings_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Explizit gesetzter Embedder, sonst beim ersten Zugriff aufgelöst
+        self._embedder = embedder
+    
+    @property
+    def embedder(self) -> Embedder:
+        """
+        Embedder des Chatbots: explizit > Manifest des bestehenden Index > Deployment-Standard
+        
+        Wird erst beim ersten Zugriff aufgelöst, damit aus der Cloud
+        nachgeladene Indizes mit ihrem eigenen Embedder abgefragt werden.
+        """
+        if self._embedder is None:
+            if self.manifest_file.exists() or self.index_file.exists():
+                self._embedder = embedder_from_manifest(self.load_manifest())
+            else:
+                self._embedder = get_embedder()
+        return self._embedder
+    
+    @property
+    def embed_model(self) -> str:
+        return self.embedder.model
+    
+    @property
+    def embed_dimensions(self) -> Optional[int]:
+        return self.embedder.dimensions
     
     def process_multiple_sources(self, 
                                 website_url: Optional[str] = None,
@@ -99,8 +216,15 @@ class MultiSourceRAG:
                 st.error("Keine Daten zum Verarbeiten gefunden!")
                 return False
             
+            # Wiederkehrende Chunks (Cookie-Banner, Footer, Kopfzeilen) vor dem Embedding entfernen
+            all_chunks, self.duplicates_dropped = deduplicate_chunks(all_chunks, self.dedup_threshold)
+            if progress_callback and self.duplicates_dropped:
+                progress_callback(f"Duplikate entfernt: {self.duplicates_dropped} Chunks", 0.7)
+            
             # 3. Chunks speichern
             self._save_chunks(all_chunks)
+            if self.checkpoint:
+                self.checkpoint.save_chunks(all_chunks)
             
             if progress_callback:
                 progress_callback("Erstelle Embeddings...", 0.7)
@@ -250,31 +374,13 @@ class MultiSourceRAG:
             if progress_callback:
                 progress_callback(f"Erstelle Embeddings für {len(texts)} Chunks...", 0.75)
             
-            # Embeddings erstellen
-            embeddings = []
-            batch_size = 50
-            
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i+batch_size]
-                
-                for text in batch:
-                    embedding = self._get_embedding(text)
-                    embeddings.append(embedding)
-                
-                if progress_callback:
-                    progress = 0.75 + (i / len(texts)) * 0.2
-                    progress_callback(f"Embedding-Progress: {i+len(batch)}/{len(texts)}", progress)
-            
-            # FAISS-Index erstellen
-            dim = len(embeddings[0])
-            index = faiss.IndexFlatL2(dim)
-            index.add(np.array(embeddings, dtype="float32"))
-            
-            # Index und Metadaten speichern
-            faiss.write_index(index, str(self.index_file))
+            # Embeddings batchweise erstellen (ein API-Call pro Batch)
+            embeddings = self._embed_texts(texts, progress_callback, checkpoint=self.checkpoint)
             
-            with open(self.metadata_file, 'wb') as f:
-                pickle.dump(chunks, f)
+            # Stabile Chunk-IDs vergeben und ID-gemappten Index speichern
+            chunks = self._assign_chunk_ids(chunks, 0)
+            self._persist_index(chunks, embeddings, next_chunk_id=len(chunks),
+                                duplicates_dropped=self.duplicates_dropped)
             
             if progress_callback:
                 progress_callback("Embeddings erfolgreich erstellt!", 0.95)
@@ -285,86 +391,608 @@ class MultiSourceRAG:
             st.error(f"Fehler beim Erstellen der Embeddings: {str(e)}")
             return False
     
-    def _get_embedding(self, text: str) -> List[float]:
-        """Erstellt Embedding für Text"""
-        import time
-        max_retries = 3
-        retry_delay = 1
+    @staticmethod
+    def _assign_chunk_ids(chunks: List[Dict], start_id: int) -> List[Dict]:
+        """Vergibt fortlaufende, nie wiederverwendete Chunk-IDs ab start_id"""
+        return [{**chunk, "chunk_id": start_id + i} for i, chunk in enumerate(chunks)]
+    
+    @staticmethod
+    def _count_sources(chunks: List[Dict]) -> List[Dict]:
+        """Chunk-Anzahl pro Quelle (Reihenfolge des ersten Auftretens)"""
+        counts: Dict[tuple, int] = {}
+        for chunk in chunks:
+            key = source_key(chunk)
+            counts[key] = counts.get(key, 0) + 1
+        return [
+            {"source_type": source_type, "source_name": source_name, "chunks": count}
+            for (source_type, source_name), count in counts.items()
+        ]
+    
+    def _persist_index(self, chunks: List[Dict], vectors: np.ndarray, next_chunk_id: int,
+                       index: Optional[faiss.Index] = None, plan: Optional[Dict] = None, **stats):
+        """
+        Speichert Index, Vektorspeicher, Metadaten, Chunks und Manifest
         
-        for attempt in range(max_retries):
-            try:
-                response = self.embed_client.embeddings.create(
-                    model=self.embed_model,
-                    input=text,
-                    timeout=30  # 30 Sekunden Timeout
-                )
-                return response.data[0].embedding
-            except Exception as e:
-                print(f"Embedding-Fehler (Versuch {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    raise Exception(f"Embedding fehlgeschlagen nach {max_retries} Versuchen: {e}")
+        Ohne übergebenen Index wird er aus den Vektoren neu aufgebaut. Das ist
+        zugleich die Kompaktierung nach Löschungen (kein erneutes Embedding).
+        Ohne Plan wählt plan_index den Index-Typ nach Chunk-Anzahl.
+        
+        Alle Dateien werden per os.replace ersetzt: Worker, die die alte Version
+        gemappt haben, lesen bis zum Neuladen konsistent weiter. Das Chunk-Manifest
+        kommt zuletzt, da die Index-Registry Änderungen an Index und Manifest erkennt.
+        """
+        ids = np.array([chunk["chunk_id"] for chunk in chunks], dtype="int64")
+        plan = plan or plan_index(len(chunks), self.index_type)
+        # Token-Anzahlen einmalig beim Build (Kontext-Budget), bestehende Chunks behalten ihre
+        uncounted = [chunk for chunk in chunks if "token_count" not in chunk]
+        for chunk, tokens in zip(uncounted, count_chunk_tokens([chunk["text"] for chunk in uncounted])):
+            chunk["token_count"] = tokens
+        if plan.get("metric") == "ip":
+            # Gespeicherte Vektoren normiert, damit Updates und Rebuilds dieselben Scores liefern
+            vectors = normalize_vectors(vectors)
+        if index is None:
+            index = build_index(vectors, self.index_quantization, ids=ids, plan=plan)
+        
+        self._replace_file(self.index_file, lambda path: faiss.write_index(index, str(path)))
+        self._replace_file(self.vectors_file, lambda path: self._save_npy(path, vectors.astype("float32", copy=False)))
+        self._replace_file(self.ids_file, lambda path: self._save_npy(path, ids))
+        write_lexical_index(chunks, self.embeddings_dir)
+        write_chunk_columns(chunks, self.embeddings_dir)
+        self._remove_legacy_metadata()
+        self._save_chunks(chunks)
+        
+        self._write_manifest(
+            chunk_count=len(chunks),
+            dimension=int(vectors.shape[1]),
+            quantization=self.index_quantization,
+            index_type=plan["index_type"],
+            index_selection=self.index_type,
+            metric=plan.get("metric", "l2"),
+            search_params=plan["search_params"],
+            id_mapped=True,
+            next_chunk_id=next_chunk_id,
+            sources=self._count_sources(chunks),
+            **stats
+        )
+        get_index_registry().invalidate(self.chatbot_id)
     
-    def load_rag_system(self) -> tuple[faiss.Index, List[Dict]]:
-        """Lädt FAISS-Index und Metadaten für Chatbot"""
-        if not self.index_file.exists() or not self.metadata_file.exists():
-            raise FileNotFoundError(f"RAG-System für Chatbot {self.chatbot_id} nicht gefunden")
+    @staticmethod
+    def _replace_file(path: Path, write):
+        """Schreibt über eine temporäre Datei und ersetzt atomar (nie in gemappte Dateien schreiben)"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def _save_npy(path: Path, array: np.ndarray):
+        # Über ein Dateiobjekt, sonst hängt np.save an ".tmp" noch ".npy" an
+        with open(path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+    
+    def _load_vector_store(self) -> tuple[List[Dict], np.ndarray, Dict]:
+        """
+        Lädt Chunks, Rohvektoren und Manifest für inkrementelle Updates
         
-        index = faiss.read_index(str(self.index_file))
+        Ältere Chatbots ohne Vektorspeicher werden dabei migriert: Die Vektoren
+        werden aus dem Index rekonstruiert und die Chunk-IDs nach Position vergeben.
+        """
+        index, chunks = self.load_rag_system()
+        manifest = self.load_manifest()
+        # Kopien, die residenten Chunks der Registry bleiben unverändert
+        chunks = [dict(chunk) for chunk in chunks]
         
-        with open(self.metadata_file, 'rb') as f:
-            chunks = pickle.load(f)
+        if manifest.get("id_mapped") and self.vectors_file.exists():
+            vectors = np.load(self.vectors_file, mmap_mode="r")
+        else:
+            # Bei ID-gemappten Indizes liegen die Vektoren in Chunk-Reihenfolge im inneren Index
+            base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+            vectors = base.reconstruct_n(0, base.ntotal)
+            if not manifest.get("id_mapped"):
+                chunks = self._assign_chunk_ids(chunks, 0)
+                manifest = {**manifest, "id_mapped": False, "next_chunk_id": len(chunks)}
         
-        return index, chunks
+        return chunks, vectors, manifest
     
-    def retrieve_chunks(self, question: str, top_k: int = 5) -> List[Dict]:
-        """Ruft ähnlichste Chunks für Frage ab"""
-        try:
-            index, chunks = self.load_rag_system()
+    def _upsert_sources(self, new_chunks: List[Dict], remove_keys: set, progress_callback=None) -> Dict:
+        """
+        Entfernt alle Chunks der angegebenen Quellen und fügt neue Chunks hinzu
+        
+        Nur die neuen Chunks werden embedded. Reine Ergänzungen werden direkt in den
+        bestehenden Index eingefügt, nach Löschungen wird der Index kompaktiert.
+        
+        Returns:
+            Dict mit added, removed, duplicates_dropped und total_chunks
+        """
+        with _update_lock(self.chatbot_id, self.embeddings_dir):
+            chunks, vectors, manifest = self._load_vector_store()
+            # Bestehende Chatbots behalten ihr Speicherformat und ihre Index-Auswahl
+            self.index_quantization = manifest.get("quantization") or self.index_quantization
+            self.index_type = manifest.get("index_selection") or self.index_type
+            
+            keep = [i for i, chunk in enumerate(chunks) if source_key(chunk) not in remove_keys]
+            removed = len(chunks) - len(keep)
+            
+            # Neue Chunks, die schon (fast) identisch im Index stehen, nicht erneut embedden
+            new_chunks, dropped = deduplicate_chunks(
+                new_chunks, self.dedup_threshold, existing=[chunks[i] for i in keep]
+            )
+            
+            if not new_chunks and not removed:
+                return {"added": 0, "removed": 0, "duplicates_dropped": dropped, "total_chunks": len(chunks)}
+            if not new_chunks and not keep:
+                raise ValueError("Die letzte Quelle eines Chatbots kann nicht entfernt werden")
+            
+            if progress_callback:
+                progress_callback(f"Erstelle Embeddings für {len(new_chunks)} neue Chunks...", 0.75)
             
-            # Question Embedding
-            question_embedding = self._get_embedding(question)
-            query_vector = np.array([question_embedding], dtype="float32")
+            dim = vectors.shape[1]
+            new_vectors = np.empty((0, dim), dtype="float32")
+            if new_chunks:
+                new_vectors = self._embed_texts([chunk["text"] for chunk in new_chunks], progress_callback)
+                if new_vectors.shape[1] != dim:
+                    raise ValueError(
+                        f"Embedding-Dimension {new_vectors.shape[1]} passt nicht zum Index ({dim})"
+                    )
             
-            # Suche im Index
-            _, indices = index.search(query_vector, top_k)
+            next_chunk_id = manifest["next_chunk_id"]
+            new_chunks = self._assign_chunk_ids(new_chunks, next_chunk_id)
+            all_chunks = [chunks[i] for i in keep] + new_chunks
+            all_vectors = np.vstack([vectors[keep], new_vectors])
             
-            # Relevante Chunks zurückgeben
-            relevant_chunks = [chunks[i] for i in indices[0]]
+            # Wächst der Chatbot über eine Schwelle, wird mit dem neuen Index-Typ neu gebaut
+            plan = plan_index(len(all_chunks), self.index_type)
+            same_type = (plan["index_type"] == manifest.get("index_type", "flat")
+                         and plan["metric"] == manifest.get("metric", "l2"))
+            if same_type and manifest.get("search_params"):
+                # Im Manifest getunte Suchparameter bleiben erhalten
+                plan["search_params"] = manifest["search_params"]
             
-            return relevant_chunks
+            index = None
+            if not removed and same_type and manifest.get("id_mapped"):
+                # Reine Ergänzung: neue Vektoren in den bestehenden Index einfügen
+                index = faiss.read_index(str(self.index_file))
+                if plan["metric"] == "ip":
+                    new_vectors = normalize_vectors(new_vectors)
+                index.add_with_ids(
+                    np.ascontiguousarray(new_vectors, dtype="float32"),
+                    np.array([chunk["chunk_id"] for chunk in new_chunks], dtype="int64")
+                )
+            
+            self._persist_index(all_chunks, all_vectors, next_chunk_id + len(new_chunks), index=index, plan=plan)
             
+            if progress_callback:
+                progress_callback("Index aktualisiert!", 0.95)
+        
+        self._after_index_update()
+        return {"added": len(new_chunks), "removed": removed, "duplicates_dropped": dropped,
+                "total_chunks": len(all_chunks)}
+    
+    def _after_index_update(self):
+        """Hook nach inkrementellen Updates (z.B. Cloud-Sync in Unterklassen)"""
+        pass
+    
+    def add_documents(self, document_chunks: List[Dict], progress_callback=None) -> Dict:
+        """
+        Fügt Dokument-Chunks zu einem bestehenden Chatbot hinzu
+        
+        Bereits vorhandene Chunks derselben Quelle (z.B. erneut hochgeladene
+        Datei) werden ersetzt, alle anderen Chunks bleiben unverändert.
+        """
+        if not document_chunks:
+            raise ValueError("Keine Dokument-Chunks zum Hinzufügen")
+        remove_keys = {source_key(chunk) for chunk in document_chunks}
+        return self._upsert_sources(document_chunks, remove_keys, progress_callback)
+    
+    def remove_source(self, source_type: str, source_name: str) -> int:
+        """
+        Entfernt alle Chunks einer Quelle
+        
+        Returns:
+            Anzahl entfernter Chunks
+        """
+        return self._upsert_sources([], {(source_type, source_name)})["removed"]
+    
+    def replace_website(self, url: str, progress_callback=None) -> Dict:
+        """Scrapt eine Website neu und ersetzt nur deren Chunks"""
+        if progress_callback:
+            progress_callback("Verarbeite Website-Daten...", 0.2)
+        
+        website_chunks = self._process_website(url)
+        if not website_chunks:
+            # Bei fehlgeschlagenem Scraping die alten Chunks behalten
+            raise ValueError(f"Keine Inhalte von {url} extrahiert")
+        
+        remove_keys = {source_key(chunk) for chunk in website_chunks} | {("website", url)}
+        return self._upsert_sources(website_chunks, remove_keys, progress_callback)
+    
+    def list_sources(self) -> List[Dict]:
+        """Quellen des Chatbots mit Chunk-Anzahl"""
+        manifest = self.load_manifest()
+        if "sources" in manifest:
+            return manifest["sources"]
+        _, chunks = self.load_rag_system()
+        return self._count_sources(chunks)
+    
+    def _embed_texts(self, texts: List[str], progress_callback=None,
+                     checkpoint: Optional[BuildCheckpoint] = None) -> np.ndarray:
+        """
+        Erstellt Embeddings für viele Texte
+        
+        Bereits im Build-Checkpoint oder im persistenten Embedding-Cache vorhandene
+        Texte werden übernommen, nur der Rest läuft batchweise über den Embedder.
+        Mit Checkpoint wird jeder fertige Batch sofort auf die Platte geschrieben.
+        
+        Returns:
+            float32-Matrix (len(texts) x dim)
+        """
+        known = checkpoint.load_vectors(len(texts)) if checkpoint else {}
+        if known and progress_callback:
+            progress_callback(f"Checkpoint: {len(known)}/{len(texts)} Chunks bereits embedded", 0.75)
+        
+        cache = get_embedding_cache()
+        namespace = self.embedder.cache_namespace
+        pending = [i for i in range(len(texts)) if i not in known]
+        if cache and pending:
+            cached = cache.get_many(namespace, self.embed_dimensions, [texts[i] for i in pending])
+            known.update((pending[j], vector) for j, vector in cached.items())
+            if cached and progress_callback:
+                progress_callback(f"Embedding-Cache: {len(cached)}/{len(texts)} Chunks bereits vorhanden", 0.75)
+        
+        missing = [i for i in range(len(texts)) if i not in known]
+        missing_texts = [texts[i] for i in missing]
+        
+        def on_progress(done: int, total: int, batch_number: int, batch_total: int):
+            if progress_callback:
+                done_texts = len(known) + done
+                progress = 0.75 + (done_texts / len(texts)) * 0.2
+                progress_callback(
+                    f"Embedding-Progress: {done_texts}/{len(texts)} (Batch {batch_number}/{batch_total})",
+                    progress
+                )
+        
+        def on_batch(start: int, end: int, vectors: np.ndarray):
+            checkpoint.save_batch(np.array(missing[start:end]), vectors)
+        
+        new_vectors = None
+        if missing_texts:
+            new_vectors = self.embedder.embed_many(missing_texts, on_progress, on_batch=on_batch if checkpoint else None)
+        
+        # Matrix einmal allokieren und aus Checkpoint/Cache + neuen Vektoren befüllen
+        dim = new_vectors.shape[1] if new_vectors is not None else len(next(iter(known.values())))
+        embeddings = np.empty((len(texts), dim), dtype="float32")
+        for i, vector in known.items():
+            embeddings[i] = vector
+        if new_vectors is not None:
+            embeddings[missing] = new_vectors
+            if cache:
+                cache.put_many(namespace, self.embed_dimensions, missing_texts, new_vectors)
+        
+        return embeddings
+    
+    def _get_embedding(self, text: str) -> List[float]:
+        """Erstellt Embedding für Text"""
+        return self.embedder.embed([text])[0]
+    
+    def _get_query_embeddings(self, questions: List[str]) -> np.ndarray:
+        """Embeddings von Nutzerfragen über den prozessweiten Query-Cache (fehlende gebündelt)"""
+        cache = get_query_embedding_cache()
+        namespace = self.embedder.cache_namespace
+        vectors = [cache.get(namespace, self.embed_dimensions, question) for question in questions]
+        
+        # Jede normalisierte Frage nur einmal embedden (im Wortlaut ihres ersten Vorkommens)
+        missing: Dict[str, str] = {}
+        for question, vector in zip(questions, vectors):
+            if vector is None:
+                missing.setdefault(normalize_query(question), question)
+        if missing:
+            texts = list(missing.values())
+            embedded = self.embedder.embed(texts) if len(texts) == 1 else self.embedder.embed_many(texts)
+            embedded = dict(zip(missing, embedded))
+            vectors = [
+                vector if vector is not None
+                else cache.put(namespace, self.embed_dimensions, question, embedded[normalize_query(question)])
+                for question, vector in zip(questions, vectors)
+            ]
+        return np.vstack(vectors).astype("float32", copy=False)
+    
+    def _write_manifest(self, **stats):
+        """Schreibt Versions-Manifest des Index (neue Version bei jedem Build)"""
+        manifest = {
+            "version": uuid.uuid4().hex,
+            "built_at": datetime.now().isoformat(),
+            "embed_model": self.embed_model,
+            "embedder": self.embedder.describe(),
+            **stats
+        }
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    
+    def load_manifest(self) -> Dict:
+        """Lädt das Versions-Manifest (leer bei älteren Chatbots ohne Manifest)"""
+        if not self.manifest_file.exists():
+            return {}
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def load_rag_system(self) -> tuple[faiss.Index, List[Dict]]:
+        """Lädt FAISS-Index und Metadaten für Chatbot (resident in der Index-Registry)"""
+        entry = self.load_rag_entry()
+        return entry["index"], entry["chunks"]
+    
+    def load_rag_entry(self) -> Dict:
+        """
+        Residenter Registry-Eintrag (index, chunks, by_id, lexical, metric)
+        
+        Kleine Chatbots kommen bei aktivem Tenant-Pack aus dem gemeinsamen Vektorspeicher,
+        solange sie seit dem Packen nicht neu gebaut wurden.
+        """
+        if TENANT_PACK:
+            entry = get_tenant_pack().get_entry(self.chatbot_id, self.manifest_file)
+            if entry is not None:
+                registry = get_index_registry()
+                if registry.is_resident(self.chatbot_id):
+                    # Eigener Index wird nicht mehr gebraucht
+                    registry.invalidate(self.chatbot_id)
+                return entry
+        try:
+            self.has_chunk_metadata()
+            return get_index_registry().get_entry(self.chatbot_id, self.index_file, self.metadata_file)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"RAG-System für Chatbot {self.chatbot_id} nicht gefunden")
+    
+    def response_version(self, min_score: Optional[float] = None, fallback_response: Optional[str] = None,
+                         context_budget: Optional[int] = None) -> Optional[str]:
+        """
+        Version der Antworten dieses Chatbots für Antwort-Caches
+        (Index-Version aus dem Manifest + Relevanz-Einstellungen), None ohne Index
+        """
+        min_score = RAG_MIN_SCORE if min_score is None else min_score
+        try:
+            index_version = self.load_rag_entry().get("version")
+        except FileNotFoundError:
+            return None
+        return f"{index_version}|{min_score}|{fallback_response}|{context_budget}"
+    
+    def precompute_starter_answers(self, questions: List[str], min_score: Optional[float] = None,
+                                   fallback_response: Optional[str] = None,
+                                   context_budget: Optional[int] = None, progress_callback=None) -> int:
+        """
+        Beantwortet die Startfragen vorab und speichert sie beim Chatbot (starter_answers.json)
+        
+        Die Chunks aller Fragen kommen aus einem gebündelten retrieve_many, danach ein
+        LLM-Aufruf pro Frage. Die Antworten gelten nur für die aktuelle Antwort-Version
+        (Index-Version + Relevanz-Einstellungen) und werden bei Abweichung ignoriert.
+        progress_callback wird vor jeder Frage aufgerufen (Heartbeat laufender Builds).
+        
+        Returns:
+            Anzahl gespeicherter Antworten
+        """
+        min_score = RAG_MIN_SCORE if min_score is None else min_score
+        version = self.response_version(min_score, fallback_response, context_budget)
+        if version is None or not questions:
+            self.starter_answers_file.unlink(missing_ok=True)
+            self._starter_answers = None
+            return 0
+        
+        answers = {}
+        retrieved = self.retrieve_many(questions, top_k=5, min_score=min_score)
+        for number, (question, relevant_chunks) in enumerate(zip(questions, retrieved)):
+            if progress_callback:
+                progress_callback(f"Beantworte Startfragen ({number + 1}/{len(questions)})...",
+                                  0.97 + 0.02 * number / len(questions))
+            if relevant_chunks:
+                answer = self._answer_from_chunks(question, relevant_chunks, context_budget)
+            else:
+                answer = {"response": fallback_response or NO_MATCH_RESPONSE, "sources": [], "fallback": True}
+            # Fehlerantworten (z.B. fehlender API-Key) nicht festschreiben
+            if "fallback" in answer:
+                answers[normalize_query(question)] = {"question": question, **answer}
+        
+        payload = json.dumps({
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "answers": answers
+        }, ensure_ascii=False, indent=2)
+        self._replace_file(self.starter_answers_file, lambda path: path.write_text(payload, encoding='utf-8'))
+        self._starter_answers = None
+        return len(answers)
+    
+    def get_starter_answer(self, query: str, min_score: Optional[float] = None,
+                           fallback_response: Optional[str] = None,
+                           context_budget: Optional[int] = None) -> Optional[Dict]:
+        """Vorberechnete Antwort auf eine Startfrage oder None (unbekannte Frage, veraltete Version)"""
+        try:
+            mtime = self.starter_answers_file.stat().st_mtime_ns
+        except OSError:
+            return None
+        if self._starter_answers is None or self._starter_answers[0] != mtime:
+            try:
+                with open(self.starter_answers_file, 'r', encoding='utf-8') as f:
+                    self._starter_answers = (mtime, json.load(f))
+            except (OSError, ValueError):
+                return None
+        
+        stored = self._starter_answers[1]
+        answer = stored.get("answers", {}).get(normalize_query(query))
+        if answer is None:
+            return None
+        min_score = RAG_MIN_SCORE if min_score is None else min_score
+        if stored.get("version") != self.response_version(min_score, fallback_response, context_budget):
+            return None
+        return answer
+    
+    def has_chunk_metadata(self) -> bool:
+        """
+        True wenn Chunk-Metadaten im Spaltenformat vorliegen
+        Ältere Chatbots mit meta.pkl werden dabei einmalig migriert.
+        """
+        if self.metadata_file.exists():
+            return True
+        if not self.legacy_metadata_file.exists():
+            return False
+        with open(self.legacy_metadata_file, 'rb') as f:
+            chunks = pickle.load(f)
+        write_chunk_columns(chunks, self.embeddings_dir)
+        self._remove_legacy_metadata()
+        self._after_metadata_migration()
+        return True
+    
+    def _after_metadata_migration(self):
+        """Hook nach der Migration ins Spaltenformat (z.B. Cloud-Sync in Unterklassen)"""
+        pass
+    
+    def _remove_legacy_metadata(self):
+        """Entfernt meta.pkl und die gepagten JSON-Lines-Metadaten älterer Versionen"""
+        for name in ("meta.pkl", "meta.jsonl", "meta.offsets.npy"):
+            (self.embeddings_dir / name).unlink(missing_ok=True)
+    
+    def retrieve_chunks(self, question: str, top_k: int = 5, min_score: Optional[float] = None) -> List[Dict]:
+        """
+        Ruft ähnlichste Chunks für Frage ab
+        
+        Mit BM25-Index hybrid: Vektor- und lexikalische Treffer werden per Reciprocal
+        Rank Fusion kombiniert. Ein eindeutiger lexikalischer Treffer (z.B. Produktcode)
+        wird ohne Embedding-Aufruf beantwortet.
+        
+        Jeder Chunk enthält "score" (Kosinus-Ähnlichkeit, None bei rein lexikalischen
+        Treffern) und "match" (vector | lexical | hybrid). Mit min_score werden weniger
+        relevante Vektor-Treffer verworfen, lexikalische brauchen LEXICAL_MIN_COVERAGE.
+        """
+        try:
+            return self.retrieve_many([question], top_k=top_k, min_score=min_score)[0]
         except Exception as e:
             st.error(f"Fehler beim Abrufen der Chunks: {str(e)}")
             return []
     
+    def retrieve_many(self, questions: List[str], top_k: int = 5, min_score: Optional[float] = None) -> List[List[Dict]]:
+        """
+        Ruft Chunks für viele Fragen auf einmal ab (Evaluierung, FAQ, Bulk-QA)
+        
+        Fragen ohne eindeutigen lexikalischen Treffer werden gebündelt embedded und mit
+        einer einzigen FAISS-Suche über die Query-Matrix beantwortet. Das Ergebnis pro
+        Frage entspricht retrieve_chunks.
+        
+        Raises:
+            FileNotFoundError: Wenn der Chatbot keinen Index hat
+        """
+        entry = self.load_rag_entry()
+        lexical_passes = [self._lexical_pass(entry, question, top_k) for question in questions]
+        return self._complete_retrieval(entry, questions, lexical_passes, top_k, min_score)
+    
+    @staticmethod
+    def _lexical_pass(entry: Dict, question: str, top_k: int) -> tuple:
+        """
+        BM25-Teil des Retrievals (ohne Embedding)
+        
+        Returns:
+            (fertige Treffer bei eindeutigem lexikalischem Treffer oder None,
+             lexikalische Kandidaten für die Fusion)
+        """
+        lexical = entry.get("lexical") if LEXICAL_SEARCH else None
+        if lexical is None:
+            return None, []
+        chunks = entry["chunks"]
+        hits = lexical.search(question, top_k=max(top_k * 4, 20))
+        if LEXICAL_FAST_PATH and lexical.is_confident(question, hits):
+            return [
+                {**chunks[position], "score": None, "lexical_score": bm25, "match": "lexical"}
+                for position, bm25, coverage in hits[:top_k] if coverage >= LEXICAL_MIN_COVERAGE
+            ], []
+        return None, [hit for hit in hits if hit[2] >= LEXICAL_MIN_COVERAGE]
+    
+    def _complete_retrieval(self, entry: Dict, questions: List[str], lexical_passes: List[tuple],
+                            top_k: int, min_score: Optional[float]) -> List[List[Dict]]:
+        """Vektorsuche für alle Fragen ohne lexikalischen Fast Path, gebündelt in einer FAISS-Suche"""
+        chunks = entry["chunks"]
+        candidates = max(top_k * 4, 20)
+        results: List[Optional[List[Dict]]] = [fast for fast, _ in lexical_passes]
+        lexical_hits: List[List[tuple]] = [hits for _, hits in lexical_passes]
+        pending = [i for i, result in enumerate(results) if result is None]
+        
+        if pending:
+            query_vectors = self._get_query_embeddings([questions[i] for i in pending])
+            if entry["metric"] == "ip":
+                query_vectors = normalize_vectors(query_vectors)
+            
+            # Eine Suche über alle offenen Fragen
+            k = candidates if any(lexical_hits[i] for i in pending) else top_k
+            distances, indices = entry["index"].search(query_vectors, k)
+            scores = similarity_scores(distances, entry["metric"])
+            
+            for row, i in enumerate(pending):
+                vector_hits = self._collect_vector_hits(entry, indices[row], scores[row], min_score)
+                results[i] = self._fuse_hits(chunks, vector_hits, lexical_hits[i], top_k)
+        
+        return results
+    
+    @staticmethod
+    def _collect_vector_hits(entry: Dict, labels: np.ndarray, scores: np.ndarray,
+                             min_score: Optional[float]) -> List[tuple]:
+        """
+        Treffer einer FAISS-Ergebniszeile (ohne Chunks zu dekodieren)
+        
+        Returns:
+            Liste von (Chunk-Position, Kosinus-Ähnlichkeit), absteigend nach Ähnlichkeit
+        """
+        chunks = entry["chunks"]
+        id_mapped = entry["by_id"] is not None
+        # ID-gemappte Indizes liefern Chunk-IDs, -1 = kein Treffer
+        hits = []
+        for key, score in zip(labels, scores):
+            if key < 0 or (min_score is not None and score < min_score):
+                continue
+            position = chunks.position_of(int(key)) if id_mapped else int(key)
+            if position is not None:
+                hits.append((position, float(score)))
+        return hits
+    
+    @staticmethod
+    def _fuse_hits(chunks, vector_hits: List[tuple], lexical_hits: List[tuple], top_k: int) -> List[Dict]:
+        """
+        Kombiniert Vektor- und lexikalische Treffer per Reciprocal Rank Fusion
+        Dicts entstehen nur für die Top-k-Treffer (Kopien, die residenten Chunks bleiben unverändert).
+        """
+        if not lexical_hits:
+            return [{**chunks[position], "score": score, "match": "vector"} for position, score in vector_hits[:top_k]]
+        
+        # Schlüssel: Chunk-Position
+        vector_scores = dict(vector_hits)
+        lexical_scores = {position: bm25 for position, bm25, _ in lexical_hits}
+        fused = reciprocal_rank_fusion([position for position, _ in vector_hits], list(lexical_scores))
+        ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        
+        results = []
+        for position in ranked:
+            chunk = {**chunks[position], "score": vector_scores.get(position)}
+            if position in lexical_scores:
+                chunk["lexical_score"] = lexical_scores[position]
+                chunk["match"] = "hybrid" if position in vector_scores else "lexical"
+            else:
+                chunk["match"] = "vector"
+            chunk["rrf_score"] = fused[position]
+            results.append(chunk)
+        return results
+    
     def get_chatbot_info(self) -> Dict:
-        """Gibt Informationen über den Chatbot zurück"""
+        """Gibt Informationen über den Chatbot zurück (nur aus dem Chunk-Manifest)"""
         try:
-            if not self.metadata_file.exists():
+            if not self.has_chunk_metadata():
                 return {}
             
-            with open(self.metadata_file, 'rb') as f:
-                chunks = pickle.load(f)
+            chunk_manifest = read_chunk_manifest(self.embeddings_dir)
+            if chunk_manifest is None:
+                return {}
             
-            # Analysiere Quellen
+            # Quellen aus der vorberechneten Quellen-Tabelle
             sources = {}
-            for chunk in chunks:
-                source_type = chunk.get("source_type", "unknown")
-                source_name = chunk.get("source_name", "unknown")
-                
-                if source_type not in sources:
-                    sources[source_type] = {}
-                
-                if source_name not in sources[source_type]:
-                    sources[source_type][source_name] = 0
-                
-                sources[source_type][source_name] += 1
+            for source in chunk_manifest["sources"]:
+                source_type = source["source_type"] or "unknown"
+                source_name = source["source_name"] or "unknown"
+                sources.setdefault(source_type, {})
+                sources[source_type][source_name] = sources[source_type].get(source_name, 0) + source["chunks"]
             
             return {
-                "total_chunks": len(chunks),
+                "total_chunks": chunk_manifest["chunk_count"],
                 "sources": sources,
                 "created_at": self.chatbot_dir.stat().st_mtime if self.chatbot_dir.exists() else None
             }
@@ -372,43 +1000,196 @@ class MultiSourceRAG:
         except Exception as e:
             return {"error": str(e)}
     
-    def get_response(self, query: str, conversation_id: Optional[str] = None) -> Dict:
-        """Generiert Antwort auf Benutzeranfrage mit RAG"""
+    def get_response(self, query: str, conversation_id: Optional[str] = None,
+                     min_score: Optional[float] = None, fallback_response: Optional[str] = None,
+                     context_budget: Optional[int] = None) -> Dict:
+        """
+        Generiert Antwort auf Benutzeranfrage mit RAG
+        
+        Erreicht kein Chunk min_score (Standard: RAG_MIN_SCORE), wird ohne LLM-Aufruf
+        die Fallback-Antwort zurückgegeben ("fallback": True). Paraphrasen bereits
+        beantworteter Fragen kommen aus dem semantischen Antwort-Cache ("cached": "semantic"),
+        Startfragen aus den beim Build vorberechneten Antworten ("cached": "starter").
+        Der Kontext im Prompt ist auf context_budget Tokens begrenzt (Standard: CONTEXT_TOKEN_BUDGET).
+        """
         try:
-            # Hole relevante Chunks
-            relevant_chunks = self.retrieve_chunks(query, top_k=5)
+            answer, relevant_chunks, remember = self._prepare_response(query, min_score, fallback_response,
+                                                                       context_budget)
+            if answer is None:
+                answer = self._answer_from_chunks(query, relevant_chunks, context_budget)
+                remember(answer)
+            return {**answer, "conversation_id": conversation_id or str(uuid.uuid4())}
             
-            if not relevant_chunks:
-                return {
-                    "response": "Entschuldigung, ich konnte keine relevanten Informationen zu Ihrer Frage finden.",
-                    "sources": [],
-                    "conversation_id": conversation_id or str(uuid.uuid4())
-                }
-            
-            # Erstelle Kontext aus Chunks
-            context = "\n\n".join([
-                f"Quelle: {chunk.get('source_name', 'Unbekannt')}\n{chunk['text']}"
-                for chunk in relevant_chunks
-            ])
-            
-            # LLM-Aufruf mit OpenRouter
-            router_api_key = os.getenv("OPENROUTER_API_KEY")
-            if not router_api_key:
-                return {
-                    "response": "Fehler: OpenRouter API-Key nicht konfiguriert.",
-                    "sources": [],
-                    "conversation_id": conversation_id or str(uuid.uuid4())
-                }
-            
-            router_client = OpenAI(
-                api_key=router_api_key,
-                base_url="https://openrouter.ai/api/v1"
+        except Exception as e:
+            return {
+                "response": f"Entschuldigung, es ist ein Fehler aufgetreten: {str(e)}",
+                "sources": [],
+                "conversation_id": conversation_id or str(uuid.uuid4())
+            }
+    
+    async def aget_response(self, query: str, conversation_id: Optional[str] = None,
+                            min_score: Optional[float] = None, fallback_response: Optional[str] = None,
+                            context_budget: Optional[int] = None) -> Dict:
+        """
+        Asynchrone Variante von get_response für die Chat-Endpoints
+        
+        Startfragen, Caches, Query-Embedding und FAISS-Suche laufen im begrenzten
+        Chat-Executor, der LLM-Aufruf über den asynchronen OpenRouter-Client. Der
+        Event-Loop bleibt während der gesamten Antwort frei.
+        """
+        try:
+            answer, relevant_chunks, remember = await run_blocking(
+                self._prepare_response, query, min_score, fallback_response, context_budget
             )
+            if answer is None:
+                answer = await self._aanswer_from_chunks(query, relevant_chunks, context_budget)
+                remember(answer)
+            return {**answer, "conversation_id": conversation_id or str(uuid.uuid4())}
             
-            messages = [
-                {
-                    "role": "system",
-                    "content": f"""Du bist ein hilfsreicher Assistent. Beantworte die Frage basierend auf dem gegebenen Kontext.
+        except Exception as e:
+            return {
+                "response": f"Entschuldigung, es ist ein Fehler aufgetreten: {str(e)}",
+                "sources": [],
+                "conversation_id": conversation_id or str(uuid.uuid4())
+            }
+    
+    async def astream_response(self, query: str, conversation_id: Optional[str] = None,
+                               min_score: Optional[float] = None, fallback_response: Optional[str] = None,
+                               context_budget: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        Wie aget_response, liefert die LLM-Antwort aber Token für Token
+        
+        Events:
+            {"event": "token", "data": {"content": ...}} pro empfangenem Textstück
+            {"event": "done", "data": ...} zuletzt, mit der vollständigen Antwort wie aget_response
+        
+        Antworten ohne LLM-Aufruf (Fallback, Caches, Startfragen) kommen als ein einziges
+        token-Event. Bei einem Fehler mitten im Stream enthält "done" die Fehlerantwort.
+        """
+        conversation_id = conversation_id or str(uuid.uuid4())
+        try:
+            answer, relevant_chunks, remember = await run_blocking(
+                self._prepare_response, query, min_score, fallback_response, context_budget
+            )
+            if answer is None:
+                messages, sources = self._llm_request(query, relevant_chunks, context_budget)
+                router_client = self._async_router_client()
+                if router_client is None:
+                    answer = {"response": MISSING_ROUTER_KEY_RESPONSE, "sources": []}
+                    yield {"event": "token", "data": {"content": answer["response"]}}
+                else:
+                    parts = []
+                    stream = await router_client.chat.completions.create(**self._completion_params(messages),
+                                                                         stream=True)
+                    try:
+                        async for chunk in stream:
+                            content = chunk.choices[0].delta.content if chunk.choices else None
+                            if content:
+                                parts.append(content)
+                                yield {"event": "token", "data": {"content": content}}
+                    finally:
+                        # Verbindung auch bei Abbruch durch den Client an den Pool zurückgeben
+                        await stream.response.aclose()
+                    answer = self._llm_answer("".join(parts), sources)
+                    remember(answer)
+            else:
+                yield {"event": "token", "data": {"content": answer["response"]}}
+        except Exception as e:
+            answer = {"response": f"Entschuldigung, es ist ein Fehler aufgetreten: {str(e)}", "sources": []}
+            yield {"event": "token", "data": {"content": answer["response"]}}
+        
+        yield {"event": "done", "data": {**answer, "conversation_id": conversation_id}}
+    
+    def _prepare_response(self, query: str, min_score: Optional[float], fallback_response: Optional[str],
+                          context_budget: Optional[int]) -> tuple:
+        """
+        Alles vor dem LLM-Aufruf: Startfragen, semantischer Antwort-Cache, Retrieval, Fallback
+        
+        Returns:
+            (fertige Antwort ohne conversation_id oder None, relevante Chunks,
+             Funktion, die eine neue LLM-Antwort im semantischen Cache ablegt)
+        """
+        min_score = RAG_MIN_SCORE if min_score is None else min_score
+        
+        # Startfragen: vorberechnete Antwort ohne Embedding, Retrieval und LLM
+        starter = self.get_starter_answer(query, min_score, fallback_response, context_budget)
+        if starter is not None:
+            return {
+                "response": starter["response"],
+                "sources": [dict(source) for source in starter["sources"]],
+                "fallback": starter["fallback"],
+                "cached": "starter"
+            }, [], None
+        
+        try:
+            entry = self.load_rag_entry()
+            lexical_pass = self._lexical_pass(entry, query, top_k=5)
+        except Exception as e:
+            st.error(f"Fehler beim Abrufen der Chunks: {str(e)}")
+            entry, lexical_pass = None, (None, [])
+        
+        # Semantischer Antwort-Cache: gilt nur für dieselbe Index-Version und dieselben Einstellungen.
+        # Eindeutige lexikalische Treffer kommen ohne Embedding aus und übergehen ihn daher.
+        answer_cache = get_answer_cache() if entry is not None and lexical_pass[0] is None else None
+        cache_version = self.response_version(min_score, fallback_response, context_budget) if answer_cache else None
+        query_vector = None
+        if cache_version is None:
+            answer_cache = None
+        if answer_cache is not None:
+            query_vector = self._get_query_embeddings([query])[0]
+            cached = answer_cache.get(self.chatbot_id, cache_version, query_vector)
+            if cached is not None:
+                return {
+                    "response": cached["response"],
+                    "sources": [dict(source) for source in cached["sources"]],
+                    "fallback": False,
+                    "cached": "semantic"
+                }, [], None
+        
+        def remember(answer: Dict):
+            if answer_cache is not None and not answer.get("fallback", True):
+                answer_cache.put(self.chatbot_id, cache_version, query_vector,
+                                 {"response": answer["response"],
+                                  "sources": [dict(source) for source in answer["sources"]]})
+        
+        # Hole relevante Chunks (der Frage-Vektor kommt dabei aus dem Query-Cache)
+        relevant_chunks = []
+        if entry is not None:
+            try:
+                relevant_chunks = self._complete_retrieval(entry, [query], [lexical_pass], 5, min_score)[0]
+            except Exception as e:
+                st.error(f"Fehler beim Abrufen der Chunks: {str(e)}")
+        
+        if not relevant_chunks:
+            return {
+                "response": fallback_response or NO_MATCH_RESPONSE,
+                "sources": [],
+                "fallback": True
+            }, [], None
+        
+        return None, relevant_chunks, remember
+    
+    def _llm_request(self, query: str, relevant_chunks: List[Dict],
+                     context_budget: Optional[int] = None) -> tuple[List[Dict], List[Dict]]:
+        """
+        Prompt-Nachrichten und Frontend-Quellen zu den abgerufenen Chunks
+        
+        Returns:
+            (messages, sources)
+        """
+        # Kontext bis zum Token-Budget packen (Duplikate und Überlappungen entfernt)
+        relevant_chunks = pack_context(relevant_chunks, context_budget)
+        
+        # Erstelle Kontext aus Chunks
+        context = "\n\n".join([
+            f"Quelle: {chunk.get('source_name', 'Unbekannt')}\n{chunk['text']}"
+            for chunk in relevant_chunks
+        ])
+        
+        messages = [
+            {
+                "role": "system",
+                "content": f"""Du bist ein hilfsreicher Assistent. Beantworte die Frage basierend auf dem gegebenen Kontext.
                     
 Kontext:
 {context}
@@ -418,45 +1199,83 @@ Anweisungen:
 - Wenn die Information nicht im Kontext steht, sage das ehrlich
 - Bleibe freundlich und professionell
 - Antworte auf Deutsch"""
-                },
-                {
-                    "role": "user", 
-                    "content": query
-                }
-            ]
-            
-            response = router_client.chat.completions.create(
-                model="mistralai/mistral-small-3.2-24b-instruct:free",
-                messages=messages,
-                temperature=0.2,
-                max_tokens=512
-            )
-            
-            answer = response.choices[0].message.content.strip()
-            
-            # Bereite Quellen für Frontend auf
-            sources = [
-                {
-                    "title": chunk.get("source_name", "Unbekannte Quelle"),
-                    "type": chunk.get("source_type", "unknown"),
-                    "url": chunk.get("source_url", ""),
-                    "snippet": chunk["text"][:200] + "..." if len(chunk["text"]) > 200 else chunk["text"]
-                }
-                for chunk in relevant_chunks
-            ]
-            
-            return {
-                "response": answer,
-                "sources": sources,
-                "conversation_id": conversation_id or str(uuid.uuid4())
+            },
+            {
+                "role": "user", 
+                "content": query
             }
-            
-        except Exception as e:
-            return {
-                "response": f"Entschuldigung, es ist ein Fehler aufgetreten: {str(e)}",
-                "sources": [],
-                "conversation_id": conversation_id or str(uuid.uuid4())
+        ]
+        
+        # Bereite Quellen für Frontend auf
+        sources = [
+            {
+                "title": chunk.get("source_name", "Unbekannte Quelle"),
+                "type": chunk.get("source_type", "unknown"),
+                "url": chunk.get("source_url", ""),
+                "snippet": chunk["text"][:200] + "..." if len(chunk["text"]) > 200 else chunk["text"],
+                "score": round(chunk["score"], 4) if chunk["score"] is not None else None
             }
+            for chunk in relevant_chunks
+        ]
+        return messages, sources
+    
+    @staticmethod
+    def _router_client() -> Optional[OpenAI]:
+        """Geteilter OpenRouter-Client (Verbindungs-Pool, Keep-Alive) oder None ohne API-Key"""
+        return get_client_registry().openrouter()
+    
+    @staticmethod
+    def _async_router_client() -> Optional[AsyncOpenAI]:
+        """Geteilter asynchroner OpenRouter-Client oder None ohne API-Key"""
+        return get_client_registry().async_openrouter()
+    
+    @staticmethod
+    def _completion_params(messages: List[Dict]) -> Dict:
+        """Parameter des LLM-Aufrufs (gleich für alle Antwortpfade)"""
+        return {
+            "model": LLM_MODEL,
+            "messages": messages,
+            "temperature": 0.2,
+            "max_tokens": 512
+        }
+    
+    @staticmethod
+    def _llm_answer(content: str, sources: List[Dict]) -> Dict:
+        return {
+            "response": content.strip(),
+            "sources": sources,
+            "fallback": False
+        }
+    
+    def _answer_from_chunks(self, query: str, relevant_chunks: List[Dict],
+                            context_budget: Optional[int] = None) -> Dict:
+        """
+        LLM-Antwort aus abgerufenen Chunks (ohne conversation_id)
+        
+        Returns:
+            Dict mit response, sources und fallback (ohne "fallback" bei Konfigurationsfehlern)
+        """
+        messages, sources = self._llm_request(query, relevant_chunks, context_budget)
+        
+        # LLM-Aufruf mit OpenRouter
+        router_client = self._router_client()
+        if router_client is None:
+            return {"response": MISSING_ROUTER_KEY_RESPONSE, "sources": []}
+        
+        response = router_client.chat.completions.create(**self._completion_params(messages))
+        return self._llm_answer(response.choices[0].message.content, sources)
+    
+    async def _aanswer_from_chunks(self, query: str, relevant_chunks: List[Dict],
+                                   context_budget: Optional[int] = None) -> Dict:
+        """Asynchrone Variante von _answer_from_chunks"""
+        messages, sources = self._llm_request(query, relevant_chunks, context_budget)
+        
+        router_client = self._async_router_client()
+        if router_client is None:
+            return {"response": MISSING_ROUTER_KEY_RESPONSE, "sources": []}
+        
+        response = await router_client.chat.completions.create(**self._completion_params(messages))
+        return self._llm_answer(response.choices[0].message.content, sources)
 
 def create_chatbot_id() -> str:
     """Erstellt eine eindeutige Chatbot-ID"""
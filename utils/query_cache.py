@@ -0,0 +1,99 @@
+# platform/utils/query_cache.py
+
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "10000"))
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", "86400"))
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+def normalize_query(query: str) -> str:
+    """Normalisiert eine Nutzerfrage für Cache-Schlüssel (Unicode, Groß-/Kleinschreibung, Whitespace)"""
+    query = unicodedata.normalize("NFKC", query).lower().strip()
+    query = _WHITESPACE.sub(" ", query)
+    return _TRAILING_PUNCTUATION.sub("", query)
+
+class QueryEmbeddingCache:
+    """
+    Begrenzter LRU-Cache mit TTL für Query-Embeddings
+    Schlüssel ist (Modell, Dimensionen, normalisierte Frage), damit sich
+    Chatbots mit unterschiedlichen Embedding-Modellen nicht vermischen.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, ttl_seconds: int = QUERY_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(model: str, dimensions: Optional[int], query: str) -> Tuple:
+        return (model, dimensions or 0, normalize_query(query))
+
+    def get(self, model: str, dimensions: Optional[int], query: str) -> Optional[np.ndarray]:
+        key = self._key(model, dimensions, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, vector = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, model: str, dimensions: Optional[int], query: str, vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype="float32")
+        key = self._key(model, dimensions, query)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+# Globale Cache-Instanz
+query_embedding_cache = None
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """
+    Singleton Pattern für den Query-Embedding-Cache
+
+    Returns:
+        QueryEmbeddingCache Instance
+    """
+    global query_embedding_cache
+    if query_embedding_cache is None:
+        query_embedding_cache = QueryEmbeddingCache()
+    return query_embedding_cache
@@ -0,0 +1,186 @@
+# platform/utils/response_cache.py
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .query_cache import normalize_query
+from .chat_executor import run_blocking
+
+load_dotenv()
+
+# Exakter Antwort-Cache vor den Chat-Endpoints (normalisierte Frage + Chatbot + Version)
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+class ResponseCache:
+    """
+    Begrenzter LRU-Cache mit TTL für komplette Chat-Antworten
+    Ein Treffer spart Embedding, Suche und LLM-Aufruf. Die Version (Index-Version +
+    Relevanz-Einstellungen) ist Teil des Schlüssels, veraltete Einträge werden nie
+    getroffen und fallen per LRU heraus.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._bot_stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _key(chatbot_id: str, version: str, query: str) -> Tuple:
+        return (chatbot_id, version, normalize_query(query))
+
+    def _count(self, chatbot_id: str, outcome: str):
+        bot_stats = self._bot_stats.setdefault(chatbot_id, {"hits": 0, "misses": 0})
+        bot_stats[outcome] += 1
+
+    def get(self, chatbot_id: str, version: str, query: str) -> Optional[Dict]:
+        key = self._key(chatbot_id, version, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, response = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self._count(chatbot_id, "hits")
+                    return response
+                del self._entries[key]
+            self.misses += 1
+            self._count(chatbot_id, "misses")
+            return None
+
+    def put(self, chatbot_id: str, version: str, query: str, response: Dict):
+        key = self._key(chatbot_id, version, query)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self, chatbot_id: Optional[str] = None) -> Dict:
+        """Trefferquoten gesamt (oder für einen Chatbot) zum Dimensionieren des Caches"""
+        if chatbot_id is not None:
+            bot_stats = self._bot_stats.get(chatbot_id, {"hits": 0, "misses": 0})
+            hits, misses = bot_stats["hits"], bot_stats["misses"]
+        else:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0
+        }
+
+# Globale Cache-Instanz
+response_cache = None
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Singleton Pattern für den exakten Antwort-Cache
+
+    Returns:
+        ResponseCache Instance oder None, wenn deaktiviert
+    """
+    global response_cache
+    if response_cache is None and RESPONSE_CACHE:
+        response_cache = ResponseCache()
+    return response_cache
+
+def _cache_lookup(rag_system, query: str, conversation_id: Optional[str],
+                  version: Optional[str]) -> Optional[Dict]:
+    """Treffer im Exact-Match-Cache (mit frischer Conversation-ID) oder None"""
+    if version is None:
+        return None
+    cached = get_response_cache().get(rag_system.chatbot_id, version, query)
+    if cached is None:
+        return None
+    return {
+        **cached,
+        "sources": [dict(source) for source in cached.get("sources", [])],
+        "conversation_id": conversation_id or str(uuid.uuid4()),
+        "cached": "exact"
+    }
+
+def _cache_store(rag_system, query: str, version: Optional[str], response_data: Dict):
+    """Legt reguläre Antworten und Fallbacks ab, keine Fehlerantworten"""
+    if version is not None and "fallback" in response_data:
+        get_response_cache().put(rag_system.chatbot_id, version, query, {
+            **response_data,
+            "sources": [dict(source) for source in response_data.get("sources", [])]
+        })
+
+def _cache_version(rag_system, min_score: Optional[float], fallback_response: Optional[str],
+                   context_budget: Optional[int]) -> Optional[str]:
+    if get_response_cache() is None:
+        return None
+    return rag_system.response_version(min_score, fallback_response, context_budget)
+
+async def aget_cached_response(rag_system, query: str, conversation_id: Optional[str] = None,
+                               min_score: Optional[float] = None, fallback_response: Optional[str] = None,
+                               context_budget: Optional[int] = None) -> Dict:
+    """
+    rag_system.aget_response mit vorgeschaltetem Exact-Match-Cache
+
+    Gecacht werden nur reguläre Antworten und Fallbacks, keine Fehlerantworten.
+    Treffer tragen "cached": "exact" und die übergebene Conversation-ID. Die Version
+    (lädt beim ersten Zugriff den Index) wird im Chat-Executor bestimmt.
+    """
+    version = await run_blocking(_cache_version, rag_system, min_score, fallback_response, context_budget)
+    cached = _cache_lookup(rag_system, query, conversation_id, version)
+    if cached is not None:
+        return cached
+
+    response_data = await rag_system.aget_response(
+        query=query,
+        conversation_id=conversation_id,
+        min_score=min_score,
+        fallback_response=fallback_response,
+        context_budget=context_budget
+    )
+    _cache_store(rag_system, query, version, response_data)
+    return response_data
+
+async def astream_cached_response(rag_system, query: str, conversation_id: Optional[str] = None,
+                                  min_score: Optional[float] = None, fallback_response: Optional[str] = None,
+                                  context_budget: Optional[int] = None) -> AsyncIterator[Dict]:
+    """
+    rag_system.astream_response mit vorgeschaltetem Exact-Match-Cache
+
+    Ein Treffer kommt als ein token-Event plus "done". Die vollständige Antwort aus
+    dem "done"-Event wird wie bei aget_cached_response abgelegt.
+    """
+    version = await run_blocking(_cache_version, rag_system, min_score, fallback_response, context_budget)
+    cached = _cache_lookup(rag_system, query, conversation_id, version)
+    if cached is not None:
+        yield {"event": "token", "data": {"content": cached["response"]}}
+        yield {"event": "done", "data": cached}
+        return
+
+    async for event in rag_system.astream_response(
+        query=query,
+        conversation_id=conversation_id,
+        min_score=min_score,
+        fallback_response=fallback_response,
+        context_budget=context_budget
+    ):
+        if event["event"] == "done":
+            _cache_store(rag_system, query, version, event["data"])
+        yield event
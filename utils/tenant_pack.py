@@ -0,0 +1,282 @@
+# platform/utils/tenant_pack.py
+
+import os
+import json
+import uuid
+import shutil
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from collections.abc import Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .chunk_columns import ColumnarChunks, CHUNK_MANIFEST_FILE, write_chunk_columns
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Kleine Chatbots aus einem gemeinsamen, gepackten Vektorspeicher bedienen (siehe pack_tenants.py)
+TENANT_PACK = os.getenv("TENANT_PACK", "false").lower() == "true"
+TENANT_PACK_DIR = Path(os.getenv("TENANT_PACK_DIR", "data/tenant_pack"))
+# Nur Chatbots bis zu dieser Chunk-Anzahl werden gepackt, größere behalten ihren eigenen Index
+TENANT_PACK_MAX_CHUNKS = int(os.getenv("TENANT_PACK_MAX_CHUNKS", "200"))
+
+# Zeigt auf das aktuelle Build-Verzeichnis (atomar ersetzt, alte Builds bleiben bis zum Aufräumen lesbar)
+CURRENT_FILE = "CURRENT"
+TENANTS_FILE = "tenants.json"
+
+def _manifest_signature(manifest_file: Path) -> Optional[List[int]]:
+    try:
+        stat = os.stat(manifest_file)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def build_tenant_pack(chatbots_dir: Path = Path("data/chatbots"),
+                      pack_dir: Path = TENANT_PACK_DIR,
+                      max_chunks: int = TENANT_PACK_MAX_CHUNKS) -> Dict:
+    """
+    Packt alle kleinen Chatbots in je eine Matrix pro Embedding-Dimension
+
+    Layout pro Dimension (<pack_dir>/<build>/d<dim>/):
+        vectors.npy       normierte float32-Vektoren aller Mandanten, zusammenhängend pro Mandant
+        tenant_ids.npy    Mandanten-Nummer pro Zeile
+        chunks.*          Chunk-Metadaten aller Mandanten im Spaltenformat (gleiche Zeilenreihenfolge)
+    Dazu tenants.json mit Zeilenbereich, Dimension und Manifest-Signatur pro Chatbot.
+
+    Gepackt werden nur ID-gemappte Chatbots mit normierten Vektoren (Metrik ip).
+
+    Returns:
+        Statistik (tenants, rows, skipped)
+    """
+    chatbots_dir = Path(chatbots_dir)
+    pack_dir = Path(pack_dir)
+    build_dir = pack_dir / f"build-{uuid.uuid4().hex[:12]}"
+    build_dir.mkdir(parents=True, exist_ok=True)
+
+    groups: Dict[int, List[Tuple[str, Path, Dict]]] = {}
+    skipped = 0
+    for chatbot_dir in sorted(chatbots_dir.iterdir()) if chatbots_dir.exists() else []:
+        embeddings_dir = chatbot_dir / "embeddings"
+        manifest_file = embeddings_dir / "manifest.json"
+        required = [manifest_file, embeddings_dir / "vectors.npy", embeddings_dir / CHUNK_MANIFEST_FILE]
+        if not all(path.exists() for path in required):
+            continue
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if (manifest.get("metric") != "ip" or not manifest.get("id_mapped")
+                or manifest.get("chunk_count", max_chunks + 1) > max_chunks):
+            skipped += 1
+            continue
+        groups.setdefault(int(manifest["dimension"]), []).append((chatbot_dir.name, embeddings_dir, manifest))
+
+    tenants: Dict[str, Dict] = {}
+    rows = 0
+    for dim, members in groups.items():
+        group_dir = build_dir / f"d{dim}"
+        group_dir.mkdir()
+        vectors, tenant_ids, chunks = [], [], []
+        start = 0
+        for tenant, (chatbot_id, embeddings_dir, manifest) in enumerate(members):
+            signature = _manifest_signature(embeddings_dir / "manifest.json")
+            tenant_vectors = np.load(embeddings_dir / "vectors.npy")
+            try:
+                tenant_chunks = list(ColumnarChunks(embeddings_dir))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Chatbot {chatbot_id} nicht gepackt: {e}")
+                continue
+            if len(tenant_chunks) != len(tenant_vectors):
+                logger.warning(f"⚠️ Chatbot {chatbot_id} nicht gepackt: Metadaten passen nicht zu den Vektoren")
+                continue
+
+            count = len(tenant_vectors)
+            vectors.append(tenant_vectors.astype("float32", copy=False))
+            tenant_ids.append(np.full(count, tenant, dtype="int32"))
+            chunks.extend(tenant_chunks)
+            tenants[chatbot_id] = {
+                "group": group_dir.name,
+                "tenant": tenant,
+                "start": start,
+                "end": start + count,
+                "version": manifest.get("version"),
+                "signature": signature
+            }
+            start += count
+
+        np.save(group_dir / "vectors.npy", np.vstack(vectors) if vectors else np.empty((0, dim), dtype="float32"))
+        np.save(group_dir / "tenant_ids.npy", np.concatenate(tenant_ids) if tenant_ids else np.empty(0, dtype="int32"))
+        write_chunk_columns(chunks, group_dir)
+        rows += start
+
+    with open(build_dir / TENANTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(tenants, f)
+
+    # Zeiger atomar umstellen, danach alte Builds entfernen (gemappte Dateien bleiben bis zum Unmap gültig)
+    tmp_current = pack_dir / (CURRENT_FILE + ".tmp")
+    tmp_current.write_text(build_dir.name, encoding='utf-8')
+    os.replace(tmp_current, pack_dir / CURRENT_FILE)
+    for old_dir in pack_dir.glob("build-*"):
+        if old_dir != build_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    return {"tenants": len(tenants), "rows": rows, "skipped": skipped, "build": build_dir.name}
+
+class TenantChunks(Sequence):
+    """Chunk-Liste eines Mandanten als Ausschnitt der gepackten Metadaten"""
+
+    def __init__(self, chunks: ColumnarChunks, start: int, end: int):
+        self._chunks = chunks
+        self._start = start
+        self._end = end
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self._chunks[self._start + position]
+
+class TenantSlice:
+    """
+    FAISS-kompatible Suche (search / ntotal) über die Zeilen eines Mandanten
+    Die Suche sieht nur den eigenen Zeilenbereich, Labels sind Positionen darin.
+    """
+
+    def __init__(self, vectors: np.ndarray, tenant_ids: np.ndarray, tenant: int, start: int, end: int):
+        self._vectors = vectors
+        self._tenant_ids = tenant_ids
+        self.tenant = tenant
+        self.start = start
+        self.end = end
+
+    @property
+    def ntotal(self) -> int:
+        return self.end - self.start
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exakte Skalarprodukt-Suche, aufgefüllt mit -1 wie bei FAISS"""
+        queries = np.asarray(queries, dtype="float32").reshape(-1, self._vectors.shape[1])
+        distances = np.full((len(queries), k), -np.inf, dtype="float32")
+        labels = np.full((len(queries), k), -1, dtype="int64")
+
+        count = min(k, self.ntotal)
+        if not count:
+            return distances, labels
+
+        scores = queries @ np.asarray(self._vectors[self.start:self.end]).T
+        # Zeilen anderer Mandanten können nie auftauchen, die Tenant-Spalte sichert das zusätzlich ab
+        scores[:, np.asarray(self._tenant_ids[self.start:self.end]) != self.tenant] = -np.inf
+        top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        labels[:, :count] = np.take_along_axis(top, order, axis=1)
+        distances[:, :count] = np.take_along_axis(top_scores, order, axis=1)
+        return distances, labels
+
+class TenantPack:
+    """
+    Gepackter Vektorspeicher vieler kleiner Chatbots (read-only, mmap)
+    Pro Chatbot bleibt nur eine Zeile in der Mandanten-Tabelle resident.
+    """
+
+    def __init__(self, pack_dir: Path = TENANT_PACK_DIR):
+        self.pack_dir = Path(pack_dir)
+        self._tenants: Dict[str, Dict] = {}
+        self._groups: Dict[str, Dict] = {}
+        self._current_signature = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale = 0
+
+    def _reload_if_changed(self):
+        current_file = self.pack_dir / CURRENT_FILE
+        signature = _manifest_signature(current_file)
+        if signature == self._current_signature:
+            return
+
+        with self._lock:
+            if signature == self._current_signature:
+                return
+            tenants, groups = {}, {}
+            if signature is not None:
+                build_dir = self.pack_dir / current_file.read_text(encoding='utf-8').strip()
+                try:
+                    with open(build_dir / TENANTS_FILE, 'r', encoding='utf-8') as f:
+                        tenants = json.load(f)
+                    for group_dir in build_dir.glob("d*"):
+                        groups[group_dir.name] = {
+                            "vectors": np.load(group_dir / "vectors.npy", mmap_mode="r"),
+                            "tenant_ids": np.load(group_dir / "tenant_ids.npy", mmap_mode="r"),
+                            "chunks": ColumnarChunks(group_dir)
+                        }
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Tenant-Pack {build_dir.name} nicht lesbar: {e}")
+                    tenants, groups = {}, {}
+            self._tenants, self._groups = tenants, groups
+            self._current_signature = signature
+
+    def get_entry(self, chatbot_id: str, manifest_file: Path) -> Optional[Dict]:
+        """
+        Registry-kompatibler Eintrag (index, chunks, by_id, lexical, metric) oder None,
+        wenn der Chatbot nicht gepackt ist oder seit dem Packen neu gebaut wurde
+        """
+        self._reload_if_changed()
+        tenant = self._tenants.get(chatbot_id)
+        if tenant is None:
+            return None
+        if tenant["signature"] != _manifest_signature(manifest_file):
+            self.stale += 1
+            return None
+
+        group = self._groups[tenant["group"]]
+        self.hits += 1
+        return {
+            "index": TenantSlice(group["vectors"], group["tenant_ids"], tenant["tenant"],
+                                 tenant["start"], tenant["end"]),
+            "chunks": TenantChunks(group["chunks"], tenant["start"], tenant["end"]),
+            "by_id": None,
+            # Gepackte Mandanten suchen rein vektoriell
+            "lexical": None,
+            "metric": "ip",
+            "version": tenant["version"],
+            "signature": tenant["signature"],
+            "tenant_pack": True
+        }
+
+    def is_packed(self, chatbot_id: str) -> bool:
+        self._reload_if_changed()
+        return chatbot_id in self._tenants
+
+    def stats(self) -> Dict:
+        """Statistiken für Health-Endpoints"""
+        self._reload_if_changed()
+        return {
+            "tenants": len(self._tenants),
+            "rows": sum(len(group["tenant_ids"]) for group in self._groups.values()),
+            "hits": self.hits,
+            "stale": self.stale
+        }
+
+# Globale Tenant-Pack-Instanz
+tenant_pack = None
+
+def get_tenant_pack() -> TenantPack:
+    """
+    Singleton Pattern für den Tenant-Pack
+
+    Returns:
+        TenantPack Instance
+    """
+    global tenant_pack
+    if tenant_pack is None:
+        tenant_pack = TenantPack()
+    return tenant_pack
@@ -0,0 +1,46 @@
+# platform/utils/token_utils.py
+
+from functools import lru_cache
+from typing import List
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken ist optional, sonst grobe Schätzung
+    tiktoken = None
+
+# Encoding der text-embedding-3-* und aktuellen Chat-Modelle
+DEFAULT_ENCODING = "cl100k_base"
+
+@lru_cache(maxsize=4)
+def _get_encoding(name: str):
+    return tiktoken.get_encoding(name)
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """
+    Zählt Tokens eines Textes
+
+    Verwendet tiktoken falls installiert, sonst die übliche Näherung
+    von ca. 4 Zeichen pro Token.
+    """
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_get_encoding(encoding_name).encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+def count_tokens_batch(texts: List[str], encoding_name: str = DEFAULT_ENCODING) -> List[int]:
+    """Zählt Tokens für mehrere Texte"""
+    if not texts:
+        return []
+    if tiktoken is not None:
+        encoded = _get_encoding(encoding_name).encode_batch(list(texts), disallowed_special=())
+        return [len(tokens) for tokens in encoded]
+    return [count_tokens(text, encoding_name) for text in texts]
+
+def truncate_to_tokens(text: str, max_tokens: int, encoding_name: str = DEFAULT_ENCODING) -> str:
+    """Kürzt einen Text auf höchstens max_tokens Tokens (ohne tiktoken: ca. 4 Zeichen pro Token)"""
+    if tiktoken is None:
+        return text[:max(max_tokens, 0) * 4]
+    encoding = _get_encoding(encoding_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])